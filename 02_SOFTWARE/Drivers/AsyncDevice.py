@@ -0,0 +1,89 @@
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Callable
+import asyncio
+import logging
+import time
+
+logger = logging.getLogger("root")
+
+
+class AsyncDevice(object):
+    """
+    AsyncDevice makes a blocking device driver awaitable, such that several devices can be scheduled on one asyncio
+    event loop. Every device owns a single worker thread which acts as transport for its serial port: calls to the
+    same device are executed one after another in the order they were issued, while calls to different devices
+    overlap.
+
+    Cancelling a coroutine awaiting a call does not interrupt the call itself. A transaction already handed to the
+    serial port is always completed, such that no partially written frames are left on the port and the next call
+    finds the device in a defined state.
+
+    .. note::
+
+       Example of usage:
+
+          .. code-block:: python
+
+             sfc = AsyncDevice(device=SFX5400(serial_port="COM3"), name="SFC")
+             result, completion_time = await sfc.measure()
+             await sfc.call(sfc.device.set_flow, setpoint_normalized=0.5)
+             await sfc.close()
+
+    :type device: object
+    :param device: Driver instance, e.g. an EKS, SFX5400 or ShdlcIoModule.
+    :type name: str
+    :param name: Name of the device, used to name its worker thread.
+    :type profiler: StageProfiler
+    :param profiler: Optional profiler measuring every measurement as stage named after the device in lower case.
+    """
+
+    def __init__(self, device, name: str, profiler=None) -> None:
+        self.device = device
+        self.name = name
+        self.profiler = profiler
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=name)
+        self._closed = False
+
+    async def call(self, function: Callable, *args, **kwargs):
+        """
+        Executes a blocking function on the worker thread of the device.
+
+        :type function: Callable
+        :param function: Function to execute, usually a method of the device.
+        :return: The return value of the function.
+        """
+        if self._closed:
+            raise RuntimeError("Device {} is already closed!".format(self.name))
+        future = asyncio.get_running_loop().run_in_executor(
+            self._executor, partial(function, *args, **kwargs)
+        )
+        # Shield the transaction, such that cancelling the caller does not abandon it half way
+        return await asyncio.shield(future)
+
+    async def measure(self) -> tuple:
+        """
+        Performs a measurement of the device.
+
+        :return: The measurement and the time it was completed at.
+        """
+        return await self.call(self._timed_measure)
+
+    async def close(self) -> None:
+        """
+        Waits for all issued calls to complete and stops the worker thread. The device itself is not disconnected.
+        """
+        if not self._closed:
+            self._closed = True
+            await asyncio.get_running_loop().run_in_executor(
+                None, partial(self._executor.shutdown, wait=True)
+            )
+            logger.info("Closed asynchronous access to {}.".format(self.name))
+
+    def _timed_measure(self) -> tuple:
+        if self.profiler is None:
+            result = self.device.measure()
+        else:
+            with self.profiler.stage(self.name.lower()):
+                result = self.device.measure()
+        return result, time.time()
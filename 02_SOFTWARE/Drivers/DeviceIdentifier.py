@@ -31,12 +31,33 @@ class DeviceIdentifier:
         self.serials = serials
         self.serial_ports = {}
 
-    def open(self):
+    @staticmethod
+    def scan() -> list:
+        """
+        Lists the available serial ports. For Linux an additional tty-setup script is executed first to allow
+        detection of all USB devices.
+
+        :return: Returns the available ports as listed by `serial.tools.list_ports.comports`.
+        """
+        if platform.system() == "Linux":
+            logger.debug(
+                "Running '01_SETUP/tty_setup.sh' to allow detection of all devices."
+            )
+            # Setup tty
+            dirname = os.path.dirname(__file__)
+            filename = os.path.join(dirname, "../../01_SETUP/tty_setup.sh")
+            filename = os.path.normpath(filename)
+            os.system(filename)
+        return list_ports.comports()
+
+    def open(self, ports=None):
         """
         Detects the current os. For Windows the letter 'A' is appended to the Linux-specific serial of the device.
-        For Linux an additional tty-setup script is executed to allow detection of all USB devices. After that the
-        serials of the available devices are compared and linked to `self.serials`.
+        After that the serials of the available devices are compared and linked to `self.serials`.
 
+        :type ports: list
+        :param ports: Optional list of available ports as returned by :meth:`scan`, e.g. to identify the devices of
+           several rigs with a single scan. The ports are scanned if None.
         :return: Returns True if all devices listed in self.serials could be found, False otherwise.
         """
         if platform.system() == "Windows":
@@ -48,18 +69,11 @@ class DeviceIdentifier:
                 self.serials[device] = "{}A".format(self.serials[device])
         elif platform.system() == "Linux":
             logger.debug("Platform identified as Windows")
-            logger.debug(
-                "Running '01_SETUP/tty_setup.sh' to allow detection of all devices."
-            )
-            # Setup tty
-            dirname = os.path.dirname(__file__)
-            filename = os.path.join(dirname, "../../01_SETUP/tty_setup.sh")
-            filename = os.path.normpath(filename)
-            os.system(filename)
         else:
             logger.warning("Platform could not be detected!")
         # List comports
-        ports = list_ports.comports()
+        if ports is None:
+            ports = self.scan()
         # Identify all needed devices
         any_not_found = False
         # Iterate over all looked for devices
@@ -82,7 +82,8 @@ class SFX5400(SensorBase):
 
         :return: Dictionary containing the measurement.
         """
-        result = self.ShdlcDevice.execute(Sfc5400ShdlcCmdReadMeasuredFlow())
+        with self._lock:
+            result = self.ShdlcDevice.execute(Sfc5400ShdlcCmdReadMeasuredFlow())
         return {FLOW_MEASUREMENT_NAME: result}
 
     def set_flow(self, setpoint_normalized: float) -> bool:
@@ -96,7 +97,10 @@ class SFX5400(SensorBase):
         if FLOW_UNIT == 1:
             setpoint_normalized *= MAXIMUM_FLOW_SLM
         try:
-            self.ShdlcDevice.execute(Sfc5400ShdlcCmdSetSetpoint(setpoint_normalized))
+            with self._lock:
+                self.ShdlcDevice.execute(
+                    Sfc5400ShdlcCmdSetSetpoint(setpoint_normalized)
+                )
         except Exception as e:
             logger.error(
                 "Could not set the mass flow. Make sure there is a mass "
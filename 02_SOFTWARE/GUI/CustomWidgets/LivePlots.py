@@ -1,8 +1,8 @@
 import pyqtgraph
 from setup import Setup
+from Utility.MeasurementBuffer import MeasurementSnapshot
 from PyQt5.QtCore import QTimer
 from typing import Tuple
-import numpy
 import logging
 
 logger = logging.getLogger("root")
@@ -54,6 +54,8 @@ class LivePlotWidget(pyqtgraph.PlotWidget):
         self.signals = []
         self.ylims = ylims
         self.title = title
+        # Oldest and next sequence number of the measurement buffer when the signals were plotted
+        self._plotted_sequence = None
 
         # Standard visual setup for plots:
         self.showGrid(x=True, y=True, alpha=0.7)
@@ -89,30 +91,56 @@ class LivePlotWidget(pyqtgraph.PlotWidget):
 
     def update_plot_data(self):
         """
-        Handles the updating of a LivePLotWidget.
+        Handles the updating of a LivePLotWidget. The plot is only redrawn if new measurements have been buffered
+        since the last update, the buffer has been cleared or the widget has been resized.
         """
-        if self.setup.measurement_buffer["Time"]:
-            if self.signals:
+        if self.signals:
+            snapshot = self._snapshot()
+            if snapshot is None:
+                # No new measurements since the last update
+                pass
+            elif len(snapshot):
                 shifted_time_axis = (
-                    numpy.array(self.setup.measurement_buffer["Time"])
-                    - self.setup.measurement_buffer["Time"][-1]
-                    + self.setup.interval_s
+                    snapshot["Time"] - snapshot["Time"][-1] + self.setup.interval_s
                 )
-                n_entries = len(shifted_time_axis)
                 for signal in self.signals:
                     signal.data_line.setData(
-                        numpy.asarray(shifted_time_axis).flatten(),
-                        numpy.asarray(
-                            self.setup.measurement_buffer[signal.identifier]
-                        ).flatten()[0:n_entries],
+                        shifted_time_axis, snapshot[signal.identifier]
                     )
             else:
-                # No signals added yet
-                pass
+                # The buffer is empty, e.g. after clearing it
+                for signal in self.signals:
+                    signal.data_line.setData([], [])
         else:
-            # No signals recorded yet
+            # No signals added yet
             pass
 
+    def _snapshot(self) -> MeasurementSnapshot:
+        """
+        Takes a consistent snapshot of the time axis and all plotted signals from the measurement buffer. Long
+        histories are decimated to a min/max envelope with about two points per horizontal pixel of the plot.
+
+        :return: Snapshot of the plotted signals, None if the buffered measurements have not changed since the last
+           call.
+        """
+        buffer = self.setup.measurement_buffer
+        # Clearing the buffer moves the oldest measurement without adding new ones
+        if (buffer.oldest, buffer.sequence) == self._plotted_sequence:
+            return None
+        snapshot = buffer.decimated(
+            max_points=2 * max(self.width(), 1),
+            signals=["Time"] + [signal.identifier for signal in self.signals],
+        )
+        self._plotted_sequence = (snapshot.oldest, snapshot.head)
+        return snapshot
+
+    def resizeEvent(self, event) -> None:
+        """
+        Redraws the plot on the next update, decimated to the new width.
+        """
+        super(LivePlotWidget, self).resizeEvent(event)
+        self._plotted_sequence = None
+
     def reset_plot_layout(self) -> None:
         """
         Allows to reset the plot layout to the original view
@@ -161,20 +189,19 @@ class LivePlotWidgetCompetition(LivePlotWidget):
         self.addItem(self.fill_between)
 
     def update_plot_data(self):
-        if self.setup.measurement_buffer["Time"]:
-            if self.signals:
-                shifted_time_axis = (
-                    numpy.array(self.setup.measurement_buffer["Time"])
-                    - self.setup.measurement_buffer["Time"][-1]
-                    + self.setup.interval_s
-                )
-                n_entries = len(shifted_time_axis)
+        if self.signals:
+            snapshot = self._snapshot()
+            if snapshot is not None:
+                if len(snapshot):
+                    shifted_time_axis = (
+                        snapshot["Time"] - snapshot["Time"][-1] + self.setup.interval_s
+                    )
+                else:
+                    # The buffer is empty, e.g. after clearing it
+                    shifted_time_axis = snapshot["Time"]
                 for signal in self.signals:
                     signal.data_line.setData(
-                        numpy.asarray(shifted_time_axis).flatten(),
-                        numpy.asarray(
-                            self.setup.measurement_buffer[signal.identifier]
-                        ).flatten()[0:n_entries],
+                        shifted_time_axis, snapshot[signal.identifier]
                     )
                 self.fill_between.setCurves(
                     curve1=self.signals[0].data_line, curve2=self.signals[1].data_line
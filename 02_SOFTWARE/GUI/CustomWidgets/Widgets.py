@@ -3,10 +3,9 @@ from abc import ABC
 from GUI.CustomWidgets.BaseWidgets import *
 from GUI.Utils import resource_path
 from setup import Setup
+from Utility.Scenario import Scenario
 from typing import Callable
 import logging
-import numpy
-import time
 from abc import abstractmethod
 
 logger = logging.getLogger("root")
@@ -32,15 +31,12 @@ class FancyPointCounter(QLCDNumber):
         self.timer.timeout.connect(self._update_counter)
 
     def _update_counter(self):
-        delta_t = numpy.asarray(
-            self.setup.measurement_buffer["Temperature_Difference"]
-        ).flatten()
-        target_delta_t = numpy.asarray(
-            self.setup.measurement_buffer["Target_Delta_T"]
-        ).flatten()
-        errors = delta_t - target_delta_t
-        squared_sums = numpy.sum(errors ** 2)
-        self._value = int(squared_sums)
+        """
+        Displays the sum of the squared control errors of all buffered measurements, which is maintained by the
+        running statistics of the measurement buffer.
+        """
+        statistics = self.setup.measurement_buffer.statistics("Squared_Control_Error")
+        self._value = int(statistics["sum"])
         self.display(self._value)
 
     def start(self):
@@ -121,7 +117,8 @@ class CompetitionWidget(FramedWidget):
         Update the progressbar to show the current remaining time. If the recording interval has passed the process
         is stopped.
         """
-        running_time_s = time.time() - self.initial_time
+        # The competition follows the clock of the setup, which runs faster than real time in an accelerated simulation
+        running_time_s = self.setup.clock.monotonic() - self.initial_time
         if running_time_s < self.wait_time_s:
             self._update_process_values(running_time_s=running_time_s)
             self.progressbar.setValue(running_time_s)
@@ -193,23 +190,13 @@ class CompetitionDisturbanceRejectionWidget(CompetitionWidget):
         # Add toggle setpoint actions
         self.enable_toggle_setpoint = enable_toggle_setpoint_action
         self.disable_toggle_setpoint = disable_toggle_setpoint_action
-        # divide by 100 to convert from slm to normalized units
-        self.nominal_flow = self.setup.config["general"]["nominal_mass_flow_rate"] / 100
-        self.disturbance_high = (
-            self.nominal_flow
-            + self.setup.config["disturbance_rejection"]["deviation"] / 100
-        )
-        self.disturbance_low = (
-            self.nominal_flow
-            - self.setup.config["disturbance_rejection"]["deviation"] / 100
-        )
-        self.disturbance_duration = self.setup.config["disturbance_rejection"][
-            "duration"
-        ]
-        self.disturbance_delay = self.setup.config["disturbance_rejection"]["delay"]
-        self.process_state = 0
+        # Flow disturbances of the competition, shared with the simulated scenarios
+        self.scenario = Scenario.disturbance_rejection(config=self.setup.config)
+        self.flow_schedule = self.scenario.schedules["flow"]
+        self.nominal_flow = self.flow_schedule.value(0)
+        self._current_flow = None
         # Configure progressbar and waiting time
-        self.wait_time_s = self.disturbance_delay * 3 + self.disturbance_duration * 2
+        self.wait_time_s = self.scenario.duration
         self.progressbar.setMaximum(self.wait_time_s)
 
     def _start_recording(self) -> None:
@@ -228,7 +215,7 @@ class CompetitionDisturbanceRejectionWidget(CompetitionWidget):
             < self.setup.config["anti_cheat"]["pid_setting_threshold"]
         ) or self.setup.simulation_mode:
             # Set the initial time of the recording
-            self.initial_time = time.time()
+            self.initial_time = self.setup.clock.monotonic()
             # Start the QTimer that controls the update rate of the widget
             self.timer.start()
             # Start the internal QTimer of the point counter
@@ -241,6 +228,7 @@ class CompetitionDisturbanceRejectionWidget(CompetitionWidget):
             self.setup.measurement_buffer.clear()
             # Set the mass flow to the initial value
             self.set_flow(self.nominal_flow)
+            self._current_flow = self.nominal_flow
             # Disable the start button for the duration of the recording
             self.start_button.setDisabled(True)
             # Disable pid sliders
@@ -261,30 +249,11 @@ class CompetitionDisturbanceRejectionWidget(CompetitionWidget):
         """
         Container function for updates that are specific to the inheriting widgets
         """
-        if running_time_s > self.disturbance_delay/2 and self.process_state == 0:
-            # Switch to disturbance high
-            self.set_flow(self.disturbance_high)
-            self.process_state = 1
-        elif (
-            running_time_s > self.disturbance_delay + self.disturbance_duration
-            and self.process_state == 1
-        ):
-            self.set_flow(self.nominal_flow)
-            self.process_state = 2
-        elif (
-            running_time_s > 2 * self.disturbance_delay + self.disturbance_duration
-            and self.process_state == 2
-        ):
-            self.set_flow(self.disturbance_low)
-            self.process_state = 3
-        elif (
-            running_time_s > 2 * self.disturbance_delay + 2 * self.disturbance_delay
-            and self.process_state == 3
-        ):
-            self.set_flow(self.nominal_flow)
-            self.process_state = 4
-        else:
-            pass
+        # Switch the flow whenever the next disturbance is due
+        flow = self.flow_schedule.value(running_time_s)
+        if flow != self._current_flow:
+            self.set_flow(flow)
+            self._current_flow = flow
 
     def _stop_recording(self) -> None:
         # Enable pid sliders
@@ -353,10 +322,15 @@ class StatusWidget(FramedWidget):
 
     def _update_lcds(self) -> None:
         """
-        Updates the displayed values.
+        Updates the displayed values. The tooltip of each LCD shows the statistics over all buffered measurements.
         """
         for key, lcd in self.lcds.items():
             if key == "FL":
                 lcd.number.display("{:.1f}".format(self.setup.state[lcd.signal]))
             else:
                 lcd.number.display("{:.2f}".format(self.setup.state[lcd.signal]))
+            statistics = self.setup.measurement_buffer.statistics(lcd.signal)
+            lcd.setToolTip(
+                "Mean: {mean:.2f}, Std: {std:.2f}, Min: {minimum:.2f}, Max: {maximum:.2f}"
+                " over {count} measurements".format(**statistics)
+            )
@@ -0,0 +1,220 @@
+from Simulation.PlantModel import PlantModel
+from Simulation.VectorPID import VectorPID
+from Utility.Scenario import Scenario
+import argparse
+import logging
+import numpy as np
+
+logger = logging.getLogger("root")
+
+
+def pareto_front(objectives: np.ndarray) -> np.ndarray:
+    """
+    Finds the points which are not dominated by any other point, all objectives being minimized. A point is dominated
+    by another point which is at least as good in all objectives and better in at least one, such that duplicates of a
+    point on the front are on the front as well.
+
+    :type objectives: np.ndarray
+    :param objectives: Array with one row per point and one column per objective.
+    :return: Boolean mask of the points on the Pareto front.
+    """
+    # Sorted lexicographically, a point can only be dominated by points before it, i.e. by the front found so far
+    order = np.lexsort(objectives.T[::-1])
+    front = np.zeros(len(objectives), dtype=bool)
+    optimal = []
+    for index in order:
+        point = objectives[index]
+        if not optimal or not np.any(
+            np.all(objectives[optimal] <= point, axis=1)
+            & np.any(objectives[optimal] < point, axis=1)
+        ):
+            front[index] = True
+            optimal.append(index)
+    return front
+
+
+class Autotuner(object):
+    """
+    The Autotuner searches the PID gains for the disturbance rejection competition offline. Thousands of gain triples
+    are simulated at once on the :class:`Simulation.PlantModel.PlantModel`, one plant per triple, each controlled by
+    a PID equivalent to the one of the :class:`setup.Setup`, see :class:`Simulation.VectorPID.VectorPID`. Every step
+    follows a measurement of the setup in simulation mode: the plant advances with the previous heater output, the
+    noisy measurement updates the controller and the safety checks of :meth:`setup.Setup.set_pwm` switch the heater
+    off if the flow is too low or a temperature too high.
+
+    The simulation starts at steady state on the setpoint, as required to start the competition, and runs the
+    :meth:`Utility.Scenario.Scenario.disturbance_rejection` scenario. Every triple is scored like by the point counter of
+    the competition, i.e. by the sum of the squared control errors of all logged measurements, and by its control
+    effort, the total variation of the heater output, which penalizes gains that amplify the measurement noise. The
+    triples on the Pareto front of both objectives are returned.
+
+    .. note::
+
+       Example of usage:
+
+          .. code-block:: python
+
+             tuner = Autotuner(config=ConfigurationHandler().data, seed=0)
+             gains, score, effort = tuner.tune(samples=10000)
+             kp, ki, kd = gains[0]  # Lowest score
+
+    :type config: dict
+    :param config: Configuration providing the "pid_controller", "disturbance_rejection", "safety" and "simulation"
+       sections.
+    :type setpoint: float
+    :param setpoint: Temperature difference setpoint, the low setpoint of the configuration by default.
+    :type seed: int
+    :param seed: Optional seed of the measurement noise and of the sampled gains.
+    """
+
+    def __init__(self, config, setpoint=None, seed=None) -> None:
+        self.config = config
+        self.setpoint = (
+            config["general"]["temperature_difference_set_point_low"]
+            if setpoint is None
+            else setpoint
+        )
+        self.seed = seed
+        self.t_sampling = config["general"]["t_sampling"]
+        # Only every n-th measurement is stored in the measurement buffer and scored
+        self.logging_decimation = max(
+            int(round(config["general"]["t_logging"] / self.t_sampling)), 1
+        )
+        self.limits = np.array(
+            [
+                config["pid_controller"]["p_limit"],
+                config["pid_controller"]["i_limit"],
+                config["pid_controller"]["d_limit"],
+            ],
+            dtype=float,
+        )
+        self.scenario = Scenario.disturbance_rejection(config=config)
+
+    def sample(self, samples: int) -> np.ndarray:
+        """
+        Samples gain triples uniformly within the limits of the gain sliders.
+
+        :type samples: int
+        :param samples: Number of triples.
+        :return: Array with one row of Kp, Ki and Kd per triple.
+        """
+        random = np.random.default_rng(self.seed)
+        return random.uniform(0, 1, size=(samples, 3)) * self.limits
+
+    def evaluate(self, gains: np.ndarray) -> tuple:
+        """
+        Simulates the scenario for every gain triple.
+
+        :type gains: np.ndarray
+        :param gains: Array with one row of Kp, Ki and Kd per triple.
+        :return: The score and the control effort of every triple.
+        """
+        gains = np.atleast_2d(np.asarray(gains, dtype=float))
+        n = len(gains)
+        # Every triple is scored on the same noise, independent of the other triples simulated at once
+        plant = PlantModel(
+            config=self.config,
+            t_sampling=self.t_sampling,
+            n=n,
+            seed=self.seed,
+            shared_noise=True,
+        )
+        flow_schedule = self.scenario.schedules["flow"]
+        nominal_flow = flow_schedule.value(0)
+        # Start at steady state, with the integral term holding the heater output
+        pwm = np.full(
+            n,
+            np.clip(self.setpoint / plant.gain(nominal_flow * plant.max_flow), 0, 1),
+        )
+        plant.reset(
+            temperature_difference=self.setpoint,
+            flow=nominal_flow * plant.max_flow,
+            pwm=pwm,
+        )
+        kp, ki, kd = gains.T
+        controller = VectorPID(kp=kp, ki=ki, kd=kd, setpoint=self.setpoint)
+        controller.integral = pwm.copy()
+
+        lower_flow_limit = self.config["safety"]["lower_flow_limit"]
+        upper_temperature_limit = self.config["safety"]["upper_temperature_limit"]
+        score = np.zeros(n)
+        effort = np.zeros(n)
+        steps = int(np.ceil(self.scenario.duration / self.t_sampling))
+        for k in range(steps):
+            plant.step(pwm=pwm, flow_setpoint=flow_schedule.value(k * self.t_sampling))
+            measurement = plant.measure()
+            delta_t = measurement["Temperature_2"] - measurement["Temperature_1"]
+            if k % self.logging_decimation == 0:
+                score += (delta_t - self.setpoint) ** 2
+            output = controller(delta_t, dt=self.t_sampling)
+            unsafe = (
+                (measurement["Flow"] < lower_flow_limit)
+                | (measurement["Temperature_1"] > upper_temperature_limit)
+                | (measurement["Temperature_2"] > upper_temperature_limit)
+            )
+            output = np.where(unsafe, 0.0, output)
+            effort += np.abs(output - pwm)
+            pwm = output
+        return score, effort
+
+    def tune(self, samples=4096, chunk_size=8192) -> tuple:
+        """
+        Samples and evaluates gain triples and selects the ones on the Pareto front of score and control effort.
+
+        :type samples: int
+        :param samples: Number of sampled triples.
+        :type chunk_size: int
+        :param chunk_size: Number of triples simulated at once, limiting the memory used.
+        :return: The triples on the Pareto front ordered by increasing score, their scores and their control efforts.
+        """
+        gains = self.sample(samples)
+        score = np.empty(samples)
+        effort = np.empty(samples)
+        for start in range(0, samples, chunk_size):
+            stop = start + chunk_size
+            score[start:stop], effort[start:stop] = self.evaluate(gains[start:stop])
+        front = pareto_front(np.column_stack((score, effort)))
+        order = np.argsort(score[front])
+        logger.info(
+            "Evaluated {} gain triples, {} are Pareto optimal.".format(
+                samples, np.count_nonzero(front)
+            )
+        )
+        return gains[front][order], score[front][order], effort[front][order]
+
+
+def main(arguments=None) -> None:
+    from Utility.ConfigurationHandler import ConfigurationHandler
+    from Utility.Logger import setup_custom_logger
+
+    parser = argparse.ArgumentParser(
+        description="Searches PID gains for the disturbance rejection competition on the simulated plant and prints "
+        "the Pareto optimal gains with their score and control effort."
+    )
+    parser.add_argument("--config", help="Path of the configuration file.")
+    parser.add_argument(
+        "--samples", type=int, default=4096, help="Number of sampled gain triples."
+    )
+    parser.add_argument(
+        "--setpoint", type=float, help="Temperature difference setpoint."
+    )
+    parser.add_argument("--seed", type=int, help="Seed of the noise and the sampling.")
+    args = parser.parse_args(arguments)
+    setup_custom_logger(name="root", level=logging.INFO)
+
+    tuner = Autotuner(
+        config=ConfigurationHandler(path=args.config).data,
+        setpoint=args.setpoint,
+        seed=args.seed,
+    )
+    gains, score, effort = tuner.tune(samples=args.samples)
+    for (kp, ki, kd), points, variation in zip(gains, score, effort):
+        logger.info(
+            "Kp={:.4f} Ki={:.4f} Kd={:.4f}: {:.0f} points, control effort {:.2f}".format(
+                kp, ki, kd, points, variation
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
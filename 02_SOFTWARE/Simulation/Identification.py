@@ -0,0 +1,340 @@
+from Simulation.Replay import load_recording
+from concurrent.futures import ProcessPoolExecutor
+import argparse
+import glob
+import logging
+import multiprocessing
+import os
+import numpy as np
+
+logger = logging.getLogger("root")
+
+# Parameters of the "simulation" section identified from the recordings
+IDENTIFIED_PARAMETERS = ("time_constant", "dead_time", "transmitted_power", "heat_loss")
+
+
+class Identification(object):
+    """
+    The Identification fits the thermal model of the :class:`Simulation.PlantModel.PlantModel` to recordings of the
+    setup, such that the simulation and the tuning tools use the measured dynamics. The model relates the temperature
+    difference to the heater output u and the flow, sampled with the heater output held between two measurements,
+
+    .. math::
+
+       \\Delta T_k = \\sum_{i=1}^{n} a_i \\Delta T_{k-i} + b \\frac{u_{k-d}}{\\dot m_k c_p + G},
+
+    with n = 1 for a first order plus dead time model and n = 2 for a second order model. For a given dead time d and
+    heat loss G the model is linear in its coefficients, which are fitted by least squares for all candidate heat
+    losses at once, and the candidate with the smallest residual is selected. The time constants follow from the
+    poles of the model and the transmitted share of the heater power from its steady state gain.
+
+    The heat loss can only be told apart from the transmitted power if the flow varies during the recording,
+    otherwise the configured heat loss is kept. Recordings in which the temperature difference hardly changes carry
+    no information about the dynamics and are marked as not excited. Only fits which reproduce their recording well
+    and describe a stable, physically possible plant are written to the configuration, see :meth:`write`.
+
+    .. note::
+
+       Example of usage:
+
+          .. code-block:: python
+
+             identification = Identification(config=config.data)
+             results = identification.fit_files(glob.glob("Sample Datasets/*.mat"))
+             identification.write(results, config=config)
+
+    :type config: dict
+    :param config: Configuration providing the "simulation" and "massflow_estimate" sections.
+    :type order: int
+    :param order: Order of the fitted model, 1 or 2.
+    :type max_dead_time: float
+    :param max_dead_time: Largest candidate dead time in seconds.
+    :type heat_losses: np.ndarray
+    :param heat_losses: Candidate heat losses in W/K, used if the flow varies.
+    :type min_excitation: float
+    :param min_excitation: Smallest range of the temperature difference of an excited recording.
+    :type min_fit: float
+    :param min_fit: Smallest simulation fit in percent of a recording used by :meth:`write`.
+    """
+
+    def __init__(
+        self,
+        config,
+        order=1,
+        max_dead_time=5.0,
+        heat_losses=None,
+        min_excitation=1.0,
+        min_fit=80.0,
+    ) -> None:
+        if order not in (1, 2):
+            raise ValueError("Only models of first or second order can be fitted!")
+        estimate = config["measurement"]["massflow_estimate"]
+        self.order = order
+        self.max_dead_time = max_dead_time
+        self.min_excitation = min_excitation
+        self.min_fit = min_fit
+        self.heater_power = estimate["voltage"] ** 2 / estimate["resistance"]
+        # Heat capacity of one slm of air flow per second
+        self.heat_capacity = estimate["c_p"] / estimate["massflow_SI2SLM"]
+        self.heat_loss = config["simulation"]["heat_loss"]
+        self.heat_losses = (
+            np.linspace(0.025, 2, 80) if heat_losses is None else np.asarray(heat_losses)
+        )
+
+    def fit(self, recording: dict) -> dict:
+        """
+        Fits the model to a single recording.
+
+        :type recording: dict
+        :param recording: Recorded signals, see :func:`Simulation.Replay.load_recording`.
+        :return: A dictionary with the identified parameters, i.e. the time constant(s), dead time, transmitted power
+           and heat loss, the quality of the fit and whether the recording was excited.
+        """
+        delta_t = recording["Temperature_Difference"]
+        pwm = recording["PWM"]
+        flow = np.maximum(recording["Flow"], 1e-3)
+        t_sampling = float(np.median(np.diff(recording["Time"])))
+        n_samples = len(delta_t)
+        result = {"order": self.order, "samples": n_samples, "t_sampling": t_sampling}
+        if np.ptp(delta_t) < self.min_excitation:
+            result["excited"] = False
+            return result
+        result["excited"] = True
+
+        max_delay = int(round(self.max_dead_time / t_sampling))
+        # The heater output before the recording is assumed to equal its first value
+        history = np.concatenate((np.full(max_delay, pwm[0]), pwm))
+        flow_varies = np.std(flow) > 0.05 * np.mean(flow)
+        losses = self.heat_losses if flow_varies else np.array([self.heat_loss])
+        start = self.order
+        y = delta_t[start:]
+        # Past temperature differences, shared by all candidates
+        lags = np.stack(
+            [delta_t[start - i : n_samples - i] for i in range(1, self.order + 1)]
+        )
+        lags = np.broadcast_to(lags, (len(losses),) + lags.shape)
+        conductance = flow[start:] * self.heat_capacity + losses[:, np.newaxis]
+
+        best = None
+        for delay in range(max_delay + 1):
+            delayed = history[max_delay + start - delay : max_delay + n_samples - delay]
+            heating = delayed / conductance
+            # Design matrices of all candidate heat losses, one regressor per row
+            design = np.concatenate((lags, heating[:, np.newaxis, :]), axis=1)
+            normal = design @ design.transpose(0, 2, 1)
+            # The pseudo inverse copes with regressors without variation, e.g. a step delayed past the end
+            coefficients = (np.linalg.pinv(normal) @ (design @ y)[..., np.newaxis])[
+                ..., 0
+            ]
+            residuals = y - np.einsum("gi,gin->gn", coefficients, design)
+            sse = np.sum(residuals**2, axis=1)
+            index = int(np.argmin(sse))
+            if best is None or sse[index] < best[0]:
+                best = (sse[index], delay, losses[index], coefficients[index])
+
+        sse, delay, heat_loss, coefficients = best
+        poles = np.roots(np.concatenate(([1.0], -coefficients[:-1])))
+        stable = bool(np.all(np.isreal(poles)) and np.all(np.abs(poles) < 1))
+        if stable:
+            # A pole at or below zero decays within one sampling time, its time constant is not resolved
+            time_constants = sorted(
+                (
+                    float(-t_sampling / np.log(pole)) if pole > 0 else 0.0
+                    for pole in poles.real
+                ),
+                reverse=True,
+            )
+        else:
+            logger.warning(
+                "The fitted model of order {} has {} poles {}, its time constants are undefined.".format(
+                    self.order,
+                    "complex" if np.any(np.iscomplex(poles)) else "unstable",
+                    poles,
+                )
+            )
+            time_constants = [np.nan] * self.order
+        static_gain = coefficients[-1] / (1 - np.sum(coefficients[:-1]))
+        result.update(
+            time_constant=time_constants[0],
+            dead_time=delay * t_sampling,
+            transmitted_power=float(static_gain / self.heater_power),
+            heat_loss=float(heat_loss),
+            heat_loss_identified=bool(flow_varies),
+            stable=stable,
+            rmse=float(np.sqrt(sse / len(y))),
+            fit=self._simulation_fit(
+                delta_t=delta_t,
+                pwm=history[max_delay - delay : max_delay - delay + n_samples],
+                flow=flow,
+                coefficients=coefficients,
+                heat_loss=heat_loss,
+            ),
+        )
+        if self.order == 2:
+            result["time_constants"] = time_constants
+        return result
+
+    def _simulation_fit(self, delta_t, pwm, flow, coefficients, heat_loss) -> float:
+        """
+        :param pwm: Heater output delayed by the dead time.
+        :return: The normalized fit in percent of the fitted model simulated from the first measurements, which unlike
+           the one step residual reveals models that drift away from the recording.
+        """
+        heating = pwm / (flow * self.heat_capacity + heat_loss)
+        simulated = delta_t.astype(float).copy()
+        start = self.order
+        for k in range(start, len(delta_t)):
+            simulated[k] = (
+                np.dot(coefficients[:-1], simulated[k - self.order : k][::-1])
+                + coefficients[-1] * heating[k]
+            )
+        error = np.linalg.norm(delta_t[start:] - simulated[start:])
+        spread = np.linalg.norm(delta_t[start:] - np.mean(delta_t[start:]))
+        return float(100 * (1 - error / spread))
+
+    def fit_file(self, file_name: str) -> dict:
+        """
+        Loads a recording and fits the model to it, see :meth:`fit`.
+        """
+        return self.fit(load_recording(file_name))
+
+    def fit_files(self, file_names: list, processes=None) -> dict:
+        """
+        Fits the model to several recordings in parallel, one recording per worker process.
+
+        :type file_names: list
+        :param file_names: Paths of the recordings.
+        :type processes: int
+        :param processes: Number of worker processes, by default one per recording up to the number of cores. With a
+           single process the recordings are fitted in the calling process.
+        :return: A dictionary mapping every path to the result of its fit.
+        """
+        if processes is None:
+            processes = min(len(file_names), os.cpu_count() or 1)
+        if processes <= 1:
+            return {file_name: self.fit_file(file_name) for file_name in file_names}
+        with ProcessPoolExecutor(
+            max_workers=processes, mp_context=multiprocessing.get_context("spawn")
+        ) as executor:
+            return dict(zip(file_names, executor.map(self.fit_file, file_names)))
+
+    def write(self, results: dict, config, save=True) -> dict:
+        """
+        Writes the median of the parameters identified from all excited recordings to the "simulation" section of
+        the configuration. Recordings are ignored if their fit is below :attr:`min_fit`, their model is unstable or
+        their transmitted power is not positive. The heat loss is only updated if it could be identified from at least
+        one of the remaining recordings. A transmitted power above one, i.e. more than the heater power, points to an
+        inaccurate heater or flow calibration and is limited to one.
+
+        :type results: dict
+        :param results: Results of the fits by recording, see :meth:`fit_files`.
+        :type config: ConfigurationHandler
+        :param config: Configuration to update.
+        :type save: bool
+        :param save: If True, the configuration file is written.
+        :return: The updated parameters.
+        """
+        if self.order != 1:
+            raise ValueError("Only first order models can be used by the simulation!")
+        excited = [result for result in results.values() if result["excited"]]
+        fits = [
+            result
+            for result in excited
+            if result["stable"]
+            and result["fit"] >= self.min_fit
+            and result["transmitted_power"] > 0
+        ]
+        if len(fits) < len(excited):
+            logger.warning(
+                "Ignoring {} of {} excited recordings with a fit below {} % or an implausible model.".format(
+                    len(excited) - len(fits), len(excited), self.min_fit
+                )
+            )
+        if not fits:
+            raise ValueError(
+                "None of the recordings is excited enough and fitted well enough to identify the plant!"
+            )
+        parameters = {
+            name: float(np.median([result[name] for result in fits]))
+            for name in IDENTIFIED_PARAMETERS
+        }
+        losses = [
+            result["heat_loss"] for result in fits if result["heat_loss_identified"]
+        ]
+        if losses:
+            parameters["heat_loss"] = float(np.median(losses))
+        else:
+            del parameters["heat_loss"]
+        if parameters["transmitted_power"] > 1:
+            logger.warning(
+                "Identified transmitted power of {:.2f} exceeds the heater power, limiting it to 1. Please check the "
+                "heater and flow calibration.".format(parameters["transmitted_power"])
+            )
+            parameters["transmitted_power"] = 1.0
+        config["simulation"].update(parameters)
+        logger.info("Identified plant parameters: {}".format(parameters))
+        if save:
+            config.write()
+        return parameters
+
+
+def main(arguments=None) -> None:
+    from Utility.ConfigurationHandler import ConfigurationHandler
+    from Utility.Logger import setup_custom_logger
+
+    parser = argparse.ArgumentParser(
+        description="Fits the thermal model of the setup to recordings and optionally writes the identified "
+        "parameters to the simulation section of the configuration."
+    )
+    parser.add_argument(
+        "recordings", nargs="+", help="Recorded .mat files or folders of them."
+    )
+    parser.add_argument("--config", help="Path of the configuration file.")
+    parser.add_argument(
+        "--order", type=int, default=1, help="Order of the fitted model, 1 or 2."
+    )
+    parser.add_argument(
+        "--max-dead-time",
+        type=float,
+        default=5.0,
+        help="Largest candidate dead time in seconds.",
+    )
+    parser.add_argument(
+        "--min-fit",
+        type=float,
+        default=80.0,
+        help="Smallest simulation fit in percent of a recording written to the configuration.",
+    )
+    parser.add_argument("--processes", type=int, help="Number of worker processes.")
+    parser.add_argument(
+        "--write",
+        action="store_true",
+        help="Write the identified parameters to the configuration file.",
+    )
+    args = parser.parse_args(arguments)
+    if args.write and args.order != 1:
+        parser.error("Only first order models can be written to the configuration.")
+    setup_custom_logger(name="root", level=logging.INFO)
+
+    file_names = []
+    for path in args.recordings:
+        if os.path.isdir(path):
+            file_names.extend(sorted(glob.glob(os.path.join(path, "*.mat"))))
+        else:
+            file_names.append(path)
+    config = ConfigurationHandler(path=args.config)
+    identification = Identification(
+        config=config.data,
+        order=args.order,
+        max_dead_time=args.max_dead_time,
+        min_fit=args.min_fit,
+    )
+    results = identification.fit_files(file_names, processes=args.processes)
+    for file_name, result in results.items():
+        logger.info("{}: {}".format(os.path.basename(file_name), result))
+    if args.write:
+        identification.write(results, config=config)
+
+
+if __name__ == "__main__":
+    main()
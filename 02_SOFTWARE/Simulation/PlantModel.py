@@ -0,0 +1,142 @@
+import numpy as np
+
+
+class PlantModel(object):
+    """
+    The PlantModel simulates the thermal behaviour of the setup, replacing the devices in simulation mode. The
+    temperature difference across the heater follows a first order lag with transport delay,
+
+    .. math::
+
+       \\tau \\dot{\\Delta T}(t) = K(\\dot m) \\, u(t - T_d) - \\Delta T(t),
+
+    where u is the normalized heater output. The gain follows from the energy balance used by the
+    :class:`setup.MassflowEstimator`: the transmitted share of the heater power :math:`\\eta U^2 / R` heats the air
+    flowing through the pipe and is partly lost to the surroundings,
+
+    .. math::
+
+       K(\\dot m) = \\frac{\\eta U^2 / R}{\\dot m c_p + G},
+
+    such that the gain drops with increasing flow. The heat loss keeps the gain finite without flow. By default half
+    of the heater power is transmitted to the air, as assumed by the corrected mass flow calculation in
+    Model_Parameters.m, such that the uncorrected "Flow_Estimate" deviates from the simulated flow like on the setup.
+    The parameters can be identified from recordings by :class:`Simulation.Identification.Identification`. The flow
+    follows its setpoint with a first order lag, mimicking the flow controller.
+
+    The state of several independent plants is held in NumPy arrays, e.g. to simulate a batch of plants in parallel.
+    The model is discretized exactly for the fixed sampling time and the transport delay is implemented as ring
+    buffer, such that every step takes constant time.
+
+    :type config: dict
+    :param config: Configuration providing the "simulation" section and the heater constants of the
+       "massflow_estimate" section.
+    :type t_sampling: float
+    :param t_sampling: Time between two steps in seconds.
+    :type n: int
+    :param n: Number of simulated plants.
+    :type seed: int
+    :param seed: Optional seed of the measurement noise, for reproducible simulations.
+    :type shared_noise: bool
+    :param shared_noise: If True, all plants see the same measurement noise, e.g. to compare controllers under equal
+       conditions, independent of the number of simulated plants.
+    """
+
+    def __init__(
+        self, config, t_sampling: float, n=1, seed=None, shared_noise=False
+    ) -> None:
+        simulation = config["simulation"]
+        estimate = config["measurement"]["massflow_estimate"]
+        self.t_sampling = t_sampling
+        self.n = n
+        self.c_p = estimate["c_p"]
+        self.massflow_SI2SLM = estimate["massflow_SI2SLM"]
+        self.heater_power = (
+            simulation["transmitted_power"]
+            * estimate["voltage"] ** 2
+            / estimate["resistance"]
+        )
+        self.heat_loss = simulation["heat_loss"]
+        if self.heat_loss <= 0:
+            raise ValueError("The heat loss of the simulated plant has to be positive!")
+        self.max_flow = simulation["max_flow"]
+        self.ambient_temperature = simulation["ambient_temperature"]
+        self.noise_temperature = simulation["noise_temperature"]
+        self.noise_flow = simulation["noise_flow"]
+        self.shared_noise = shared_noise
+        # Exact discretization of the first order lags for the sampling time
+        self._decay = np.exp(-t_sampling / simulation["time_constant"])
+        self._flow_decay = np.exp(-t_sampling / simulation["flow_time_constant"])
+        self._delay_steps = max(int(round(simulation["dead_time"] / t_sampling)), 0)
+        self._random = np.random.default_rng(seed)
+        self.reset()
+
+    def reset(self, temperature_difference=0.0, flow=0.0, pwm=0.0) -> None:
+        """
+        Resets all plants to the given state, by default to the ambient temperature without flow.
+
+        :type temperature_difference: np.ndarray
+        :param temperature_difference: Temperature difference of every plant, or a single value for all plants.
+        :type flow: np.ndarray
+        :param flow: Flow in slm of every plant, or a single value for all plants.
+        :type pwm: np.ndarray
+        :param pwm: Heater output applied during the transport delay before the reset.
+        """
+        self.temperature_difference = np.full(
+            self.n, temperature_difference, dtype=float
+        )
+        self.flow = np.full(self.n, flow, dtype=float)
+        # Heater outputs on their way through the transport delay, one column per step
+        self._delay_line = np.empty((self.n, max(self._delay_steps, 1)))
+        self._delay_line[:] = np.reshape(pwm, (-1, 1))
+        self._delay_index = 0
+
+    def gain(self, flow) -> np.ndarray:
+        """
+        :type flow: np.ndarray
+        :param flow: Flow in slm.
+        :return: Steady state temperature difference at full heater output for the given flow.
+        """
+        massflow = np.maximum(flow, 0) / self.massflow_SI2SLM
+        return self.heater_power / (massflow * self.c_p + self.heat_loss)
+
+    def step(self, pwm, flow_setpoint) -> None:
+        """
+        Advances all plants by one sampling time.
+
+        :type pwm: np.ndarray
+        :param pwm: Normalized heater output between 0 and 1 of every plant, or a single value for all plants.
+        :type flow_setpoint: np.ndarray
+        :param flow_setpoint: Normalized flow setpoint between 0 and 1 of every plant, or a single value for all
+           plants.
+        """
+        if self._delay_steps:
+            delayed = self._delay_line[:, self._delay_index].copy()
+            self._delay_line[:, self._delay_index] = pwm
+            self._delay_index = (self._delay_index + 1) % self._delay_steps
+        else:
+            delayed = pwm
+        self.flow *= self._flow_decay
+        self.flow += (1 - self._flow_decay) * np.multiply(flow_setpoint, self.max_flow)
+        self.temperature_difference *= self._decay
+        self.temperature_difference += (
+            (1 - self._decay) * self.gain(self.flow) * delayed
+        )
+
+    def measure(self) -> dict:
+        """
+        :return: A dictionary holding the noisy measurements of the sensors of every plant, with the temperatures in
+           degree celsius, the humidities in percent and the flow in slm.
+        """
+        noise = self._random.standard_normal((5, 1 if self.shared_noise else self.n))
+        noise = np.broadcast_to(noise, (5, self.n))
+        temperature_1 = self.ambient_temperature + self.noise_temperature * noise[0]
+        return {
+            "Temperature_1": temperature_1,
+            "Temperature_2": temperature_1
+            + self.temperature_difference
+            + self.noise_temperature * noise[1],
+            "Humidity_1": 50 + 0.1 * noise[2],
+            "Humidity_2": 30 + 0.1 * noise[3],
+            "Flow": self.flow + self.noise_flow * noise[4],
+        }
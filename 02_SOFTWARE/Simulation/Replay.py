@@ -0,0 +1,231 @@
+from setup import MassflowEstimator
+from Simulation.PlantModel import PlantModel
+from Simulation.VectorPID import VectorPID
+from concurrent.futures import ProcessPoolExecutor
+from scipy.io import loadmat, savemat
+import argparse
+import glob
+import logging
+import multiprocessing
+import os
+import numpy as np
+
+logger = logging.getLogger("root")
+
+
+def load_recording(file_name: str) -> dict:
+    """
+    Loads a recording saved by :meth:`setup.Setup.save_measurement_buffer`.
+
+    :type file_name: str
+    :param file_name: Path of the .mat file.
+    :return: A dictionary with a one dimensional float array for every recorded signal.
+    """
+    content = loadmat(file_name)
+    return {
+        name: np.asarray(values, dtype=float).ravel()
+        for name, values in content.items()
+        if not name.startswith("__")
+    }
+
+
+class Replay(object):
+    """
+    The Replay pushes recorded measurements through the mass flow estimator and through a set of PID controllers, such
+    that changes of the estimator or of the controller gains can be evaluated against all recordings at once.
+
+    The estimate is recomputed for the whole recording in one go. The controllers are replayed in two ways, all gains
+    at once as arrays of a :class:`Simulation.VectorPID.VectorPID`:
+
+    - Open loop on the recorded temperature difference, giving the output each controller would have commanded.
+    - Closed loop on the :class:`Simulation.PlantModel.PlantModel`, which starts from the recorded state and is driven
+      by the recorded flow as disturbance, giving the temperature difference each controller would have reached.
+
+    .. note::
+
+       Example of usage:
+
+          .. code-block:: python
+
+             replay = Replay(config=ConfigurationHandler().data, gains=[[0.05, 0.01, 0.0], [0.1, 0.02, 0.0]])
+             results = replay.run_files(glob.glob("Sample Datasets/*.mat"))
+             for file_name, (signals, metrics) in results.items():
+                 print(file_name, metrics["squared_control_error_simulated"])
+
+    :type config: dict
+    :param config: Configuration providing the estimator constants and the "simulation" section.
+    :type gains: np.ndarray
+    :param gains: Optional array with one row of Kp, Ki and Kd per replayed controller.
+    :type setpoint: float
+    :param setpoint: Temperature difference setpoint of the replayed controllers, the recorded "Target_Delta_T" by
+       default.
+    """
+
+    def __init__(self, config, gains=None, setpoint=None) -> None:
+        self.config = config
+        self.gains = None if gains is None else np.atleast_2d(np.asarray(gains, float))
+        self.setpoint = setpoint
+        self.estimator = MassflowEstimator(config=config)
+
+    def run(self, recording: dict) -> tuple:
+        """
+        Replays a single recording.
+
+        :type recording: dict
+        :param recording: Recorded signals, see :func:`load_recording`.
+        :return: A dictionary of the derived signals, with one row per controller for the signals of the controllers,
+           and a dictionary of error metrics.
+        """
+        delta_t = recording["Temperature_Difference"]
+        pwm = recording["PWM"]
+        flow = recording["Flow"]
+        time_stamps = recording["Time"]
+        if self.setpoint is None:
+            setpoint = recording["Target_Delta_T"]
+        else:
+            setpoint = np.full_like(delta_t, self.setpoint)
+        dt = np.diff(time_stamps)
+        t_sampling = float(np.median(dt)) if len(dt) else 0.0
+
+        signals = {"Flow_Estimate": self.estimator.calculate(delta_t=delta_t, pwm=pwm)}
+        # The estimate is only meaningful while heating
+        heating = (pwm > 0) & (delta_t > self.estimator.min_temperature_difference)
+        estimate_error = signals["Flow_Estimate"][heating] - flow[heating]
+        metrics = {
+            "samples": len(delta_t),
+            "duration": float(time_stamps[-1] - time_stamps[0]) if len(dt) else 0.0,
+            "flow_estimate_bias": (
+                float(np.mean(estimate_error)) if len(estimate_error) else np.nan
+            ),
+            "flow_estimate_rmse": (
+                float(np.sqrt(np.mean(estimate_error**2)))
+                if len(estimate_error)
+                else np.nan
+            ),
+            "squared_control_error_recorded": float(np.mean((delta_t - setpoint) ** 2)),
+        }
+
+        if self.gains is not None and len(dt):
+            # The first update covers one sampling time, like in the setup
+            dt = np.concatenate(([t_sampling], dt))
+            signals.update(self._replay_controllers(delta_t, flow, setpoint, dt))
+            metrics["squared_control_error_simulated"] = np.mean(
+                (signals["Temperature_Difference_Simulated"] - setpoint) ** 2, axis=1
+            )
+        return signals, metrics
+
+    def _replay_controllers(self, delta_t, flow, setpoint, dt) -> dict:
+        n_samples = len(delta_t)
+        n_controllers = len(self.gains)
+        kp, ki, kd = self.gains.T
+        limits = (0, 1)
+        open_loop = VectorPID(kp=kp, ki=ki, kd=kd, output_limits=limits)
+        closed_loop = VectorPID(kp=kp, ki=ki, kd=kd, output_limits=limits)
+        plant = PlantModel(
+            config=self.config, t_sampling=float(np.median(dt)), n=n_controllers
+        )
+        # Start the plant in the recorded state, heated by the output holding it there
+        plant.reset(
+            temperature_difference=delta_t[0],
+            flow=flow[0],
+            pwm=np.clip(delta_t[0] / plant.gain(flow[0]), *limits),
+        )
+        flow_setpoint = flow / plant.max_flow
+
+        output = np.empty((n_controllers, n_samples))
+        simulated = np.empty((n_controllers, n_samples))
+        simulated_pwm = np.empty((n_controllers, n_samples))
+        for k in range(n_samples):
+            open_loop.setpoint = setpoint[k]
+            output[:, k] = open_loop(delta_t[k], dt=dt[k])
+            closed_loop.setpoint = setpoint[k]
+            simulated[:, k] = plant.temperature_difference
+            simulated_pwm[:, k] = closed_loop(plant.temperature_difference, dt=dt[k])
+            plant.step(pwm=simulated_pwm[:, k], flow_setpoint=flow_setpoint[k])
+        return {
+            "Controller_Output": output,
+            "Temperature_Difference_Simulated": simulated,
+            "PWM_Simulated": simulated_pwm,
+        }
+
+    def run_file(self, file_name: str) -> tuple:
+        """
+        Loads and replays a single recording, see :meth:`run`.
+        """
+        return self.run(load_recording(file_name))
+
+    def run_files(self, file_names: list, processes=None) -> dict:
+        """
+        Replays several recordings in parallel, one recording per worker process.
+
+        :type file_names: list
+        :param file_names: Paths of the recordings.
+        :type processes: int
+        :param processes: Number of worker processes, by default one per recording up to the number of cores. With a
+           single process the recordings are replayed in the calling process.
+        :return: A dictionary mapping every path to the derived signals and metrics of the recording.
+        """
+        if processes is None:
+            processes = min(len(file_names), os.cpu_count() or 1)
+        if processes <= 1:
+            return {file_name: self.run_file(file_name) for file_name in file_names}
+        with ProcessPoolExecutor(
+            max_workers=processes, mp_context=multiprocessing.get_context("spawn")
+        ) as executor:
+            return dict(zip(file_names, executor.map(self.run_file, file_names)))
+
+
+def main(arguments=None) -> None:
+    from Utility.ConfigurationHandler import ConfigurationHandler
+    from Utility.Logger import setup_custom_logger
+
+    parser = argparse.ArgumentParser(
+        description="Replays recordings through the mass flow estimator and a set of PID controllers and prints "
+        "their error metrics."
+    )
+    parser.add_argument(
+        "recordings", nargs="+", help="Recorded .mat files or folders of them."
+    )
+    parser.add_argument("--config", help="Path of the configuration file.")
+    parser.add_argument(
+        "--gains",
+        action="append",
+        default=[],
+        help="Comma separated Kp,Ki,Kd of a replayed controller, can be repeated.",
+    )
+    parser.add_argument(
+        "--setpoint", type=float, help="Temperature difference setpoint."
+    )
+    parser.add_argument("--processes", type=int, help="Number of worker processes.")
+    parser.add_argument(
+        "--output", help="Folder the derived signals of every recording are saved to."
+    )
+    args = parser.parse_args(arguments)
+    setup_custom_logger(name="root", level=logging.INFO)
+
+    file_names = []
+    for path in args.recordings:
+        if os.path.isdir(path):
+            file_names.extend(sorted(glob.glob(os.path.join(path, "*.mat"))))
+        else:
+            file_names.append(path)
+    gains = [[float(value) for value in text.split(",")] for text in args.gains]
+    replay = Replay(
+        config=ConfigurationHandler(path=args.config).data,
+        gains=gains or None,
+        setpoint=args.setpoint,
+    )
+    results = replay.run_files(file_names, processes=args.processes)
+    for file_name, (signals, metrics) in results.items():
+        logger.info("{}: {}".format(os.path.basename(file_name), metrics))
+        if args.output is not None:
+            os.makedirs(args.output, exist_ok=True)
+            base = os.path.splitext(os.path.basename(file_name))[0]
+            savemat(
+                file_name=os.path.join(args.output, "{}_Replay.mat".format(base)),
+                mdict=signals,
+            )
+
+
+if __name__ == "__main__":
+    main()
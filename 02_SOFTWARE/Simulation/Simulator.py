@@ -0,0 +1,86 @@
+from setup import Setup
+from Utility.Clock import VirtualClock
+from Simulation.PlantModel import PlantModel
+import logging
+import numpy as np
+
+logger = logging.getLogger("root")
+
+
+class Simulator(object):
+    """
+    The Simulator runs scenarios on a Setup in simulation mode as fast as possible. Instead of a measurement thread,
+    the simulator performs the measurements itself and advances a :class:`Utility.Clock.VirtualClock` by one sampling
+    time after each of them, such that a scenario of several minutes is simulated within milliseconds. With a seeded
+    plant model the results are reproducible.
+
+    .. note::
+
+       Example of usage:
+
+          .. code-block:: python
+
+             simulator = Simulator(config=ConfigurationHandler().data, seed=0)
+             simulator.setup.set_pid_parameters(kp=0.05, ki=0.01, kd=0.0)
+             scenario = Scenario.disturbance_rejection(config=simulator.setup.config, setpoint=5)
+             data = simulator.run(scenario)
+             score = simulator.setup.measurement_buffer.statistics("Squared_Control_Error")
+
+    :type config: ConfigurationHandler
+    :param config: Configuration of the simulated setup.
+    :type seed: int
+    :param seed: Optional seed of the measurement noise, overriding the configured one.
+    """
+
+    def __init__(self, config, seed=None) -> None:
+        self.clock = VirtualClock()
+        self.setup = Setup(config=config, clock=self.clock)
+        # Simulate without looking for devices
+        self.setup.simulation_mode = True
+        self.t_sampling = config["general"]["t_sampling"]
+        if seed is not None:
+            self.setup.plant = PlantModel(
+                config=config, t_sampling=self.t_sampling, seed=seed
+            )
+
+    def run(self, scenario, callback=None) -> dict:
+        """
+        Runs the scenario from the current state of the plant until its end.
+
+        :type scenario: Scenario
+        :param scenario: Scenario with a duration, see :class:`Utility.Scenario.Scenario`.
+        :type callback: Callable
+        :param callback: Optional function called with the setup and the time since the start of the scenario after
+           every measurement.
+        :return: A dictionary with the arrays of all signals stored in the measurement buffer during the scenario,
+           independent of the capacity of the buffer.
+        """
+        if scenario.duration is None:
+            raise ValueError("Only scenarios with a duration can be simulated!")
+        setup = self.setup
+        buffer = setup.measurement_buffer
+        buffer.clear()
+        sequence = buffer.sequence
+        chunks = []
+        scenario.start(setup)
+        step = 0
+        t = 0.0
+        while not scenario.finished(t):
+            scenario.apply(setup, t)
+            setup.measure()
+            if callback is not None:
+                callback(setup, t)
+            step += 1
+            self.clock.advance(self.t_sampling)
+            t = step * self.t_sampling
+            if buffer.sequence - sequence >= buffer.capacity // 2:
+                # Collect the measurements before they are overwritten
+                snapshot = buffer.read_since(sequence)
+                chunks.append(snapshot.data)
+                sequence = snapshot.head
+        chunks.append(buffer.read_since(sequence).data)
+        setup.disable_output()
+        return {
+            signal: np.concatenate([chunk[signal] for chunk in chunks])
+            for signal in buffer.signals
+        }
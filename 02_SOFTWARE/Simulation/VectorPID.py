@@ -0,0 +1,81 @@
+import numpy as np
+
+
+class VectorPID(object):
+    """
+    The VectorPID evaluates many PID controllers at once, with the gains, setpoints and inputs given as NumPy arrays
+    which are broadcast against each other. Every controller behaves like the `simple_pid.PID` used by the
+    :class:`setup.Setup`, which is updated with an explicit time step: the proportional term acts on the error, the
+    integral term is clamped to the output limits to avoid windup, the derivative term acts on the measurement and the
+    output is clamped to the output limits.
+
+    .. note::
+
+       Example of usage:
+
+          .. code-block:: python
+
+             controller = VectorPID(kp=[0.01, 0.05], ki=0.01, kd=0.0, setpoint=5)
+             controller(np.array([4.0, 4.5]), dt=0.25)  # One output per controller
+
+    :type kp: np.ndarray
+    :param kp: Proportional gains.
+    :type ki: np.ndarray
+    :param ki: Integral gains.
+    :type kd: np.ndarray
+    :param kd: Derivative gains.
+    :type setpoint: np.ndarray
+    :param setpoint: Setpoints of the controllers.
+    :type output_limits: tuple
+    :param output_limits: Lower and upper limit of the outputs and the integral terms.
+    """
+
+    def __init__(self, kp, ki, kd, setpoint=0.0, output_limits=(0, 1)) -> None:
+        self.kp = np.asarray(kp, dtype=float)
+        self.ki = np.asarray(ki, dtype=float)
+        self.kd = np.asarray(kd, dtype=float)
+        self.setpoint = setpoint
+        self.output_limits = output_limits
+        self.reset()
+
+    def reset(self) -> None:
+        """
+        Clears the integral terms and the last inputs of all controllers.
+        """
+        self.proportional = np.zeros(())
+        self.integral = np.zeros(())
+        self.derivative = np.zeros(())
+        self.output = None
+        self._last_input = None
+
+    def __call__(self, input_, dt) -> np.ndarray:
+        """
+        Updates all controllers with a new measurement.
+
+        :type input_: np.ndarray
+        :param input_: Measured values, broadcast against the gains.
+        :type dt: float
+        :param dt: Time passed since the previous update in seconds.
+        :return: The clamped outputs of all controllers.
+        """
+        input_ = np.asarray(input_, dtype=float)
+        lower, upper = self.output_limits
+        error = self.setpoint - input_
+        d_input = input_ - (
+            self._last_input if self._last_input is not None else input_
+        )
+        self.proportional = self.kp * error
+        self.integral = np.clip(self.integral + self.ki * error * dt, lower, upper)
+        self.derivative = -self.kd * d_input / dt
+        self.output = np.clip(
+            self.proportional + self.integral + self.derivative, lower, upper
+        )
+        self._last_input = input_
+        return self.output
+
+    @property
+    def components(self) -> tuple:
+        """
+        The proportional, integral and derivative terms of the last update.
+        """
+        return self.proportional, self.integral, self.derivative
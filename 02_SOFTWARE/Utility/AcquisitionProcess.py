@@ -0,0 +1,300 @@
+from setup import Setup, Mode
+from Utility.SharedMeasurementRing import SharedMeasurementRing
+from threading import Event, Thread
+import logging
+import multiprocessing
+import queue
+import time
+
+logger = logging.getLogger("root")
+
+# Seconds between two checks of the acquisition process whether its parent is still alive
+PARENT_CHECK_INTERVAL = 1.0
+
+
+def _remote_command(name: str):
+    def command(self, *args, **kwargs) -> None:
+        self._send(name, *args, **kwargs)
+
+    command.__name__ = name
+    command.__doc__ = (
+        "Executes :meth:`setup.Setup.{}` in the acquisition process.".format(name)
+    )
+    return command
+
+
+class RemoteSetup(Setup):
+    """
+    The RemoteSetup runs the acquisition and control of a Setup in a dedicated process, such that the timing of the
+    measurements does not depend on the load of the process using the setup, e.g. the GUI redrawing its plots or
+    exporting measurements.
+
+    The acquisition process publishes its measurements and its latest state through a
+    :class:`Utility.SharedMeasurementRing.SharedMeasurementRing`. A background thread of the RemoteSetup follows the
+    ring and feeds the measurements into the local :attr:`measurement_buffer`, such that the RemoteSetup offers the
+    same interface as the Setup. Commands, e.g. setting the pwm value or the controller gains, are sent to the
+    acquisition process through a queue and executed there without waiting for their completion.
+
+    The measurement history is spilled to disk by the acquisition process only.
+
+    :type config: ConfigurationHandler
+    :param config: Configuration of the setup.
+    """
+
+    def __init__(self, config) -> None:
+        self._process = None
+        self._commands = None
+        self._follower = None
+        self._following = Event()
+        self._ring_sequence = None
+        self._trips = None
+        super().__init__(config=config)
+
+    def _setup_measurement_buffer(self):
+        # Only the acquisition process spills measurements to disk
+        spill_to_disk = self.config["history"]["spill_to_disk"]
+        self.config["history"]["spill_to_disk"] = 0
+        try:
+            return super()._setup_measurement_buffer()
+        finally:
+            self.config["history"]["spill_to_disk"] = spill_to_disk
+
+    def open(self, ports=None) -> None:
+        """
+        Starts the acquisition process, which opens the devices.
+
+        :type ports: list
+        :param ports: Optional list of available ports, see :meth:`setup.Setup.open`.
+        """
+        self.shared_ring = SharedMeasurementRing(
+            signals=self.measurement_buffer.signals,
+            capacity=self.measurement_buffer.capacity,
+            status=Setup.SHARED_STATUS,
+        )
+        try:
+            context = multiprocessing.get_context("spawn")
+            self._commands = context.Queue()
+            replies = context.Queue()
+            self._process = context.Process(
+                target=run_acquisition,
+                name="Acquisition",
+                kwargs=dict(
+                    config=self.config,
+                    ring_name=self.shared_ring.name,
+                    ports=ports,
+                    commands=self._commands,
+                    replies=replies,
+                ),
+            )
+            self._process.start()
+            # Wait until the devices are opened
+            while True:
+                try:
+                    self.simulation_mode = replies.get(timeout=1)
+                    break
+                except queue.Empty:
+                    if not self._process.is_alive():
+                        raise RuntimeError(
+                            "Acquisition process exited with code {}!".format(
+                                self._process.exitcode
+                            )
+                        )
+        except BaseException:
+            # Do not leave the process or the shared memory behind
+            if self._process is not None:
+                if self._process.is_alive():
+                    self._process.terminate()
+                self._process.join()
+                self._process = None
+            self.shared_ring.close()
+            self.shared_ring.unlink()
+            self.shared_ring = None
+            raise
+        logger.info("Started acquisition process {}.".format(self._process.pid))
+
+    def close(self) -> None:
+        """
+        Stops the acquisition process, which closes the devices.
+        """
+        self._stop_following()
+        if self._process is not None:
+            self._commands.put(None)
+            self._process.join(timeout=10)
+            if self._process.is_alive():
+                logger.error("Acquisition process did not stop, terminating it.")
+                self._process.terminate()
+                self._process.join()
+            self._process = None
+        if self.shared_ring is not None:
+            self.shared_ring.close()
+            self.shared_ring.unlink()
+            self.shared_ring = None
+        self.measurement_buffer.close()
+
+    def _send(self, name: str, *args, **kwargs) -> None:
+        if self._process is None:
+            logger.error("Acquisition process not started yet!")
+            return
+        self._commands.put((name, args, kwargs))
+
+    def start_measurement_thread(self) -> None:
+        """
+        Starts the measurements in the acquisition process and following them locally.
+        """
+        self._send("start_measurement_thread")
+        if self._follower is None:
+            self.measurement_buffer.clear()
+            self._ring_sequence = self.shared_ring.sequence
+            self._following.set()
+            self._follower = Thread(target=self._follow, name="RemoteSetup")
+            self._follower.daemon = True
+            self._follower.start()
+
+    def stop_measurement_thread(self) -> None:
+        """
+        Stops the measurements in the acquisition process.
+        """
+        self._send("stop_measurement_thread")
+        self._stop_following()
+
+    def _stop_following(self) -> None:
+        if self._follower is not None:
+            self._following.clear()
+            self._follower.join()
+            self._follower = None
+
+    def start_buffering(self) -> None:
+        self._send("start_buffering")
+        super().start_buffering()
+
+    def stop_buffering(self) -> None:
+        self._send("stop_buffering")
+        super().stop_buffering()
+
+    def measure(self) -> None:
+        raise RuntimeError("Measurements are performed by the acquisition process!")
+
+    set_pwm = _remote_command("set_pwm")
+    set_flow = _remote_command("set_flow")
+    start_pid_controller = _remote_command("start_pid_controller")
+    start_direct_power_setting = _remote_command("start_direct_power_setting")
+    enable_output = _remote_command("enable_output")
+    disable_output = _remote_command("disable_output")
+    set_temperature_calibration = _remote_command("set_temperature_calibration")
+    reset_temperature_calibration = _remote_command("reset_temperature_calibration")
+    reverse_temp_sensors = _remote_command("reverse_temp_sensors")
+
+    def set_setpoint(self, value: float) -> None:
+        """
+        Sets the temperature difference setpoint in the acquisition process, see :meth:`setup.Setup.set_setpoint`.
+        """
+        # Validate locally, such that invalid setpoints raise in the calling process
+        super().set_setpoint(value)
+        self._send("set_setpoint", value)
+
+    def set_pid_parameters(self, kp=None, ki=None, kd=None) -> None:
+        """
+        Sets the gains of the controller in the acquisition process, see :meth:`setup.Setup.set_pid_parameters`.
+        """
+        super().set_pid_parameters(kp=kp, ki=ki, kd=kd)
+        self._send("set_pid_parameters", kp=kp, ki=ki, kd=kd)
+
+    def _follow(self) -> None:
+        frame = self.measurement_buffer.schema.new_frame()
+        while self._following.is_set():
+            try:
+                first, array = self.shared_ring.read_since(self._ring_sequence)
+                latest = self.shared_ring.latest()
+            except TimeoutError as e:
+                if not self._process.is_alive():
+                    # Killed in the middle of a write, the ring will not become consistent anymore
+                    logger.error(
+                        "Acquisition process exited with code {}, stopped following its measurements.".format(
+                            self._process.exitcode
+                        )
+                    )
+                    return
+                logger.warning(e)
+                continue
+            if first > self._ring_sequence:
+                logger.warning(
+                    "Missed {} measurements of the acquisition process.".format(
+                        first - self._ring_sequence
+                    )
+                )
+            for index in range(array.shape[1]):
+                frame.values[:] = array[:, index]
+                self.measurement_buffer.update(frame)
+            self._ring_sequence = first + array.shape[1]
+
+            if latest is not None:
+                self._mirror(*latest)
+            time.sleep(self._t_sampling_s)
+
+    def _mirror(self, state, status: dict) -> None:
+        """
+        Mirrors the latest state and status of the acquisition process.
+        """
+        frame = self.next_frame()
+        frame.values[:] = state
+        self.state = frame
+        trips = (status["high_temperature_trips"], status["low_flow_trips"])
+        if self._trips is not None:
+            # Raise the error flags once per trip, the flags are reset by the user of the setup
+            if trips[0] > self._trips[0]:
+                self.error_high_temperature = True
+            if trips[1] > self._trips[1]:
+                self.error_low_flow = True
+        self._trips = trips
+        self.safety_trips["high_temperature"] = int(trips[0])
+        self.safety_trips["low_flow"] = int(trips[1])
+        self._current_pwm_value = status["pwm"]
+        self._current_flow_value = status["flow"]
+        self.temperature_difference_setpoint = status["setpoint"]
+        self.controller.tunings = (status["kp"], status["ki"], status["kd"])
+        self._current_mode = Mode(int(status["mode"]))
+        self.simulation_mode = bool(status["simulation_mode"])
+
+
+def run_acquisition(config, ring_name: str, ports, commands, replies) -> None:
+    """
+    Runs a Setup publishing to the given ring and executes the commands received until receiving None, meant to be
+    the target of the acquisition process of a :class:`RemoteSetup`.
+
+    If the parent process exits without stopping the acquisition, e.g. because the GUI crashed, the heater is switched
+    off and the devices are closed, such that the setup is not left heating unattended.
+    """
+    from Utility.Logger import setup_custom_logger
+
+    setup_custom_logger(name="root", level=logging.INFO)
+    with Setup(config=config) as setup:
+        ring = SharedMeasurementRing.attach(
+            name=ring_name,
+            signals=setup.measurement_buffer.signals,
+            capacity=setup.measurement_buffer.capacity,
+            status=Setup.SHARED_STATUS,
+        )
+        setup.open(ports=ports)
+        setup.shared_ring = ring
+        replies.put(setup.simulation_mode)
+        parent = multiprocessing.parent_process()
+        while True:
+            try:
+                command = commands.get(timeout=PARENT_CHECK_INTERVAL)
+            except queue.Empty:
+                if parent is not None and not parent.is_alive():
+                    logger.error(
+                        "Parent process exited, switching off the heater and closing the devices."
+                    )
+                    setup.disable_output()
+                    break
+                continue
+            if command is None:
+                break
+            name, args, kwargs = command
+            try:
+                getattr(setup, name)(*args, **kwargs)
+            except Exception as e:
+                logger.error("Command {} failed: {}".format(name, e))
+    # Closing the setup has stopped the measurements, no more writes to the ring
+    ring.close()
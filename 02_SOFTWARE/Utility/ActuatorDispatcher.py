@@ -0,0 +1,211 @@
+from threading import Condition, Thread
+from typing import Callable
+import logging
+import time
+
+logger = logging.getLogger("root")
+
+# Seconds between two attempts to write a command submitted for retrying
+RETRY_INTERVAL = 0.1
+# Attempts to write a command submitted for retrying once the dispatcher is closed
+CLOSING_ATTEMPTS = 3
+
+
+class ActuatorDispatcher(object):
+    """
+    The ActuatorDispatcher decouples setting an actuator from the blocking communication with the device. Commands
+    are submitted without waiting and written to the device by a dedicated worker thread.
+
+    Only the most recent command is kept: a command submitted while the previous one is still waiting to be written
+    replaces it, such that e.g. dragging a slider results in a single write of the final value instead of one write
+    per intermediate value. Commands are dropped if the device already holds their value, or will hold it once the
+    command being written or waiting to be written completes. If the write of a value fails, a dropped command of the
+    same value is written again. Commands which must not get lost, e.g. switching the heater off, can be submitted for
+    retrying: they are written again every `RETRY_INTERVAL` seconds until the write succeeds or a newer command is
+    submitted. Once the dispatcher is closed, they are given up after `CLOSING_ATTEMPTS` failed attempts.
+
+    :type name: str
+    :param name: Name of the actuator, used to name the worker thread.
+    :type write: Callable
+    :param write: Function writing a single value to the device, called on the worker thread. A failed write is
+       signalled by raising an exception or by returning False.
+    """
+
+    def __init__(self, name: str, write: Callable) -> None:
+        self.name = name
+        self._write = write
+        self._condition = Condition()
+        self._pending = None
+        self._written = None
+        self._in_flight = None
+        self._retry_in_flight = False
+        self._repeat_on_failure = False
+        self._busy = False
+        self._closed = False
+        self._reset_metrics()
+        self._thread = Thread(target=self._run, name="{}Dispatcher".format(name))
+        self._thread.daemon = True
+        self._thread.start()
+
+    def submit(self, value, retry=False) -> None:
+        """
+        Submits a new command, replacing the command waiting to be written, if any.
+
+        :param value: Value to be written to the device.
+        :type retry: bool
+        :param retry: If True, the command is written again after a failed write, until it succeeds or is replaced.
+        """
+        with self._condition:
+            if self._closed:
+                logger.error(
+                    "Command for {} submitted after closing.".format(self.name)
+                )
+                return
+            self._submitted += 1
+            if self._pending is not None:
+                if value == self._pending[0]:
+                    # The value is already waiting to be written
+                    self._deduplicated += 1
+                    self._pending = (value, self._pending[1], self._pending[2] or retry)
+                    return
+                self._coalesced += 1
+                self._pending = None
+            if self._busy and value == self._in_flight:
+                # The value is being written
+                self._deduplicated += 1
+                self._repeat_on_failure = True
+                self._retry_in_flight = self._retry_in_flight or retry
+                return
+            if not self._busy and value == self._written:
+                # The device already holds the value
+                self._deduplicated += 1
+                return
+            self._pending = (value, time.perf_counter(), retry)
+            self._condition.notify()
+
+    def flush(self, timeout=None) -> bool:
+        """
+        Waits until all submitted commands have been written.
+
+        :type timeout: float
+        :param timeout: Optional maximum waiting time in seconds.
+        :return: True if all commands have been written, False if the timeout expired.
+        """
+        with self._condition:
+            return self._condition.wait_for(
+                lambda: self._pending is None and not self._busy, timeout=timeout
+            )
+
+    def close(self) -> None:
+        """
+        Writes the command waiting to be written, if any, and stops the worker thread.
+        """
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        self._thread.join()
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                self._condition.wait_for(
+                    lambda: self._pending is not None or self._closed
+                )
+                if self._pending is None:
+                    return
+                value, submitted, self._retry_in_flight = self._pending
+                self._pending = None
+                self._in_flight = value
+                self._repeat_on_failure = False
+                self._busy = True
+            attempts = 0
+            while True:
+                try:
+                    success = self._write(value) is not False
+                except Exception as e:
+                    logger.error(
+                        "Could not write {} to {}: {}".format(value, self.name, e)
+                    )
+                    success = False
+                attempts += 1
+                if success or not self._retry(value=value, attempts=attempts):
+                    break
+            # After a failed write the state of the device is unknown, such that the next
+            # command has to be written in any case
+            written = value if success else None
+            latency = time.perf_counter() - submitted
+            with self._condition:
+                self._written = written
+                self._in_flight = None
+                self._busy = False
+                if not success and self._repeat_on_failure and self._pending is None:
+                    # A command of the same value was dropped while this one was written
+                    self._pending = (value, submitted, False)
+                self._writes += 1
+                self._latency_last = latency
+                self._latency_sum += latency
+                self._latency_max = max(self._latency_max, latency)
+                self._condition.notify_all()
+
+    def _retry(self, value, attempts: int) -> bool:
+        """
+        Decides whether to write the command in flight again after a failed write, waiting for the retry interval.
+
+        :return: True if the command is to be written again, False if it is given up or replaced by a newer command.
+        """
+        with self._condition:
+            if not self._retry_in_flight or self._pending is not None:
+                return False
+            if self._closed and attempts >= CLOSING_ATTEMPTS:
+                logger.error(
+                    "Gave up writing {} to {} after {} attempts.".format(
+                        value, self.name, attempts
+                    )
+                )
+                return False
+            # Give way to a newer command submitted in the meantime
+            return not self._condition.wait_for(
+                lambda: self._pending is not None, timeout=RETRY_INTERVAL
+            )
+
+    def _reset_metrics(self) -> None:
+        self._submitted = 0
+        self._coalesced = 0
+        self._deduplicated = 0
+        self._writes = 0
+        self._latency_last = 0.0
+        self._latency_sum = 0.0
+        self._latency_max = 0.0
+
+    def reset_metrics(self) -> None:
+        """
+        Restarts recording the metrics.
+        """
+        with self._condition:
+            self._reset_metrics()
+
+    @property
+    def metrics(self) -> dict:
+        """
+        Metrics of the dispatcher, containing:
+
+        - submitted: Number of submitted commands.
+        - written: Number of commands written to the device.
+        - coalesced: Number of commands replaced by a newer command before being written.
+        - deduplicated: Number of commands dropped because the device already held the value.
+        - queue_depth: Number of commands currently waiting or being written.
+        - latency_last, latency_mean, latency_max: Time from submitting a command until it was written, in seconds.
+        """
+        with self._condition:
+            return {
+                "submitted": self._submitted,
+                "written": self._writes,
+                "coalesced": self._coalesced,
+                "deduplicated": self._deduplicated,
+                "queue_depth": int(self._pending is not None) + int(self._busy),
+                "latency_last": self._latency_last,
+                "latency_mean": (
+                    self._latency_sum / self._writes if self._writes else 0.0
+                ),
+                "latency_max": self._latency_max,
+            }
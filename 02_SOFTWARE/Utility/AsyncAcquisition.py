@@ -0,0 +1,157 @@
+from Drivers.AsyncDevice import AsyncDevice
+from Utility.Timer import FixedRateSchedule
+from threading import Event, Thread
+import asyncio
+import logging
+
+logger = logging.getLogger("root")
+
+
+class AsyncAcquisitionEngine(object):
+    """
+    The AsyncAcquisitionEngine runs the measurements of a Setup on an asyncio event loop instead of a timer thread.
+    The EKS and SFC are accessed through an :class:`Drivers.AsyncDevice.AsyncDevice` each, such that they are measured
+    concurrently. Heater and flow commands are handed to the actuator dispatchers of the setup, which write them on
+    their own threads and never block the loop. Measurements are scheduled on the absolute deadlines of a
+    :class:`Utility.Timer.FixedRateSchedule`, based on the monotonic clock of the event loop. A measurement that fails
+    is logged and counted, and the engine continues with the next one.
+
+    Several engines, e.g. of several rigs, can share one event loop by awaiting their :meth:`run` coroutines together.
+    Alternatively :meth:`start` runs the engine on its own event loop in a background thread, which gives it the same
+    interface as the timer thread used by the Setup.
+
+    .. note::
+
+       Example of usage with several rigs on one event loop:
+
+          .. code-block:: python
+
+             engines = [
+                 AsyncAcquisitionEngine(setup=setup, eks=eks, sfc=sfc, interval=0.25)
+                 for setup, eks, sfc in rigs
+             ]
+             await asyncio.gather(*[engine.run() for engine in engines])
+
+    :type setup: Setup
+    :param setup: Setup whose measurements are processed and stored.
+    :type eks: EKS
+    :param eks: Sensor bridge with the temperature sensors, None in simulation mode.
+    :type sfc: SFX5400
+    :param sfc: Mass flow controller, None in simulation mode.
+    :type interval: float
+    :param interval: Sampling time in seconds.
+    """
+
+    def __init__(self, setup, eks, sfc, interval: float) -> None:
+        self.setup = setup
+        self.schedule = FixedRateSchedule(interval=interval)
+        if eks is None or sfc is None:
+            self._eks, self._sfc = None, None
+        else:
+            self._eks = AsyncDevice(device=eks, name="EKS", profiler=setup.profiler)
+            self._sfc = AsyncDevice(device=sfc, name="SFC", profiler=setup.profiler)
+        self._loop = None
+        self._task = None
+        self._thread = None
+        self._running = Event()
+        # Number of measurements that raised an exception
+        self._failed = 0
+
+    async def run(self) -> None:
+        """
+        Performs measurements at the sampling time until cancelled. Upon cancellation the measurement in progress is
+        abandoned, the heater is switched off and the device workers are stopped after completing their current
+        transaction.
+        """
+        loop = asyncio.get_running_loop()
+        self.schedule.start(now=loop.time())
+        try:
+            while True:
+                await asyncio.sleep(max(self.schedule.deadline - loop.time(), 0))
+                self.schedule.begin(now=loop.time())
+                try:
+                    await self.tick()
+                except Exception as e:
+                    self._failed += 1
+                    logger.error("Asynchronous measurement failed: {}".format(e))
+                self.schedule.end(now=loop.time())
+        finally:
+            await self._shutdown()
+
+    async def tick(self) -> None:
+        """
+        Performs a single measurement.
+        """
+        if self._eks is None:
+            # Simulated measurements do not access any device, the setup profiles the tick itself
+            self.setup.measure()
+            return
+        with self.setup.profiler.stage("tick"):
+            frame = self.setup.next_frame()
+            (results_eks, time_eks), (results_sfc, time_sfc) = await asyncio.gather(
+                self._eks.measure(), self._sfc.measure()
+            )
+            self.setup.fill_measurement(
+                frame=frame,
+                results_eks=results_eks,
+                time_eks=time_eks,
+                results_sfc=results_sfc,
+                time_sfc=time_sfc,
+            )
+            pwm = self.setup.process_measurement(frame=frame)
+            if pwm is not None:
+                # Only submits the value to the heater dispatcher, without waiting for the device
+                self.setup.set_pwm(pwm)
+
+    async def _shutdown(self) -> None:
+        if self._eks is not None:
+            self.setup.set_pwm(0)
+            for device in (self._eks, self._sfc):
+                await device.close()
+
+    def start(self) -> None:
+        """
+        Runs the engine on its own event loop in a background thread.
+        """
+        self._running.clear()
+        self._thread = Thread(target=self._run_in_thread, name="AsyncAcquisition")
+        self._thread.daemon = True
+        self._thread.start()
+        self._running.wait()
+
+    def cancel(self) -> None:
+        """
+        Stops the engine started by :meth:`start` and waits for its shutdown to complete. If the engine has already
+        stopped by itself, only its thread is joined.
+        """
+        if self._thread is not None:
+            if not self._loop.is_closed() and not self._task.done():
+                try:
+                    self._loop.call_soon_threadsafe(self._task.cancel)
+                except RuntimeError:
+                    # The loop was closed after the check, the engine has stopped by itself
+                    pass
+            self._thread.join()
+            self._thread = None
+
+    def _run_in_thread(self) -> None:
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        self._task = self._loop.create_task(self.run())
+        self._loop.call_soon(self._running.set)
+        try:
+            self._loop.run_until_complete(self._task)
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            logger.error("Asynchronous acquisition stopped: {}".format(e))
+        finally:
+            self._loop.close()
+
+    @property
+    def statistics(self) -> dict:
+        """
+        Timing statistics of the measurements, see :attr:`Utility.Timer.FixedRateSchedule.statistics`, and the number
+        of failed measurements.
+        """
+        return dict(self.schedule.statistics, failed=self._failed)
@@ -0,0 +1,126 @@
+from threading import Event, Lock
+import time
+
+
+class SystemClock(object):
+    """
+    The SystemClock is the default clock of the setup and simply follows the wall clock and the monotonic clock of the
+    operating system.
+
+    All clocks offer the same interface: :meth:`time` returns the time stamp of a measurement in seconds since the
+    epoch, :meth:`monotonic` the time used to schedule periodic calls, and :meth:`wait` blocks until an event is set
+    or a timeout has passed on the clock.
+    """
+
+    def time(self) -> float:
+        """
+        :return: Current time in seconds since the epoch.
+        """
+        return time.time()
+
+    def monotonic(self) -> float:
+        """
+        :return: Current value of a monotonic clock in seconds.
+        """
+        return time.monotonic()
+
+    def sleep(self, seconds: float) -> None:
+        """
+        Suspends the calling thread for the given time.
+        """
+        time.sleep(max(seconds, 0))
+
+    def wait(self, event: Event, timeout=None) -> bool:
+        """
+        Waits until the event is set or the timeout has passed.
+
+        :type event: Event
+        :param event: Event to wait for.
+        :type timeout: float
+        :param timeout: Timeout in seconds of this clock, None to wait for the event only.
+        :return: True if the event is set.
+        """
+        return event.wait(timeout)
+
+
+class ScaledClock(SystemClock):
+    """
+    The ScaledClock runs `speed` times faster than the wall clock, e.g. to run a simulation at ten times real time.
+    Its time starts at the wall clock time of its creation.
+
+    :type speed: float
+    :param speed: Ratio of the clock rate to the rate of the wall clock.
+    """
+
+    def __init__(self, speed: float) -> None:
+        if speed <= 0:
+            raise ValueError("The speed of a clock has to be positive!")
+        self.speed = speed
+        self._start_time = time.time()
+        self._start_monotonic = time.monotonic()
+
+    def time(self) -> float:
+        return self._start_time + self.monotonic()
+
+    def monotonic(self) -> float:
+        return (time.monotonic() - self._start_monotonic) * self.speed
+
+    def sleep(self, seconds: float) -> None:
+        time.sleep(max(seconds, 0) / self.speed)
+
+    def wait(self, event: Event, timeout=None) -> bool:
+        return event.wait(None if timeout is None else max(timeout, 0) / self.speed)
+
+
+class VirtualClock(SystemClock):
+    """
+    The VirtualClock only advances when told to, either explicitly by :meth:`advance` or by waiting on it, which
+    returns immediately after advancing the clock by the timeout. A simulation driven by a virtual clock therefore runs
+    as fast as possible and, given a seeded plant model, is deterministic.
+
+    Since every wait advances the clock, only a single thread, e.g. the measurement timer, may drive a virtual clock.
+
+    .. note::
+
+       Example of usage:
+
+          .. code-block:: python
+
+             clock = VirtualClock()
+             clock.advance(0.25)
+             clock.monotonic()  # 0.25
+
+    :type start: float
+    :param start: Time in seconds since the epoch at which the clock starts.
+    """
+
+    def __init__(self, start=0.0) -> None:
+        self._start = start
+        self._now = 0.0
+        self._lock = Lock()
+
+    def time(self) -> float:
+        return self._start + self._now
+
+    def monotonic(self) -> float:
+        return self._now
+
+    def advance(self, seconds: float) -> None:
+        """
+        Advances the clock by the given time.
+        """
+        if seconds < 0:
+            raise ValueError("A clock cannot go backwards!")
+        with self._lock:
+            self._now += seconds
+
+    def sleep(self, seconds: float) -> None:
+        self.advance(max(seconds, 0))
+
+    def wait(self, event: Event, timeout=None) -> bool:
+        if timeout is None:
+            # Nothing to advance to, only another thread can set the event
+            return event.wait()
+        if not event.is_set():
+            self.advance(max(timeout, 0))
+        return event.is_set()
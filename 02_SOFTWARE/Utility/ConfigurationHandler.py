@@ -1,10 +1,22 @@
 import json
+import os
 from GUI.Utils import resource_path
 
 
 class ConfigurationHandler(object):
-    def __init__(self):
-        self.data = json.load(open(resource_path("..\\Utility\\config.json")))
+    """
+    Loads the configuration of the setup from a JSON file and gives access to its sections.
+
+    :type path: str
+    :param path: Optional path of the configuration file, the bundled config.json is used by default.
+    """
+
+    def __init__(self, path=None):
+        if path is None:
+            path = resource_path(os.path.join("..", "Utility", "config.json"))
+        self.path = path
+        with open(self.path) as file:
+            self.data = json.load(file)
 
     def __getitem__(self, item):
         if type(item) == str:
@@ -19,5 +31,5 @@ class ConfigurationHandler(object):
             raise KeyError("Key has to be of type string!")
 
     def write(self):
-        with open(resource_path("..\\Utility\\config.json"), "w") as file:
+        with open(self.path, "w") as file:
             file.write(json.dumps(self.data, indent=2))
@@ -0,0 +1,234 @@
+import logging
+import numpy as np
+
+logger = logging.getLogger("root")
+
+
+class DecimationPyramid(object):
+    """
+    The DecimationPyramid keeps a multi-resolution summary of the measurements written to a MeasurementBuffer. Each
+    level of the pyramid stores the minimum, maximum and sum of all signals over buckets of consecutive measurements,
+    the bucket size growing by `factor` from one level to the next. Completed buckets of one level are merged into the
+    next level, such that every update costs amortized constant time, independent of the buffer length.
+
+    Like the MeasurementBuffer itself, every level is a ring buffer with mirrored writes, such that its buckets can
+    be read chronologically ordered from one contiguous slice.
+
+    :type n_signals: int
+    :param n_signals: Number of signals of each measurement.
+    :type time_row: int
+    :param time_row: Index of the signal holding the measurement time.
+    :type capacity: int
+    :param capacity: Number of measurements held by the MeasurementBuffer, the pyramid covers at least as many.
+    :type factor: int
+    :param factor: Number of buckets of one level merged into a single bucket of the next level.
+    """
+
+    def __init__(
+        self, n_signals: int, time_row: int, capacity: int, factor=4
+    ) -> None:
+        if factor < 2:
+            raise ValueError("The decimation factor has to be at least 2.")
+        self._time_row = time_row
+        self._levels = []
+        bucket_size = factor
+        while bucket_size < capacity:
+            self._levels.append(
+                _PyramidLevel(
+                    n_signals=n_signals,
+                    bucket_size=bucket_size,
+                    capacity=capacity // bucket_size + 2,
+                )
+            )
+            bucket_size *= factor
+        # Sequence number of the first measurement summarized by the pyramid
+        self._origin = 0
+
+    def update(self, row: np.ndarray) -> None:
+        """
+        Adds a single measurement to the pyramid.
+
+        :type row: np.ndarray
+        :param row: Values of all signals of the new measurement.
+        """
+        minimum, maximum, total, count = row, row, row, 1
+        for level in self._levels:
+            level.accumulate(minimum=minimum, maximum=maximum, total=total, count=count)
+            if level.pending_count < level.bucket_size:
+                break
+            minimum, maximum, total, count = level.complete()
+
+    def clear(self, origin: int) -> None:
+        """
+        Forgets all summarized measurements.
+
+        :type origin: int
+        :param origin: Sequence number of the next measurement written to the buffer.
+        """
+        self._origin = origin
+        for level in self._levels:
+            level.clear()
+
+    def select_level(self, n_measurements: int, max_buckets: int) -> int:
+        """
+        Selects the finest level which summarizes the given number of measurements with at most `max_buckets` buckets.
+
+        :type n_measurements: int
+        :param n_measurements: Number of raw measurements to be summarized.
+        :type max_buckets: int
+        :param max_buckets: Maximum number of buckets desired.
+        :return: Index of the selected level, -1 if no decimation is needed at all.
+        """
+        if n_measurements <= max_buckets:
+            return -1
+        for index, level in enumerate(self._levels):
+            # Account for the partially covered buckets at both ends of the range
+            if n_measurements // level.bucket_size + 2 <= max_buckets:
+                return index
+        return len(self._levels) - 1
+
+    def buckets(self, level_index: int, t0=None, t1=None) -> tuple:
+        """
+        Copies the buckets of one level overlapping the time range [t0, t1], including the partially filled bucket
+        holding the most recent measurements.
+
+        :type level_index: int
+        :param level_index: Index of the level to read.
+        :type t0: float
+        :param t0: Optional start of the time range.
+        :type t1: float
+        :param t1: Optional end of the time range.
+        :return: A tuple of minimum, maximum and mean of every signal (one row per signal, one column per bucket) and
+           the sequence number of the first measurement summarized by the returned buckets.
+        """
+        level = self._levels[level_index]
+        minimum, maximum, total = level.chronological()
+        mean = total / level.bucket_size
+        first = self._origin + (level.head - minimum.shape[1]) * level.bucket_size
+        # Merge the pending measurements of this and all finer levels into one partial bucket
+        pending = [lower for lower in self._levels[: level_index + 1] if lower.pending_count]
+        if pending:
+            count = sum(lower.pending_count for lower in pending)
+            minimum = np.column_stack(
+                (minimum, np.min([lower.pending_minimum for lower in pending], axis=0))
+            )
+            maximum = np.column_stack(
+                (maximum, np.max([lower.pending_maximum for lower in pending], axis=0))
+            )
+            mean = np.column_stack(
+                (mean, np.sum([lower.pending_total for lower in pending], axis=0) / count)
+            )
+        # Restrict the buckets to the ones overlapping with the requested time range
+        start = 0
+        stop = minimum.shape[1]
+        if t0 is not None:
+            start = int(np.searchsorted(maximum[self._time_row], t0, side="left"))
+        if t1 is not None:
+            stop = int(np.searchsorted(minimum[self._time_row], t1, side="right"))
+        stop = max(start, stop)
+        first += start * level.bucket_size
+        return (
+            minimum[:, start:stop].copy(),
+            maximum[:, start:stop].copy(),
+            mean[:, start:stop].copy(),
+            first,
+        )
+
+    def bucket_size(self, level_index: int) -> int:
+        """
+        :type level_index: int
+        :param level_index: Index of the level.
+        :return: Number of raw measurements summarized by a single bucket of the level.
+        """
+        return self._levels[level_index].bucket_size
+
+    @property
+    def levels(self) -> int:
+        return len(self._levels)
+
+
+class _PyramidLevel(object):
+    """
+    A single level of the DecimationPyramid.
+
+    :type n_signals: int
+    :param n_signals: Number of signals of each measurement.
+    :type bucket_size: int
+    :param bucket_size: Number of raw measurements summarized by a single bucket.
+    :type capacity: int
+    :param capacity: Number of buckets kept by this level.
+    """
+
+    def __init__(self, n_signals: int, bucket_size: int, capacity: int) -> None:
+        self.bucket_size = bucket_size
+        self.capacity = capacity
+        self._minimum = np.zeros((n_signals, 2 * capacity), dtype=np.float64)
+        self._maximum = np.zeros((n_signals, 2 * capacity), dtype=np.float64)
+        self._total = np.zeros((n_signals, 2 * capacity), dtype=np.float64)
+        self.pending_minimum = np.empty(n_signals, dtype=np.float64)
+        self.pending_maximum = np.empty(n_signals, dtype=np.float64)
+        self.pending_total = np.empty(n_signals, dtype=np.float64)
+        # Number of completed buckets and number of raw measurements in the pending bucket
+        self.head = 0
+        self.pending_count = 0
+        self.clear()
+
+    def accumulate(
+        self, minimum: np.ndarray, maximum: np.ndarray, total: np.ndarray, count: int
+    ) -> None:
+        """
+        Merges a bucket of the next finer level, or a raw measurement, into the pending bucket.
+        """
+        np.minimum(self.pending_minimum, minimum, out=self.pending_minimum)
+        np.maximum(self.pending_maximum, maximum, out=self.pending_maximum)
+        np.add(self.pending_total, total, out=self.pending_total)
+        self.pending_count += count
+
+    def complete(self) -> tuple:
+        """
+        Stores the pending bucket and starts a new one.
+
+        :return: Minimum, maximum, sum and number of measurements of the completed bucket.
+        """
+        position = self.head % self.capacity
+        for ring, pending in (
+            (self._minimum, self.pending_minimum),
+            (self._maximum, self.pending_maximum),
+            (self._total, self.pending_total),
+        ):
+            ring[:, position] = pending
+            ring[:, position + self.capacity] = pending
+        self.head += 1
+        count = self.pending_count
+        self._reset_pending()
+        return (
+            self._minimum[:, position],
+            self._maximum[:, position],
+            self._total[:, position],
+            count,
+        )
+
+    def chronological(self) -> tuple:
+        """
+        :return: Views of the minimum, maximum and sum of the stored buckets, ordered from oldest to newest.
+        """
+        length = min(self.head, self.capacity)
+        if length == 0:
+            stop = 0
+        else:
+            stop = (self.head - 1) % self.capacity + 1 + self.capacity
+        return (
+            self._minimum[:, stop - length : stop],
+            self._maximum[:, stop - length : stop],
+            self._total[:, stop - length : stop],
+        )
+
+    def clear(self) -> None:
+        self.head = 0
+        self._reset_pending()
+
+    def _reset_pending(self) -> None:
+        self.pending_minimum.fill(np.inf)
+        self.pending_maximum.fill(-np.inf)
+        self.pending_total.fill(0.0)
+        self.pending_count = 0
@@ -21,5 +21,7 @@ def setup_custom_logger(name: str, level: int) -> logging.log:
 
     logger = logging.getLogger(name)
     logger.setLevel(level=level)
-    logger.addHandler(handler)
+    # Several entry points may set up the same logger within one process, e.g. spawned worker processes
+    if not logger.handlers:
+        logger.addHandler(handler)
     return logger
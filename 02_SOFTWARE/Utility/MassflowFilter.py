@@ -0,0 +1,149 @@
+import math
+
+
+class MassflowFilter(object):
+    """
+    The MassflowFilter estimates the mass flow recursively with an extended Kalman filter, as a less noisy alternative
+    to the instantaneous estimate of the :class:`setup.MassflowEstimator`. Its state consists of the temperature
+    difference and the flow. The temperature difference follows the first order thermal model of the setup,
+
+    .. math::
+
+       \\tau \\dot{\\Delta T}(t) = \\frac{\\eta U^2 / R}{\\dot m c_p + G} u(t) - \\Delta T(t),
+
+    whereas the flow is modelled as random walk. Every measurement of the temperature difference, and optionally of
+    the flow sensor, corrects the state, such that the estimate follows the thermal lag instead of treating every
+    measurement as steady state.
+
+    The time constant, the transmitted share of the heater power and the heat loss of the model are taken from the
+    "simulation" section, which also parametrizes the :class:`Simulation.PlantModel.PlantModel` and is updated with
+    measured dynamics by :class:`Simulation.Identification.Identification`. With a transmitted share of one and no
+    heat loss, the steady state of the filter agrees with the instantaneous estimate.
+
+    The flow is only observable while heating. Without heater output and without the flow sensor, the variance of
+    the estimate grows until it reaches its initial value.
+
+    Every update takes constant time and only operates on scalars, such that the filter runs on every measurement.
+
+    :type config: ConfigurationHandler
+    :param config: Configuration providing the "flow_filter", "simulation" and "massflow_estimate" sections.
+    :type t_sampling: float
+    :param t_sampling: Nominal time between two updates in seconds, used if the time stamps do not advance.
+    """
+
+    def __init__(self, config, t_sampling: float) -> None:
+        filter_config = config["flow_filter"]
+        plant = config["simulation"]
+        estimate = config["measurement"]["massflow_estimate"]
+        self.t_sampling = t_sampling
+        self.heater_power = (
+            plant["transmitted_power"]
+            * estimate["voltage"] ** 2
+            / estimate["resistance"]
+        )
+        # Heat capacity of one slm of air flow per second
+        self.heat_capacity = estimate["c_p"] / estimate["massflow_SI2SLM"]
+        self.heat_loss = plant["heat_loss"]
+        self.time_constant = plant["time_constant"]
+        self.fuse_flow_sensor = bool(filter_config["fuse_flow_sensor"])
+        self.temperature_variance = filter_config["temperature_noise"] ** 2
+        self.flow_sensor_variance = filter_config["flow_sensor_noise"] ** 2
+        self.temperature_process_noise = filter_config["temperature_process_noise"]
+        self.flow_process_noise = filter_config["flow_process_noise"]
+        self.initial_flow = config["general"]["nominal_mass_flow_rate"]
+        self.initial_flow_variance = filter_config["initial_flow_noise"] ** 2
+        self.min_flow = filter_config["min_flow"]
+        self.reset()
+
+    def reset(self) -> None:
+        """
+        Restarts the filter from the nominal flow, e.g. after a pause of the measurements.
+        """
+        self._time = None
+        self.temperature_difference = 0.0
+        self.flow = self.initial_flow
+        # Covariance of the estimation error
+        self._p00 = self.temperature_variance
+        self._p01 = 0.0
+        self._p11 = self.initial_flow_variance
+
+    @property
+    def variance(self) -> float:
+        """
+        Variance of the flow estimate in slm squared.
+        """
+        return self._p11
+
+    def update(self, time: float, delta_t: float, pwm: float, flow=None) -> tuple:
+        """
+        Predicts the state for the time of the new measurement and corrects it with the measurement.
+
+        :type time: float
+        :param time: Time stamp of the measurement in seconds.
+        :type delta_t: float
+        :param delta_t: Measured temperature difference.
+        :type pwm: float
+        :param pwm: Heater output applied since the previous measurement.
+        :type flow: float
+        :param flow: Flow measured by the flow sensor in slm, only used if the fusion is enabled.
+        :return: The filtered flow estimate and its variance.
+        """
+        if self._time is None:
+            self.temperature_difference = delta_t
+        else:
+            dt = time - self._time
+            if dt <= 0:
+                dt = self.t_sampling
+            self._predict(dt=dt, pwm=pwm)
+        self._time = time
+
+        self._correct(index=0, measurement=delta_t, variance=self.temperature_variance)
+        if self.fuse_flow_sensor and flow is not None:
+            self._correct(index=1, measurement=flow, variance=self.flow_sensor_variance)
+        self.flow = max(self.flow, self.min_flow)
+        return self.flow, self._p11
+
+    def _predict(self, dt: float, pwm: float) -> None:
+        decay = math.exp(-dt / self.time_constant)
+        denominator = self.flow * self.heat_capacity + self.heat_loss
+        gain = self.heater_power / denominator
+        # Sensitivity of the predicted temperature difference to the flow
+        f01 = -(1 - decay) * pwm * gain * self.heat_capacity / denominator
+        self.temperature_difference = (
+            decay * self.temperature_difference + (1 - decay) * gain * pwm
+        )
+        # P = F P F' + Q with F = [[decay, f01], [0, 1]]
+        p00, p01, p11 = self._p00, self._p01, self._p11
+        self._p00 = (
+            decay * decay * p00
+            + 2 * decay * f01 * p01
+            + f01 * f01 * p11
+            + self.temperature_process_noise * dt
+        )
+        self._p01 = decay * p01 + f01 * p11
+        self._p11 = min(
+            p11 + self.flow_process_noise * dt, self.initial_flow_variance
+        )
+
+    def _correct(self, index: int, measurement: float, variance: float) -> None:
+        p00, p01, p11 = self._p00, self._p01, self._p11
+        if index == 0:
+            innovation = measurement - self.temperature_difference
+            s = p00 + variance
+            k0, k1 = p00 / s, p01 / s
+            self._p00, self._p01, self._p11 = (
+                p00 - k0 * p00,
+                p01 - k0 * p01,
+                p11 - k1 * p01,
+            )
+        else:
+            innovation = measurement - self.flow
+            s = p11 + variance
+            k0, k1 = p01 / s, p11 / s
+            self._p00, self._p01, self._p11 = (
+                p00 - k0 * p01,
+                p01 - k0 * p11,
+                p11 - k1 * p11,
+            )
+        self.temperature_difference += k0 * innovation
+        self.flow += k1 * innovation
@@ -1,74 +1,712 @@
+from Utility.DecimationPyramid import DecimationPyramid
+from Utility.MeasurementFrame import MeasurementSchema, MeasurementFrame
+from Utility.RunningStatistics import RunningStatistics
+from typing import Callable
 import logging
-from collections import deque
+import time
+import numpy as np
 
 logger = logging.getLogger("root")
 
 
 class MeasurementBuffer(object):
     """
-    The MeasurementBuffer holds a number of deque instances, one for each recorded signal and manages them as a
-    ring buffer, always keeping a record of the most up to date measurements, reaching back `buffer_interval_s` seconds.
+    The MeasurementBuffer holds a single preallocated two-dimensional array with one row for each recorded signal and
+    manages it as a ring buffer, always keeping a record of the most up to date measurements, reaching back
+    `buffer_interval_s` seconds.
 
-    :type signals: list
-    :param signals: List of signal names.
+    Every measurement is written twice, once at the current cursor position and once mirrored one buffer length
+    further. This way the most recent measurements are always available as one contiguous slice of the array, such
+    that chronologically ordered signals can be handed out as views without copying or reordering any data.
+
+    Readers running concurrently to the acquisition thread should use :meth:`snapshot`. Every write is enclosed by two
+    increments of a version counter (a seqlock), which allows readers to detect and retry copies that overlapped with a
+    write, while the writing thread never has to wait for a reader.
+
+    Each measurement is stamped with a sequence number that keeps increasing over the lifetime of the buffer, also
+    across calls to :meth:`clear`. Live consumers remember the :attr:`sequence` they have processed last and use
+    :meth:`read_since` to retrieve only the measurements that arrived since.
+
+    If a `Time` signal is recorded, it serves as index of the buffered measurements. Since the time increases
+    monotonically, :meth:`window`, :meth:`last` and :meth:`at` locate time ranges by binary search and only copy the
+    selected measurements. Furthermore a :class:`Utility.DecimationPyramid.DecimationPyramid` is maintained alongside
+    the buffered measurements, which allows :meth:`decimated` to summarize long time ranges with a bounded number of
+    points.
+
+    Count, sum, mean, standard deviation, minimum and maximum of every signal over the buffered measurements are
+    maintained incrementally by :class:`Utility.RunningStatistics.RunningStatistics` and can be read in constant time
+    via :meth:`statistics`. Further quantities derived from the signals can be added with :meth:`register_statistic`.
+
+    Optionally, measurements leaving the buffer, either because they are overwritten or because the buffer is cleared,
+    are spilled to a :class:`Utility.SegmentStore.SegmentStore`. Measurements older than the buffered ones then remain
+    available on disk through :meth:`read_since`, :meth:`window`, :meth:`last` and :meth:`at`.
+
+    :type signals: MeasurementSchema
+    :param signals: Schema of the recorded signals, or a list of signal names to create one from.
     :type sampling_time_s: float
     :param sampling_time_s: Measurement sampling time in seconds.
     :type buffer_interval_s: float
     :param buffer_interval_s: Total buffered time interval in seconds which together with the sampling time defines the
        number of measurements to be stored.
+    :type segment_store: SegmentStore
+    :param segment_store: Optional store receiving all measurements that leave the buffer.
     """
 
     def __init__(
-        self, signals: list, sampling_time_s: float, buffer_interval_s: float
+        self,
+        signals,
+        sampling_time_s: float,
+        buffer_interval_s: float,
+        segment_store=None,
     ) -> None:
-        self._signals = signals
-        self._data = dict()
-        buffer_length = int(buffer_interval_s / sampling_time_s)
-        for signal in signals:
-            if ' ' in signal:
-                # Raise error now to prevent unexpected behaviour upon exporting to .mat file later
-                raise RuntimeError('Space used in name string for signal {}. Please use only _ instead!'.format(signal))
-            self._data[signal] = deque(maxlen=buffer_length)
-
-    def update(self, measurement: dict) -> None:
-        """
-        A buffer update is done by adding an entry to each signal buffer. Before the buffer is full this leads
-        to an increase in length, afterwards the deque instances automatically forget their oldest entry in favor
+        if isinstance(signals, MeasurementSchema):
+            self._schema = signals
+        else:
+            self._schema = MeasurementSchema(signals=signals)
+        self._signals = list(self._schema.signals)
+        self._columns = self._schema.columns
+        self._capacity = max(int(buffer_interval_s / sampling_time_s), 1)
+        # One row per signal, twice the buffer length to hold the mirrored copy of each measurement
+        self._array = np.zeros(
+            (len(self._signals), 2 * self._capacity), dtype=np.float64
+        )
+        # Sequence number of the next measurement, i.e. total number of measurements ever written
+        self._head = 0
+        # Sequence number of the oldest measurement still considered part of the buffer
+        self._tail = 0
+        # Seqlock version, odd while a write is in progress
+        self._version = 0
+        if "Time" in self._columns:
+            self._pyramid = DecimationPyramid(
+                n_signals=len(self._signals),
+                time_row=self._columns["Time"],
+                capacity=self._capacity,
+            )
+        else:
+            self._pyramid = None
+        self._statistics = RunningStatistics(
+            schema=self._schema, capacity=self._capacity
+        )
+        self._segment_store = segment_store
+        # Sequence number up to which measurements have been handed to the segment store
+        self._spilled = 0
+
+    def update(self, measurement) -> None:
+        """
+        A buffer update is done by writing one entry for each signal at the current cursor position. Before the
+        buffer is full this leads to an increase in length, afterwards the oldest entry is overwritten in favor
         of the new one.
 
-        :type measurement: object
-        :param measurement: Dictionary containing a value for each signal name
+        :type measurement: MeasurementFrame
+        :param measurement: Frame following the schema of the buffer, which is written without further checks.
+           Alternatively a dictionary containing a value for each signal name.
         """
-        if set(measurement.keys()) != set(self._signals):
+        if isinstance(measurement, MeasurementFrame):
+            if measurement.schema is not self._schema:
+                logger.error("Measurement frame of a different schema supplied!")
+                raise AttributeError(
+                    "Measurement frame of a different schema supplied!"
+                )
+            row = measurement.values
+        elif set(measurement.keys()) != set(self._signals):
             logger.error("Incorrect set of signals supplied!")
             raise AttributeError("Incorrect set of signals supplied!")
-        for signal, value in measurement.items():
-            self._data[signal].append(value)
+        else:
+            row = [measurement[signal] for signal in self._signals]
+        position = self._head % self._capacity
+        if (
+            self._segment_store is not None
+            and self._head - self._capacity >= self._spilled
+        ):
+            # Spill the measurement about to be overwritten
+            self._segment_store.append(
+                sequence=self._head - self._capacity,
+                columns=self._array[:, position : position + 1],
+            )
+            self._spilled = self._head - self._capacity + 1
+        self._version += 1
+        if self._head - self._capacity >= self._tail:
+            leaving = self._array[:, position]
+        else:
+            leaving = None
+        self._statistics.update(sequence=self._head, row=row, leaving=leaving)
+        self._array[:, position] = row
+        self._array[:, position + self._capacity] = row
+        if self._pyramid is not None:
+            self._pyramid.update(self._array[:, position])
+        self._head += 1
+        if self._head % self._capacity == 0:
+            self._statistics.rebase(
+                window=self._chronological(),
+                first=max(self._head - self._capacity, self._tail),
+            )
+        self._version += 1
+
+    def _chronological(self, head=None, start=None) -> np.ndarray:
+        """
+        Selects the currently buffered measurements from the backing array.
+
+        :type head: int
+        :param head: Optionally select the measurements as they were buffered at the given head position.
+        :type start: int
+        :param start: Optionally select only the measurements with a sequence number of at least `start`.
+        :return: A view of the backing array with one row per signal, ordered from oldest to newest measurement.
+        """
+        if head is None:
+            head = self._head
+        first = max(head - self._capacity, self._tail)
+        if start is not None:
+            first = max(first, start)
+        length = max(head - first, 0)
+        if length == 0:
+            return self._array[:, 0:0]
+        stop = (head - 1) % self._capacity + 1 + self._capacity
+        return self._array[:, stop - length : stop]
+
+    def snapshot(self, signals=None) -> "MeasurementSnapshot":
+        """
+        Copies the buffered measurements such that all signals are cut at the same measurement, even while the
+        acquisition thread keeps updating the buffer. Copies overlapping with a write are detected by means of the
+        version counter and repeated.
+
+        :type signals: list
+        :param signals: Optional list of signal names to copy, all signals are copied by default.
+        :return: A consistent copy of the buffered measurements.
+        """
+        return self.read_since(sequence=None, signals=signals)
+
+    def read_since(self, sequence, signals=None) -> "MeasurementSnapshot":
+        """
+        Copies only the measurements that were added to the buffer since the given sequence number, such that live
+        consumers only need to process new measurements. The same consistency guarantees as for :meth:`snapshot` apply.
+
+        :type sequence: int
+        :param sequence: Sequence number of the first measurement of interest, usually the `head` of the previously
+           returned snapshot. If None, all buffered measurements are copied.
+        :type signals: list
+        :param signals: Optional list of signal names to copy, all signals are copied by default.
+        :return: A consistent copy of the new measurements. If its `first` sequence number is larger than the requested
+           one, measurements have been missed because the buffer was cleared or wrapped around in the meantime. Its
+           `oldest` sequence number tells which previously read measurements are still held by the buffer.
+
+        .. note::
+           If a segment store is attached, measurements that have already left the buffer since the last call to
+           :meth:`clear` are read back from disk, such that no measurements are missed.
+        """
+        if signals is None:
+            signals = self._signals
+        rows = [self._columns[signal] for signal in signals]
+        while True:
+            version = self._version
+            if version % 2 == 0:
+                head = self._head
+                tail = self._tail
+                oldest = max(head - self._capacity, tail)
+                array = self._chronological(head=head, start=sequence)[rows]
+                if self._version == version:
+                    break
+            # A write is in progress, let the acquisition thread finish it
+            time.sleep(0)
+        first = head - array.shape[1]
+        if self._segment_store is not None and sequence is not None:
+            start = max(sequence, tail)
+            if start < oldest:
+                # Stored measurements are never modified, no need to guard reading them
+                history = self._segment_store.read(start=start, stop=oldest, rows=rows)
+                array = np.concatenate((history, array), axis=1)
+                first = start
+        return MeasurementSnapshot(
+            signals=signals, array=array, head=head, oldest=oldest, first=first
+        )
+
+    def decimated(
+        self, max_points: int, t0=None, t1=None, signals=None, envelope=True
+    ) -> "MeasurementSnapshot":
+        """
+        Copies the measurements within the time range [t0, t1] using at most `max_points` values per signal. If the
+        range holds more measurements, they are summarized by the coarsest necessary level of the decimation pyramid,
+        such that the cost of reading and plotting depends on the number of points rather than on the buffer length.
+        The same consistency guarantees as for :meth:`snapshot` apply.
+
+        :type max_points: int
+        :param max_points: Maximum number of values per signal, e.g. the number of pixels available to a plot.
+        :type t0: float
+        :param t0: Optional start of the time range, defaults to the oldest buffered measurement.
+        :type t1: float
+        :param t1: Optional end of the time range, defaults to the newest buffered measurement.
+        :type signals: list
+        :param signals: Optional list of signal names to copy, all signals are copied by default.
+        :type envelope: bool
+        :param envelope: If True, each summarized bucket is represented by its minimum followed by its maximum, which
+           for the time signal are the start and end of the bucket. This keeps plotted lines visually faithful. If
+           False, each bucket is represented by its mean.
+        :return: A consistent copy of the, possibly decimated, measurements.
+        """
+        if signals is None:
+            signals = self._signals
+        rows = [self._columns[signal] for signal in signals]
+        time_row = self._columns["Time"]
+        max_buckets = max(max_points // 2 if envelope else max_points, 1)
+        while True:
+            version = self._version
+            if version % 2 == 0:
+                head = self._head
+                oldest = max(head - self._capacity, self._tail)
+                chronological = self._chronological(head=head)
+                times = chronological[time_row]
+                start, stop = self._time_range(times=times, t0=t0, t1=t1)
+                if self._pyramid is None or len(times) == 0:
+                    level = -1
+                else:
+                    level = self._pyramid.select_level(
+                        n_measurements=stop - start, max_buckets=max_buckets
+                    )
+                if level < 0:
+                    array = chronological[rows, start:stop]
+                    first = oldest + start
+                else:
+                    minimum, maximum, mean, first = self._pyramid.buckets(
+                        level_index=level,
+                        t0=times[0] if t0 is None else t0,
+                        t1=t1,
+                    )
+                    minimum, maximum, mean, first = self._trim_buckets(
+                        minimum=minimum,
+                        maximum=maximum,
+                        mean=mean,
+                        first=first,
+                        bucket_size=self._pyramid.bucket_size(level),
+                        chronological=chronological,
+                        oldest=oldest,
+                        head=head,
+                    )
+                    if envelope:
+                        array = np.empty((len(rows), 2 * minimum.shape[1]))
+                        array[:, 0::2] = minimum[rows]
+                        array[:, 1::2] = maximum[rows]
+                    else:
+                        array = mean[rows]
+                if self._version == version:
+                    return MeasurementSnapshot(
+                        signals=signals,
+                        array=array,
+                        head=head,
+                        oldest=oldest,
+                        first=first,
+                    )
+            # A write is in progress, let the acquisition thread finish it
+            time.sleep(0)
+
+    @staticmethod
+    def _trim_buckets(
+        minimum, maximum, mean, first, bucket_size, chronological, oldest, head
+    ) -> tuple:
+        """
+        Restricts the buckets read from the decimation pyramid to the buffered measurements. The oldest buckets may
+        also summarize measurements which have already left the buffer, or were cleared. Such buckets are dropped or,
+        if they partly cover buffered measurements, summarized anew from these measurements only.
+
+        :return: The trimmed minimum, maximum and mean and the sequence number of the first summarized measurement.
+        """
+        while first < oldest and minimum.shape[1]:
+            end = min(first + bucket_size, head) - oldest
+            if end <= 0:
+                minimum, maximum, mean = minimum[:, 1:], maximum[:, 1:], mean[:, 1:]
+                first += bucket_size
+                continue
+            live = chronological[:, :end]
+            minimum[:, 0] = np.min(live, axis=1)
+            maximum[:, 0] = np.max(live, axis=1)
+            mean[:, 0] = np.mean(live, axis=1)
+            first = oldest
+        return minimum, maximum, mean, first
+
+    def window(self, t0=None, t1=None, signals=None) -> "MeasurementSnapshot":
+        """
+        Copies the measurements within the time range [t0, t1]. The range is located by binary search over the `Time`
+        signal, such that only the selected measurements are visited. The same consistency guarantees as for
+        :meth:`snapshot` apply.
+
+        :type t0: float
+        :param t0: Optional start of the time range, defaults to the oldest buffered measurement.
+        :type t1: float
+        :param t1: Optional end of the time range, defaults to the newest buffered measurement.
+        :type signals: list
+        :param signals: Optional list of signal names to copy, all signals are copied by default.
+        :return: A consistent copy of the measurements within the time range.
+
+        .. note::
+           If a segment store is attached and `t0` lies before the oldest buffered measurement, measurements that have
+           already left the buffer since the last call to :meth:`clear` are read back from disk.
+        """
+        if signals is None:
+            signals = self._signals
+        rows = [self._columns[signal] for signal in signals]
+        time_row = self._columns["Time"]
+        while True:
+            version = self._version
+            if version % 2 == 0:
+                head = self._head
+                tail = self._tail
+                oldest = max(head - self._capacity, tail)
+                chronological = self._chronological(head=head)
+                times = chronological[time_row]
+                start, stop = self._time_range(times=times, t0=t0, t1=t1)
+                array = chronological[rows, start:stop]
+                before_buffer = t0 is not None and (len(times) == 0 or t0 < times[0])
+                if self._version == version:
+                    break
+            # A write is in progress, let the acquisition thread finish it
+            time.sleep(0)
+        first = oldest + start
+        if self._segment_store is not None and before_buffer and tail < oldest:
+            history_start = self._segment_store.search(t0, side="left")
+            if history_start is not None:
+                history_start = max(history_start, tail)
+                history_stop = oldest
+                if t1 is not None:
+                    history_stop = min(
+                        self._segment_store.search(t1, side="right"), oldest
+                    )
+                if history_start < history_stop:
+                    # Stored measurements are never modified, no need to guard reading them
+                    history = self._segment_store.read(
+                        start=history_start, stop=history_stop, rows=rows
+                    )
+                    array = np.concatenate((history, array), axis=1)
+                    first = history_start
+        return MeasurementSnapshot(
+            signals=signals, array=array, head=head, oldest=oldest, first=first
+        )
+
+    def last(self, seconds: float, signals=None) -> "MeasurementSnapshot":
+        """
+        Copies the measurements of the last `seconds` seconds, counted back from the newest buffered measurement.
+
+        :type seconds: float
+        :param seconds: Length of the time range.
+        :type signals: list
+        :param signals: Optional list of signal names to copy, all signals are copied by default.
+        :return: A consistent copy of the measurements within the time range.
+        """
+        newest = self.at(t=None, signals=["Time"])["Time"]
+        if np.isnan(newest):
+            return self.window(signals=signals)
+        return self.window(t0=newest - seconds, signals=signals)
+
+    def at(self, t, signals=None, interpolate=False) -> dict:
+        """
+        Reads the values of the signals at time `t`, located by binary search over the `Time` signal.
+
+        :type t: float
+        :param t: Time of interest. If None, the newest buffered measurement is returned.
+        :type signals: list
+        :param signals: Optional list of signal names to read, all signals are read by default.
+        :type interpolate: bool
+        :param interpolate: If True, values between two measurements are linearly interpolated. Otherwise the last
+           measurement taken at or before `t` is returned.
+        :return: A dictionary containing a value for each signal name. All values are NaN if no measurement is buffered
+           at or before `t`, or, when interpolating, if `t` lies outside of the buffered time range.
+
+        .. note::
+           If a segment store is attached and `t` lies before the oldest buffered measurement, the measurements that
+           have already left the buffer since the last call to :meth:`clear` are searched on disk.
+        """
+        if signals is None:
+            signals = self._signals
+        rows = [self._columns[signal] for signal in signals]
+        time_row = self._columns["Time"]
+        while True:
+            version = self._version
+            if version % 2 == 0:
+                tail = self._tail
+                oldest = max(self._head - self._capacity, tail)
+                chronological = self._chronological()
+                times = chronological[time_row]
+                if t is None:
+                    index = len(times)
+                else:
+                    index = int(np.searchsorted(times, t, side="right"))
+                if index == 0:
+                    values = np.full(len(rows), np.nan)
+                    # Oldest buffered measurement, following the stored ones
+                    following = chronological[rows + [time_row], :1].copy()
+                elif t is None or not interpolate or times[index - 1] == t:
+                    values = chronological[rows, index - 1]
+                elif index == len(times):
+                    values = np.full(len(rows), np.nan)
+                else:
+                    weight = (t - times[index - 1]) / (times[index] - times[index - 1])
+                    previous = chronological[rows, index - 1]
+                    following = chronological[rows, index]
+                    values = previous + weight * (following - previous)
+                if self._version == version:
+                    break
+            # A write is in progress, let the acquisition thread finish it
+            time.sleep(0)
+        if (
+            index == 0
+            and t is not None
+            and self._segment_store is not None
+            and tail < oldest
+        ):
+            values = self._stored_at(
+                t=t,
+                rows=rows,
+                time_row=time_row,
+                tail=tail,
+                oldest=oldest,
+                following=following,
+                interpolate=interpolate,
+            )
+        return dict(zip(signals, values.tolist()))
+
+    def _stored_at(
+        self, t, rows, time_row, tail, oldest, following, interpolate
+    ) -> np.ndarray:
+        """
+        Reads the values of the signals at time `t` from the segment store, see :meth:`at`.
+
+        :type following: np.ndarray
+        :param following: The oldest buffered measurement with its time appended, one column or none if the buffer is
+           empty, used to interpolate between the newest stored and the oldest buffered measurement.
+        :return: The values of the signals.
+        """
+        sequence = self._segment_store.search(t, side="right")
+        if sequence is None or sequence <= tail:
+            return np.full(len(rows), np.nan)
+        sequence = min(sequence, oldest)
+        measurements = self._segment_store.read(
+            start=sequence - 1, stop=sequence, rows=rows + [time_row]
+        )
+        if sequence == oldest:
+            measurements = np.concatenate((measurements, following), axis=1)
+        else:
+            measurements = np.concatenate(
+                (
+                    measurements,
+                    self._segment_store.read(
+                        start=sequence, stop=sequence + 1, rows=rows + [time_row]
+                    ),
+                ),
+                axis=1,
+            )
+        previous = measurements[:-1, 0]
+        if not interpolate or measurements[-1, 0] == t:
+            return previous
+        if measurements.shape[1] < 2:
+            return np.full(len(rows), np.nan)
+        following = measurements[:-1, 1]
+        weight = (t - measurements[-1, 0]) / (measurements[-1, 1] - measurements[-1, 0])
+        return previous + weight * (following - previous)
+
+    @staticmethod
+    def _time_range(times: np.ndarray, t0=None, t1=None) -> tuple:
+        """
+        Locates the time range [t0, t1] within the monotonically increasing measurement times by binary search.
+
+        :return: Start and stop index of the measurements within the time range.
+        """
+        start = 0
+        stop = len(times)
+        if t0 is not None:
+            start = int(np.searchsorted(times, t0, side="left"))
+        if t1 is not None:
+            stop = max(int(np.searchsorted(times, t1, side="right")), start)
+        return start, stop
+
+    def statistics(self, name: str) -> dict:
+        """
+        Reads the running statistics of a signal or registered quantity over the buffered measurements in constant
+        time. The same consistency guarantees as for :meth:`snapshot` apply.
 
-    def __getitem__(self, item: str) -> deque:
+        :type name: str
+        :param name: Name of a signal or of a quantity registered via :meth:`register_statistic`.
+        :return: A dictionary with count, sum, mean, standard deviation (std), minimum and maximum.
+
+        :raises KeyError: If the name is neither a signal nor a registered quantity a KeyError is raised.
+        """
+        while True:
+            version = self._version
+            if version % 2 == 0:
+                summary = self._statistics.summary(name)
+                if self._version == version:
+                    return summary
+            # A write is in progress, let the acquisition thread finish it
+            time.sleep(0)
+
+    def register_statistic(self, name: str, expression: Callable) -> None:
+        """
+        Registers a quantity derived from the recorded signals, whose running statistics are maintained alongside the
+        ones of the signals. The quantity is computed once for every new measurement.
+
+        :type name: str
+        :param name: Name of the derived quantity, must differ from all signal names.
+        :type expression: Callable
+        :param expression: Function receiving a mapping from signal names to values, e.g.
+           `lambda m: (m["Temperature_Difference"] - m["Target_Delta_T"]) ** 2`. Only elementwise operations should be
+           used, since the function is also called with arrays for the measurements already buffered.
+
+        .. note::
+           Quantities should be registered before measurements are written from another thread.
+        """
+        self._version += 1
+        try:
+            self._statistics.register(
+                name=name,
+                expression=expression,
+                window=self._chronological(),
+                first=max(self._head - self._capacity, self._tail),
+            )
+        finally:
+            # Release readers also if the name or the expression are rejected
+            self._version += 1
+
+    def __getitem__(self, item: str) -> np.ndarray:
         """
         Allows access of the individual signals via the __getitem__ operator.
 
         :type item: str
         :param item: Identifier of the desired signal.
-        :return: A deque instance containing the requested signal.
+        :return: A read-only view on the buffered values of the requested signal, ordered from oldest to newest.
 
-        :raises KeyError: If the supplied string is not a key in the _data dictionary a KeyError is raised.
+        :raises KeyError: If the supplied string is not a known signal a KeyError is raised.
         """
-        if item in self._signals:
-            return self._data[item]
+        if item in self._columns:
+            view = self._chronological()[self._columns[item]]
+            view.flags.writeable = False
+            return view
         else:
             logger.error("Signal {} is not available!".format(item))
             raise KeyError("Signal {} is not available!".format(item))
 
+    def __len__(self) -> int:
+        """
+        :return: Number of measurements currently held in the buffer.
+        """
+        return min(self._head - self._tail, self._capacity)
+
     def clear(self) -> None:
         """
         Clears the buffer.
         """
         logger.info("Clearing the measurement buffer.")
-        for signal in self._signals:
-            self._data[signal].clear()
+        self._spill()
+        self._version += 1
+        self._tail = self._head
+        self._statistics.clear()
+        if self._pyramid is not None:
+            self._pyramid.clear(origin=self._head)
+        self._version += 1
+
+    def close(self) -> None:
+        """
+        Spills all buffered measurements to the segment store, if any, and closes it.
+        """
+        if self._segment_store is not None:
+            self._spill()
+            self._segment_store.close()
+
+    def _spill(self) -> None:
+        """
+        Hands all buffered measurements which have not been spilled yet to the segment store.
+        """
+        if self._segment_store is not None:
+            start = max(self._spilled, self._head - self._capacity)
+            if start < self._head:
+                self._segment_store.append(
+                    sequence=start, columns=self._chronological(start=start)
+                )
+            self._spilled = self._head
+
+    @property
+    def signals(self) -> list:
+        return list(self._signals)
+
+    @property
+    def schema(self) -> MeasurementSchema:
+        return self._schema
+
+    @property
+    def capacity(self) -> int:
+        return self._capacity
+
+    @property
+    def oldest(self) -> int:
+        """
+        Sequence number of the oldest buffered measurement, equal to :attr:`sequence` while the buffer is empty.
+        """
+        return max(self._head - self._capacity, self._tail)
+
+    @property
+    def sequence(self) -> int:
+        """
+        Sequence number the next measurement will be stamped with.
+        """
+        return self._head
+
+    @property
+    def data(self) -> dict:
+        chronological = self._chronological()
+        return {signal: chronological[index] for signal, index in self._columns.items()}
+
+
+class MeasurementSnapshot(object):
+    """
+    A MeasurementSnapshot is a consistent copy of the signals held by a MeasurementBuffer at one point in time, with
+    all signals having the same length.
+
+    :type signals: list
+    :param signals: List of signal names, one for each row of `array`.
+    :type array: np.ndarray
+    :param array: Copied measurements with one row per signal, ordered from oldest to newest measurement.
+    :type head: int
+    :param head: Sequence number following the newest measurement contained in the snapshot.
+    :type oldest: int
+    :param oldest: Sequence number of the oldest measurement held by the buffer when the snapshot was taken.
+    :type first: int
+    :param first: Sequence number of the first contained measurement. Defaults to the snapshot holding all measurements
+       up to `head`, needs to be given for snapshots of a limited time range or of decimated measurements.
+    """
+
+    def __init__(
+        self, signals: list, array: np.ndarray, head: int, oldest: int, first=None
+    ) -> None:
+        self._columns = {signal: index for index, signal in enumerate(signals)}
+        self._array = array
+        self.head = head
+        self.oldest = oldest
+        self.first = head - array.shape[1] if first is None else first
+
+    def __getitem__(self, item: str) -> np.ndarray:
+        """
+        Allows access of the individual signals via the __getitem__ operator.
+
+        :type item: str
+        :param item: Identifier of the desired signal.
+        :return: The values of the requested signal, ordered from oldest to newest.
+
+        :raises KeyError: If the signal is not part of the snapshot a KeyError is raised.
+        """
+        if item in self._columns:
+            return self._array[self._columns[item]]
+        else:
+            logger.error("Signal {} is not part of the snapshot!".format(item))
+            raise KeyError("Signal {} is not part of the snapshot!".format(item))
+
+    def __len__(self) -> int:
+        """
+        :return: Number of measurements contained in the snapshot.
+        """
+        return self._array.shape[1]
+
+    @property
+    def sequences(self) -> np.ndarray:
+        """
+        Sequence numbers of the contained measurements, only meaningful if the measurements are not decimated.
+        """
+        return np.arange(self.first, self.first + len(self))
 
     @property
     def data(self) -> dict:
-        return self._data
+        return {signal: self._array[index] for signal, index in self._columns.items()}
@@ -0,0 +1,98 @@
+import logging
+import numpy as np
+
+logger = logging.getLogger("root")
+
+
+class MeasurementSchema(object):
+    """
+    The MeasurementSchema defines the fixed set of recorded signals and maps each signal name to a column index. It is
+    created once and shared by the MeasurementBuffer and all MeasurementFrames, such that signal names are validated a
+    single time instead of with every measurement.
+
+    :type signals: list
+    :param signals: List of signal names.
+    """
+
+    def __init__(self, signals: list) -> None:
+        self._signals = tuple(signals)
+        self._columns = dict()
+        for index, signal in enumerate(self._signals):
+            if ' ' in signal:
+                # Raise error now to prevent unexpected behaviour upon exporting to .mat file later
+                raise RuntimeError('Space used in name string for signal {}. Please use only _ instead!'.format(signal))
+            if signal in self._columns:
+                raise RuntimeError("Signal {} defined more than once!".format(signal))
+            self._columns[signal] = index
+
+    def new_frame(self) -> "MeasurementFrame":
+        """
+        :return: A new frame following this schema, with all signals set to zero.
+        """
+        return MeasurementFrame(schema=self)
+
+    def index(self, signal: str) -> int:
+        """
+        :type signal: str
+        :param signal: Name of the signal.
+        :return: Column index of the signal.
+
+        :raises KeyError: If the signal is not part of the schema a KeyError is raised.
+        """
+        if signal in self._columns:
+            return self._columns[signal]
+        else:
+            logger.error("Signal {} is not available!".format(signal))
+            raise KeyError("Signal {} is not available!".format(signal))
+
+    def __len__(self) -> int:
+        return len(self._signals)
+
+    def __contains__(self, signal: str) -> bool:
+        return signal in self._columns
+
+    def __iter__(self):
+        return iter(self._signals)
+
+    @property
+    def signals(self) -> tuple:
+        return self._signals
+
+    @property
+    def columns(self) -> dict:
+        return self._columns
+
+
+class MeasurementFrame(object):
+    """
+    A MeasurementFrame holds the values of all signals of a single measurement in a preallocated array, in the column
+    order given by its schema. Frames are meant to be filled in place by the acquisition loop and handed to the
+    MeasurementBuffer as a whole, without building a dictionary for every measurement.
+
+    :type schema: MeasurementSchema
+    :param schema: Schema defining the signals of the frame.
+    """
+
+    __slots__ = ("schema", "values")
+
+    def __init__(self, schema: MeasurementSchema) -> None:
+        self.schema = schema
+        self.values = np.zeros(len(schema), dtype=np.float64)
+
+    def __getitem__(self, signal: str) -> float:
+        return self.values[self.schema.columns[signal]]
+
+    def __setitem__(self, signal: str, value: float) -> None:
+        self.values[self.schema.columns[signal]] = value
+
+    def keys(self) -> tuple:
+        return self.schema.signals
+
+    def items(self) -> list:
+        return list(zip(self.schema.signals, self.values.tolist()))
+
+    def as_dict(self) -> dict:
+        """
+        :return: A dictionary containing a value for each signal name.
+        """
+        return dict(self.items())
@@ -0,0 +1,96 @@
+from Utility.MeasurementBuffer import MeasurementBuffer
+from threading import Event, Thread
+import logging
+import numpy as np
+import os
+
+logger = logging.getLogger("root")
+
+
+class MeasurementRecorder(object):
+    """
+    The MeasurementRecorder continuously appends the measurements added to a MeasurementBuffer to a CSV file, such that
+    runs of arbitrary length are recorded without keeping them in memory. New measurements are fetched periodically
+    from a background thread using :meth:`Utility.MeasurementBuffer.MeasurementBuffer.read_since`, the acquisition
+    thread never waits for the file.
+
+    The buffer has to hold at least the measurements of one interval, otherwise measurements are missed and a warning
+    is logged.
+
+    :type measurement_buffer: MeasurementBuffer
+    :param measurement_buffer: Buffer whose measurements are recorded.
+    :type file_name: str
+    :param file_name: Path of the CSV file, an existing file is overwritten.
+    :type interval: float
+    :param interval: Time between two writes to the file in seconds.
+    """
+
+    def __init__(
+        self, measurement_buffer: MeasurementBuffer, file_name: str, interval=1.0
+    ) -> None:
+        self.measurement_buffer = measurement_buffer
+        self.file_name = file_name
+        self.interval = interval
+        self.recorded = 0
+        self.missed = 0
+        self._sequence = None
+        self._file = None
+        self._thread = None
+        self._finished = Event()
+
+    def start(self) -> None:
+        """
+        Opens the file and starts recording the measurements added to the buffer from now on.
+        """
+        folder = os.path.dirname(self.file_name)
+        if folder and not os.path.exists(folder):
+            os.makedirs(folder)
+        self._file = open(self.file_name, "w")
+        self._file.write(",".join(self.measurement_buffer.signals) + "\n")
+        self._sequence = self.measurement_buffer.sequence
+        self._finished.clear()
+        self._thread = Thread(target=self._run, name="MeasurementRecorder")
+        self._thread.daemon = True
+        self._thread.start()
+        logger.info("Recording measurements to {}.".format(self.file_name))
+
+    def stop(self) -> None:
+        """
+        Records the remaining measurements and closes the file.
+        """
+        if self._thread is not None:
+            self._finished.set()
+            self._thread.join()
+            self._thread = None
+            self._file.close()
+            self._file = None
+            logger.info(
+                "Recorded {} measurements to {}, missed {}.".format(
+                    self.recorded, self.file_name, self.missed
+                )
+            )
+
+    def _run(self) -> None:
+        while not self._finished.wait(self.interval):
+            self._record()
+        self._record()
+
+    def _record(self) -> None:
+        snapshot = self.measurement_buffer.read_since(self._sequence)
+        if snapshot.first > self._sequence:
+            self.missed += snapshot.first - self._sequence
+            logger.warning(
+                "Missed {} measurements while recording to {}.".format(
+                    snapshot.first - self._sequence, self.file_name
+                )
+            )
+        if len(snapshot):
+            np.savetxt(
+                self._file,
+                np.column_stack(list(snapshot.data.values())),
+                delimiter=",",
+                fmt="%.15g",
+            )
+            self._file.flush()
+            self.recorded += len(snapshot)
+        self._sequence = snapshot.head
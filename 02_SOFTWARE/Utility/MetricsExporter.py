@@ -0,0 +1,316 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Event, Thread
+import logging
+import os
+
+logger = logging.getLogger("root")
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class MetricsExporter(object):
+    """
+    The MetricsExporter publishes the health of a running Setup in the Prometheus text format, such that rigs can be
+    monitored from outside the GUI. The metrics are served via HTTP on a local port and/or periodically written to a
+    text file, e.g. to be picked up by the textfile collector of a node exporter.
+
+    Metrics are collected on the threads of the exporter from statistics the Setup maintains anyway, such that neither
+    scraping nor writing the file is performed on, or waited for by, the acquisition thread.
+
+    :type setup: Setup
+    :param setup: Setup whose metrics are exported.
+    :type port: int
+    :param port: Local port of the HTTP endpoint, no endpoint is served if None.
+    :type file: str
+    :param file: Path of the metrics file, no file is written if None.
+    :type interval: float
+    :param interval: Time between two updates of the metrics file in seconds.
+    :type host: str
+    :param host: Address the HTTP endpoint is bound to, only the local host by default.
+    """
+
+    def __init__(self, setup, port=None, file=None, interval=5.0, host="127.0.0.1"):
+        self.setup = setup
+        self.port = port
+        self.file = file
+        self.interval = interval
+        self.host = host
+        self._server = None
+        self._threads = []
+        self._finished = Event()
+
+    def start(self) -> None:
+        """
+        Starts serving the HTTP endpoint and writing the metrics file. If the port cannot be bound, e.g. because it is
+        used by another rig, a warning is logged and no endpoint is served, such that the setup runs regardless.
+        """
+        self._finished.clear()
+        if self.port is not None:
+            try:
+                self._server = ThreadingHTTPServer(
+                    (self.host, self.port), _MetricsRequestHandler
+                )
+            except OSError as e:
+                logger.warning(
+                    "Could not serve metrics on {}:{}, continuing without endpoint: {}".format(
+                        self.host, self.port, e
+                    )
+                )
+            else:
+                self._server.exporter = self
+                self._server.daemon_threads = True
+                self._threads.append(
+                    Thread(target=self._server.serve_forever, name="MetricsServer")
+                )
+                logger.info(
+                    "Serving metrics on http://{}:{}/metrics".format(
+                        self.host, self.port
+                    )
+                )
+        if self.file is not None:
+            folder = os.path.dirname(self.file)
+            if folder and not os.path.exists(folder):
+                os.makedirs(folder)
+            self._threads.append(Thread(target=self._write_file, name="MetricsFile"))
+        for thread in self._threads:
+            thread.daemon = True
+            thread.start()
+
+    def stop(self) -> None:
+        """
+        Stops the HTTP endpoint and writing the metrics file.
+        """
+        self._finished.set()
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+
+    def _write_file(self) -> None:
+        while True:
+            try:
+                temporary = "{}.tmp".format(self.file)
+                with open(temporary, "w") as file:
+                    file.write(self.render())
+                # Replace the file at once, such that readers never see a partially written file
+                os.replace(temporary, self.file)
+            except Exception as e:
+                logger.error("Could not write metrics file {}: {}".format(self.file, e))
+            if self._finished.wait(self.interval):
+                return
+
+    def render(self) -> str:
+        """
+        :return: The current metrics of the setup in the Prometheus text format.
+        """
+        metrics = _MetricsText()
+        setup = self.setup
+
+        timing = setup.measurement_timing
+        if timing is not None:
+            metrics.add(
+                "massflow_sample_rate_hertz",
+                "gauge",
+                "Effective rate of the measurements.",
+                1.0 / timing["period_mean"] if timing["period_mean"] else 0.0,
+            )
+            metrics.add(
+                "massflow_sample_period_jitter_seconds",
+                "gauge",
+                "Standard deviation of the time between two measurements.",
+                timing["period_jitter"],
+            )
+            for statistic in ("last", "mean", "max"):
+                metrics.add(
+                    "massflow_tick_lateness_seconds",
+                    "gauge",
+                    "Delay of the start of the measurements with respect to their deadlines.",
+                    timing["lateness_{}".format(statistic)],
+                    statistic=statistic,
+                )
+            for name in ("ticks", "overruns", "skipped"):
+                metrics.add(
+                    "massflow_{}_total".format(name),
+                    "counter",
+                    "Number of measurement ticks {}.".format(
+                        {
+                            "ticks": "performed",
+                            "overruns": "that overran the following deadline",
+                            "skipped": "skipped because of overruns",
+                        }[name]
+                    ),
+                    timing[name],
+                )
+            if "failed" in timing:
+                # Only counted by the asyncio acquisition engine
+                metrics.add(
+                    "massflow_failed_total",
+                    "counter",
+                    "Number of measurement ticks that failed.",
+                    timing["failed"],
+                )
+
+        profile = setup.profiler.summary()
+        for stage, device in (
+            ("eks", "EKS"),
+            ("sfc", "SFC"),
+            ("heater_write", "Heater"),
+            ("sfc_write", "SFC"),
+        ):
+            if stage not in profile:
+                continue
+            operation = "write" if stage.endswith("_write") else "read"
+            summary = profile[stage]
+            for quantile, statistic in (
+                ("0.5", "p50"),
+                ("0.95", "p95"),
+                ("0.99", "p99"),
+                ("1", "max"),
+            ):
+                metrics.add(
+                    "massflow_device_latency_seconds",
+                    "summary",
+                    "Round-trip latency of the device communication.",
+                    summary["{}_ms".format(statistic)] / 1e3,
+                    device=device,
+                    operation=operation,
+                    quantile=quantile,
+                )
+            for suffix, value in (
+                ("_sum", summary["mean_ms"] * summary["count"] / 1e3),
+                ("_count", summary["count"]),
+            ):
+                metrics.add(
+                    "massflow_device_latency_seconds",
+                    "summary",
+                    "Round-trip latency of the device communication.",
+                    value,
+                    suffix=suffix,
+                    device=device,
+                    operation=operation,
+                )
+
+        buffer = setup.measurement_buffer
+        metrics.add(
+            "massflow_buffer_measurements",
+            "gauge",
+            "Number of measurements held by the measurement buffer.",
+            len(buffer),
+        )
+        metrics.add(
+            "massflow_buffer_fill_ratio",
+            "gauge",
+            "Fill level of the measurement buffer.",
+            len(buffer) / buffer.capacity,
+        )
+
+        for trip, flag in (
+            ("high_temperature", setup.error_high_temperature),
+            ("low_flow", setup.error_low_flow),
+        ):
+            metrics.add(
+                "massflow_safety_trips_total",
+                "counter",
+                "Number of times the heater was switched off by a safety check.",
+                setup.safety_trips[trip],
+                reason=trip,
+            )
+            metrics.add(
+                "massflow_safety_error",
+                "gauge",
+                "Whether a safety error is currently flagged.",
+                int(flag),
+                reason=trip,
+            )
+
+        for actuator, actuator_metrics in setup.actuator_metrics.items():
+            for name in ("submitted", "written", "coalesced", "deduplicated"):
+                metrics.add(
+                    "massflow_actuator_commands_total",
+                    "counter",
+                    "Number of actuator commands by outcome.",
+                    actuator_metrics[name],
+                    actuator=actuator,
+                    outcome=name,
+                )
+            metrics.add(
+                "massflow_actuator_queue_depth",
+                "gauge",
+                "Number of actuator commands waiting or being written.",
+                actuator_metrics["queue_depth"],
+                actuator=actuator,
+            )
+            metrics.add(
+                "massflow_actuator_latency_max_seconds",
+                "gauge",
+                "Maximum time from submitting an actuator command until it was written.",
+                actuator_metrics["latency_max"],
+                actuator=actuator,
+            )
+
+        metrics.add(
+            "massflow_simulation_mode",
+            "gauge",
+            "Whether the setup is running in simulation mode.",
+            int(setup.simulation_mode),
+        )
+        return metrics.render()
+
+
+class _MetricsText(object):
+    """
+    Collects metric samples and renders them in the Prometheus text format, grouping all samples of one metric below
+    a single HELP and TYPE line. The samples of a summary carry the quantile as label, its sum and count are added
+    with the suffixes "_sum" and "_count".
+    """
+
+    def __init__(self) -> None:
+        self._metrics = dict()
+
+    def add(
+        self, name: str, kind: str, help_text: str, value, suffix="", **labels
+    ) -> None:
+        if name not in self._metrics:
+            self._metrics[name] = (kind, help_text, [])
+        self._metrics[name][2].append((suffix, labels, value))
+
+    def render(self) -> str:
+        lines = []
+        for name, (kind, help_text, samples) in self._metrics.items():
+            lines.append("# HELP {} {}".format(name, help_text))
+            lines.append("# TYPE {} {}".format(name, kind))
+            for suffix, labels, value in samples:
+                if labels:
+                    label_text = ",".join(
+                        '{}="{}"'.format(key, label) for key, label in labels.items()
+                    )
+                    lines.append(
+                        "{}{}{{{}}} {}".format(name, suffix, label_text, float(value))
+                    )
+                else:
+                    lines.append("{}{} {}".format(name, suffix, float(value)))
+        return "\n".join(lines) + "\n"
+
+
+class _MetricsRequestHandler(BaseHTTPRequestHandler):
+    """
+    Serves the metrics rendered by the MetricsExporter attached to the server on /metrics.
+    """
+
+    def do_GET(self) -> None:
+        if self.path.split("?")[0] not in ("/", "/metrics"):
+            self.send_error(404)
+            return
+        body = self.server.exporter.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", PROMETHEUS_CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args) -> None:
+        # Scrapes are frequent, keep them out of the log
+        pass
@@ -0,0 +1,232 @@
+from collections import deque
+from typing import Callable
+import logging
+import numpy as np
+
+logger = logging.getLogger("root")
+
+
+class RunningStatistics(object):
+    """
+    The RunningStatistics maintain aggregates over the measurements currently held by a MeasurementBuffer, i.e. over a
+    sliding window of at most `capacity` measurements. Whenever a measurement enters the window, and the oldest one
+    possibly leaves it, count, sum and sum of squares of every signal are updated incrementally, while minimum and
+    maximum are tracked by monotonic deques. Reading any aggregate therefore costs constant time, independent of the
+    window length.
+
+    Besides the recorded signals, derived quantities can be registered as expressions of the signals, e.g. the squared
+    control error. Their values are computed once per measurement and aggregated like the recorded signals.
+
+    .. note::
+       Adding and removing values from the running sums accumulates rounding errors over time. Therefore the sums are
+       recomputed from the window once per `capacity` measurements, which keeps the amortized cost per measurement
+       constant. The sums are taken over the deviations from the window mean at the last recomputation, such that the
+       variance of signals with a large offset does not suffer from cancellation.
+
+    :type schema: MeasurementSchema
+    :param schema: Schema of the recorded signals.
+    :type capacity: int
+    :param capacity: Maximum number of measurements in the window.
+    """
+
+    def __init__(self, schema, capacity: int) -> None:
+        self._capacity = capacity
+        self._n_signals = len(schema)
+        self._names = list(schema.signals)
+        self._channels = dict(schema.columns)
+        self._expressions = []
+        # Values of the derived quantities, indexed by sequence number modulo capacity
+        self._derived = np.zeros((0, capacity), dtype=np.float64)
+        self._count = 0
+        self._sums = np.zeros(self._n_signals, dtype=np.float64)
+        self._squares = np.zeros(self._n_signals, dtype=np.float64)
+        # Offset subtracted from all values before summing them
+        self._shift = np.zeros(self._n_signals, dtype=np.float64)
+        # Monotonic deques of (sequence number, value) tuples, one per channel
+        self._minima = [deque() for _ in self._names]
+        self._maxima = [deque() for _ in self._names]
+
+    def register(self, name: str, expression: Callable, window=None, first=0) -> None:
+        """
+        Registers a derived quantity which is aggregated like a recorded signal.
+
+        :type name: str
+        :param name: Name of the derived quantity, must differ from all signal names.
+        :type expression: Callable
+        :param expression: Function receiving a mapping from signal names to values and returning the derived value.
+           It is called with scalars for every new measurement and with arrays for the measurements already in the
+           window, therefore it should consist of elementwise operations only.
+        :type window: np.ndarray
+        :param window: Measurements currently in the window, one row per signal ordered from oldest to newest.
+        :type first: int
+        :param first: Sequence number of the oldest measurement in the window.
+        """
+        if name in self._channels:
+            raise RuntimeError("Statistic {} is already defined!".format(name))
+        self._channels[name] = len(self._names)
+        self._names.append(name)
+        self._expressions.append(expression)
+        self._derived = np.vstack(
+            (self._derived, np.zeros((1, self._capacity), dtype=np.float64))
+        )
+        self._sums = np.append(self._sums, 0.0)
+        self._squares = np.append(self._squares, 0.0)
+        self._shift = np.append(self._shift, 0.0)
+        self._minima.append(deque())
+        self._maxima.append(deque())
+        if window is not None and window.shape[1]:
+            values = np.broadcast_to(
+                expression(_SignalView(self._channels, window)), window.shape[1:]
+            )
+            sequences = np.arange(first, first + window.shape[1])
+            self._derived[-1, sequences % self._capacity] = values
+            for sequence, value in zip(sequences.tolist(), values.tolist()):
+                self._push(len(self._names) - 1, sequence, value)
+        self.rebase(window=window, first=first)
+
+    def update(self, sequence: int, row: np.ndarray, leaving=None) -> None:
+        """
+        Adds a measurement to the window.
+
+        :type sequence: int
+        :param sequence: Sequence number of the new measurement.
+        :type row: np.ndarray
+        :param row: Values of all signals of the new measurement.
+        :type leaving: np.ndarray
+        :param leaving: Values of all signals of the measurement leaving the window, if any. It is consumed before
+           this method returns, such that the overwritten buffer column can be passed directly.
+        """
+        position = sequence % self._capacity
+        if self._expressions:
+            view = _SignalView(self._channels, row)
+            derived = [float(expression(view)) for expression in self._expressions]
+            if leaving is not None:
+                leaving = np.concatenate((leaving, self._derived[:, position]))
+            self._derived[:, position] = derived
+            values = np.concatenate((row, derived))
+        else:
+            values = np.asarray(row, dtype=np.float64)
+        if leaving is not None:
+            leaving = leaving - self._shift
+            self._sums -= leaving
+            self._squares -= leaving ** 2
+            self._count -= 1
+        deviations = values - self._shift
+        self._sums += deviations
+        self._squares += deviations ** 2
+        self._count += 1
+        for channel, value in enumerate(values.tolist()):
+            self._push(channel, sequence, value)
+
+    def rebase(self, window, first: int) -> None:
+        """
+        Recomputes the running sums from the measurements in the window, removing accumulated rounding errors.
+
+        :type window: np.ndarray
+        :param window: Measurements currently in the window, one row per signal ordered from oldest to newest.
+        :type first: int
+        :param first: Sequence number of the oldest measurement in the window.
+        """
+        if window is None or window.shape[1] == 0:
+            self._sums.fill(0.0)
+            self._squares.fill(0.0)
+            self._count = 0
+            return
+        positions = np.arange(first, first + window.shape[1]) % self._capacity
+        values = np.concatenate((window, self._derived[:, positions]))
+        self._shift = values.mean(axis=1)
+        deviations = values - self._shift[:, np.newaxis]
+        self._sums = deviations.sum(axis=1)
+        self._squares = (deviations ** 2).sum(axis=1)
+        self._count = window.shape[1]
+
+    def clear(self) -> None:
+        """
+        Empties the window.
+        """
+        self.rebase(window=None, first=0)
+        for minima, maxima in zip(self._minima, self._maxima):
+            minima.clear()
+            maxima.clear()
+
+    def summary(self, name: str) -> dict:
+        """
+        :type name: str
+        :param name: Name of a signal or registered derived quantity.
+        :return: A dictionary with count, sum, mean, standard deviation, minimum and maximum over the window. If the
+           window is empty, count and sum are zero and all others are NaN.
+
+        :raises KeyError: If the name is neither a signal nor a registered quantity a KeyError is raised.
+        """
+        if name not in self._channels:
+            logger.error("Statistic {} is not available!".format(name))
+            raise KeyError("Statistic {} is not available!".format(name))
+        channel = self._channels[name]
+        count = self._count
+        if count == 0:
+            return {
+                "count": 0,
+                "sum": 0.0,
+                "mean": np.nan,
+                "std": np.nan,
+                "minimum": np.nan,
+                "maximum": np.nan,
+            }
+        deviation = float(self._sums[channel]) / count
+        mean = float(self._shift[channel]) + deviation
+        variance = max(float(self._squares[channel]) / count - deviation ** 2, 0.0)
+        return {
+            "count": count,
+            "sum": mean * count,
+            "mean": mean,
+            "std": variance ** 0.5,
+            "minimum": self._front(self._minima[channel]),
+            "maximum": self._front(self._maxima[channel]),
+        }
+
+    def _push(self, channel: int, sequence: int, value: float) -> None:
+        """
+        Adds a value to the monotonic deques of a channel and drops values which have left the window.
+        """
+        minima = self._minima[channel]
+        while minima and minima[-1][1] >= value:
+            minima.pop()
+        minima.append((sequence, value))
+        maxima = self._maxima[channel]
+        while maxima and maxima[-1][1] <= value:
+            maxima.pop()
+        maxima.append((sequence, value))
+        oldest = sequence - self._capacity
+        while minima[0][0] <= oldest:
+            minima.popleft()
+        while maxima[0][0] <= oldest:
+            maxima.popleft()
+
+    @staticmethod
+    def _front(extrema: deque) -> float:
+        try:
+            return extrema[0][1]
+        except IndexError:
+            return np.nan
+
+    @property
+    def names(self) -> list:
+        """
+        Names of all signals and registered derived quantities.
+        """
+        return list(self._names)
+
+
+class _SignalView(object):
+    """
+    Maps signal names to the rows of a single measurement or of an array of measurements.
+    """
+
+    __slots__ = ("_channels", "_values")
+
+    def __init__(self, channels: dict, values: np.ndarray) -> None:
+        self._channels = channels
+        self._values = values
+
+    def __getitem__(self, signal: str):
+        return self._values[self._channels[signal]]
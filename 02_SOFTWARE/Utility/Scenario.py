@@ -0,0 +1,156 @@
+from Utility.Schedule import Schedule
+import logging
+
+logger = logging.getLogger("root")
+
+
+class Scenario(object):
+    """
+    A Scenario drives a setup by schedules of its setpoint, flow and/or pwm for a given duration. It is independent of
+    the clock, the caller passes the time since the start of the scenario to :meth:`apply`, such that the same scenario
+    runs in real time on the setup or faster than real time in a simulation.
+
+    .. note::
+
+       Example of usage:
+
+          .. code-block:: python
+
+             scenario = Scenario.disturbance_rejection(config=config, setpoint=5)
+             scenario.start(setup)
+             scenario.apply(setup, t=10.0)
+
+    :type schedules: dict
+    :param schedules: Schedules of the "setpoint", "flow" and/or "pwm", see :class:`Utility.Schedule.Schedule`.
+    :type duration: float
+    :param duration: Duration of the scenario in seconds, None if the scenario does not end by itself.
+    """
+
+    def __init__(self, schedules: dict, duration=None) -> None:
+        unknown = set(schedules) - {"setpoint", "flow", "pwm"}
+        if unknown:
+            raise KeyError("Unknown schedules: {}".format(", ".join(sorted(unknown))))
+        if "setpoint" in schedules and "pwm" in schedules:
+            raise ValueError("Either the setpoint or the pwm can be scheduled, not both.")
+        self.schedules = schedules
+        self.duration = duration
+        self._applied = dict()
+        self._enabled = False
+        self._pending = False
+        self._retry_interval = None
+
+    @classmethod
+    def disturbance_rejection(cls, config, setpoint=None) -> "Scenario":
+        """
+        Creates the scenario of the disturbance rejection competition: after half the configured delay the flow
+        is raised by the configured deviation for the configured duration, then lowered by the same deviation, and
+        finally returned to the nominal flow.
+
+        :type config: ConfigurationHandler
+        :param config: Configuration with the "disturbance_rejection" section.
+        :type setpoint: float
+        :param setpoint: Optional temperature difference setpoint held during the scenario. The competition itself
+           keeps the setpoint chosen by the player.
+        """
+        # divide by 100 to convert from slm to normalized units
+        nominal = config["general"]["nominal_mass_flow_rate"] / 100
+        deviation = config["disturbance_rejection"]["deviation"] / 100
+        delay = config["disturbance_rejection"]["delay"]
+        duration = config["disturbance_rejection"]["duration"]
+        schedules = {
+            "flow": Schedule(
+                steps=[
+                    (0, nominal),
+                    (delay / 2, nominal + deviation),
+                    (delay + duration, nominal),
+                    (2 * delay + duration, nominal - deviation),
+                    # The low disturbance ends after four delays, but never before it started
+                    (max(4 * delay, 2 * delay + duration), nominal),
+                ]
+            )
+        }
+        if setpoint is not None:
+            schedules["setpoint"] = Schedule(steps=[(0, setpoint)])
+        return cls(schedules=schedules, duration=3 * delay + 2 * duration)
+
+    def start(self, setup) -> None:
+        """
+        Selects the mode of the setup required by the schedules.
+
+        :type setup: Setup
+        :param setup: Opened setup.
+        """
+        if "setpoint" in self.schedules:
+            setup.start_pid_controller()
+        elif "pwm" in self.schedules:
+            setup.start_direct_power_setting()
+        self._applied = dict()
+        self._enabled = False
+        self._pending = False
+        self._retry_interval = setup.config["general"]["t_sampling"]
+
+    def apply(self, setup, t: float) -> None:
+        """
+        Applies the values of all schedules due at the given time which have not been applied yet. The heater output
+        is enabled once the first setpoint or pwm value is due.
+
+        The safety checks of the setup refuse to heat before the first measurement and while the flow is too low, e.g.
+        right after the flow has been switched on. Flow and pwm values which have not taken effect are therefore
+        applied again on every call, until the setup reports them as current.
+
+        :type setup: Setup
+        :param setup: Setup the scenario was started on.
+        :type t: float
+        :param t: Time in seconds since the start of the scenario.
+        """
+        actions = {
+            "setpoint": setup.set_setpoint,
+            "flow": setup.set_flow,
+            "pwm": setup.set_pwm,
+        }
+        for name, schedule in self.schedules.items():
+            value = schedule.value(t)
+            if value is not None and value != self._applied.get(name):
+                logger.info("t={:.1f} s: setting {} to {}".format(t, name, value))
+                actions[name](value)
+                self._applied[name] = value
+        if not self._enabled and ("setpoint" in self._applied or "pwm" in self._applied):
+            setup.enable_output(desired_pwm_output=self._applied.get("pwm", 0))
+            self._enabled = True
+
+        current = {
+            "flow": setup.get_current_flow_value,
+            "pwm": setup.get_current_pwm_value,
+        }
+        self._pending = False
+        for name, getter in current.items():
+            value = self._applied.get(name)
+            if value is not None and getter() != value:
+                actions[name](value)
+                self._pending = self._pending or getter() != value
+
+    def next_change(self, t: float):
+        """
+        :type t: float
+        :param t: Time in seconds since the start of the scenario.
+        :return: Time of the next scheduled change, of the next attempt to apply a value which has not taken effect or
+           of the end of the scenario, None if none of them follows.
+        """
+        changes = [
+            change
+            for change in (
+                schedule.next_change(t) for schedule in self.schedules.values()
+            )
+            if change is not None
+        ]
+        if self.duration is not None:
+            changes.append(self.duration)
+        if self._pending:
+            changes.append(t + self._retry_interval)
+        return min(changes, default=None)
+
+    def finished(self, t: float) -> bool:
+        """
+        :return: True if the scenario has ended at the given time.
+        """
+        return self.duration is not None and t >= self.duration
@@ -0,0 +1,89 @@
+import bisect
+import json
+
+
+class Schedule(object):
+    """
+    A Schedule is a piecewise constant signal defined by a sequence of steps, each holding a value from its start time
+    until the start time of the next step. It is used to drive setpoints and actuators of unattended runs.
+
+    .. note::
+
+       Example of usage:
+
+          .. code-block:: python
+
+             setpoint = Schedule.parse("0:5, 600:10, 1200:5")
+             setpoint.value(700)  # 10.0
+
+    :type steps: list
+    :param steps: List of (time, value) tuples, with the time in seconds relative to the start of the run.
+    """
+
+    def __init__(self, steps: list) -> None:
+        steps = sorted((float(t), float(value)) for t, value in steps)
+        if not steps:
+            raise ValueError("A schedule needs at least one step!")
+        self._times = [t for t, _ in steps]
+        self._values = [value for _, value in steps]
+
+    @classmethod
+    def parse(cls, text: str) -> "Schedule":
+        """
+        Creates a schedule from a comma separated list of `time:value` pairs. A single value without time is held
+        during the whole run.
+
+        :type text: str
+        :param text: Description of the schedule, e.g. "0:5, 600:10".
+        """
+        steps = []
+        for step in text.split(","):
+            if ":" in step:
+                t, value = step.split(":")
+            else:
+                t, value = 0, step
+            steps.append((t, value))
+        return cls(steps=steps)
+
+    @classmethod
+    def load(cls, file_name: str) -> dict:
+        """
+        Loads several named schedules from a JSON file mapping names to lists of [time, value] pairs, e.g.
+        {"setpoint": [[0, 5], [600, 10]], "flow": [[0, 0.6]]}.
+
+        :type file_name: str
+        :param file_name: Path of the JSON file.
+        :return: A dictionary of the loaded schedules by name.
+        """
+        with open(file_name) as file:
+            content = json.load(file)
+        return {name: cls(steps=steps) for name, steps in content.items()}
+
+    def value(self, t: float):
+        """
+        :type t: float
+        :param t: Time in seconds relative to the start of the run.
+        :return: The value of the step active at the given time, None before the first step.
+        """
+        index = bisect.bisect_right(self._times, t) - 1
+        if index < 0:
+            return None
+        return self._values[index]
+
+    def next_change(self, t: float):
+        """
+        :type t: float
+        :param t: Time in seconds relative to the start of the run.
+        :return: Start time of the first step after the given time, None if no further step follows.
+        """
+        index = bisect.bisect_right(self._times, t)
+        if index == len(self._times):
+            return None
+        return self._times[index]
+
+    @property
+    def duration(self) -> float:
+        """
+        Start time of the last step.
+        """
+        return self._times[-1]
@@ -0,0 +1,400 @@
+import bisect
+import json
+import logging
+import os
+import time
+import numpy as np
+
+logger = logging.getLogger("root")
+
+SEGMENT_HEADER_BYTES = 4096
+SEGMENT_FORMAT = "MassflowMeasurementSegment"
+SEGMENT_FORMAT_VERSION = 1
+
+
+class SegmentStore(object):
+    """
+    The SegmentStore keeps measurements that have left a MeasurementBuffer addressable on disk. Measurements are
+    appended to fixed-size segment files, which are memory mapped such that appending costs a copy into the page cache
+    rather than a blocking write, and reading old measurements does not require loading whole files. Only the segment
+    being written stays mapped, sealed segments are mapped again for each read, such that long runs do not accumulate
+    open files.
+
+    Each segment file starts with a header of `SEGMENT_HEADER_BYTES` bytes holding a JSON description of the signal
+    schema, the sequence number of the first measurement, the number of stored measurements and the covered time range.
+    It is followed by the measurements as float64 array with one row per signal, like the MeasurementBuffer itself.
+    The header is memory mapped as well. It is updated every `header_interval` appends and when the segment is sealed,
+    such that the segment being written remains readable by :func:`load_segment` if the process ends without closing
+    the store.
+
+    :type folder: str
+    :param folder: Destination folder of the segment files, created if it does not exist.
+    :type signals: list
+    :param signals: List of signal names.
+    :type segment_length: int
+    :param segment_length: Number of measurements stored per segment file.
+    :type name: str
+    :param name: Name of the segment files. A time tag and the segment index will be appended for uniqueness.
+    :type header_interval: int
+    :param header_interval: Number of appends after which the header of the segment being written is updated.
+    """
+
+    def __init__(
+        self,
+        folder: str,
+        signals: list,
+        segment_length=65536,
+        name="Measurement",
+        header_interval=100,
+    ) -> None:
+        if not os.path.exists(folder):
+            os.makedirs(folder)
+        self._folder = folder
+        self._signals = list(signals)
+        self._segment_length = int(segment_length)
+        self._header_interval = max(int(header_interval), 1)
+        self._name = "{}_{}".format(name, time.strftime("%Y-%m-%d_%H-%M-%S"))
+        self._time_row = (
+            self._signals.index("Time") if "Time" in self._signals else None
+        )
+        self._segments = []
+        # Sequence number of the first measurement and time of the first measurement of every segment, for bisection
+        self._first_sequences = []
+        self._time_starts = []
+        logger.info(
+            "Spilling measurements to segment files in folder {}.".format(folder)
+        )
+
+    def append(self, sequence: int, columns: np.ndarray) -> None:
+        """
+        Appends measurements with consecutive sequence numbers to the store.
+
+        :type sequence: int
+        :param sequence: Sequence number of the first appended measurement. If it does not directly follow the last
+           stored measurement, a new segment is started.
+        :type columns: np.ndarray
+        :param columns: Measurements with one row per signal and one column per measurement.
+        """
+        offset = 0
+        while offset < columns.shape[1]:
+            segment = self._segments[-1] if self._segments else None
+            if (
+                segment is None
+                or segment.full
+                or segment.first_sequence + segment.length != sequence + offset
+            ):
+                if segment is not None:
+                    segment.seal()
+                segment = self._open_segment(first_sequence=sequence + offset)
+            offset += segment.append(columns[:, offset:])
+            if (
+                self._time_row is not None
+                and len(self._time_starts) < len(self._segments)
+                and segment.header["time_start"] is not None
+            ):
+                self._time_starts.append(segment.header["time_start"])
+
+    def read(self, start: int, stop: int, rows=None) -> np.ndarray:
+        """
+        Copies the stored measurements with sequence numbers in [start, stop).
+
+        :type start: int
+        :param start: Sequence number of the first measurement.
+        :type stop: int
+        :param stop: Sequence number following the last measurement.
+        :type rows: list
+        :param rows: Optional list of signal indices to read, all signals are read by default.
+        :return: Array with one row per signal. Measurements that are not available in the store are NaN.
+        """
+        if rows is None:
+            rows = list(range(len(self._signals)))
+        result = np.full((len(rows), max(stop - start, 0)), np.nan)
+        index = max(bisect.bisect_right(self._first_sequences, start) - 1, 0)
+        for segment in self._segments[index:]:
+            if segment.first_sequence >= stop:
+                break
+            first = max(start, segment.first_sequence)
+            last = min(stop, segment.first_sequence + segment.length)
+            if first < last:
+                result[:, first - start : last - start] = segment.read(
+                    rows=rows, start=first, stop=last
+                )
+        return result
+
+    def search(self, t: float, side="left") -> int:
+        """
+        Locates a time among the stored measurements by binary search, first over the segments and then over the `Time`
+        signal of a single segment, like `np.searchsorted`.
+
+        :type t: float
+        :param t: Time of interest.
+        :type side: str
+        :param side: If "left", the first measurement taken at or after `t` is located, if "right" the first
+           measurement taken after `t`.
+        :return: Sequence number of the located measurement, :attr:`head` if all stored measurements were taken before
+           `t`. None if the store is empty or no `Time` signal is stored.
+        """
+        if self._time_row is None or not self._time_starts:
+            return None
+        if side == "left":
+            index = bisect.bisect_left(self._time_starts, t)
+        else:
+            index = bisect.bisect_right(self._time_starts, t)
+        if index > 0:
+            segment = self._segments[index - 1]
+            times = segment.read(
+                rows=[self._time_row],
+                start=segment.first_sequence,
+                stop=segment.first_sequence + segment.length,
+            )[0]
+            position = int(np.searchsorted(times, t, side=side))
+            if position < len(times):
+                return segment.first_sequence + position
+        if index < len(self._time_starts):
+            return self._segments[index].first_sequence
+        return self.head
+
+    def seal(self) -> None:
+        """
+        Completes the current segment, the next appended measurement starts a new segment.
+        """
+        if self._segments and not self._segments[-1].sealed:
+            self._segments[-1].seal()
+
+    def close(self) -> None:
+        """
+        Seals the current segment and flushes all segment files.
+        """
+        self.seal()
+        logger.info(
+            "Closed segment store with {} segment files.".format(len(self._segments))
+        )
+
+    def _open_segment(self, first_sequence: int) -> "_Segment":
+        path = os.path.join(
+            self._folder, "{}_{:06d}.seg".format(self._name, len(self._segments))
+        )
+        segment = _Segment.create(
+            path=path,
+            signals=self._signals,
+            capacity=self._segment_length,
+            first_sequence=first_sequence,
+            time_row=self._time_row,
+            header_interval=self._header_interval,
+        )
+        self._segments.append(segment)
+        self._first_sequences.append(first_sequence)
+        return segment
+
+    @property
+    def first_sequence(self) -> int:
+        """
+        Sequence number of the oldest stored measurement, None if the store is empty.
+        """
+        if self._segments:
+            return self._segments[0].first_sequence
+        return None
+
+    @property
+    def head(self) -> int:
+        """
+        Sequence number following the newest stored measurement, None if the store is empty.
+        """
+        if self._segments:
+            return self._segments[-1].first_sequence + self._segments[-1].length
+        return None
+
+    @property
+    def segments(self) -> list:
+        """
+        :return: A list with the header of every segment file.
+        """
+        return [segment.header for segment in self._segments]
+
+
+class _Segment(object):
+    """
+    A single memory mapped segment file of the SegmentStore. The file is unmapped once the segment is sealed.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        header: dict,
+        data: np.memmap,
+        header_map: np.memmap,
+        time_row,
+        header_interval: int,
+    ) -> None:
+        self.path = path
+        self.header = header
+        self.data = data
+        self._header_map = header_map
+        self.sealed = header["sealed"]
+        self._time_row = time_row
+        self._header_interval = header_interval
+        # Appends since the header was last written
+        self._pending = 0
+
+    @classmethod
+    def create(
+        cls,
+        path: str,
+        signals: list,
+        capacity: int,
+        first_sequence: int,
+        time_row,
+        header_interval: int,
+    ) -> "_Segment":
+        header = {
+            "format": SEGMENT_FORMAT,
+            "version": SEGMENT_FORMAT_VERSION,
+            "signals": list(signals),
+            "dtype": "<f8",
+            "capacity": capacity,
+            "first_sequence": first_sequence,
+            "length": 0,
+            "time_start": None,
+            "time_end": None,
+            "sealed": False,
+        }
+        data = np.memmap(
+            path,
+            dtype="<f8",
+            mode="w+",
+            offset=SEGMENT_HEADER_BYTES,
+            shape=(len(signals), capacity),
+        )
+        header_map = np.memmap(
+            path, dtype=np.uint8, mode="r+", shape=(SEGMENT_HEADER_BYTES,)
+        )
+        segment = cls(
+            path=path,
+            header=header,
+            data=data,
+            header_map=header_map,
+            time_row=time_row,
+            header_interval=header_interval,
+        )
+        segment.write_header()
+        return segment
+
+    def append(self, columns: np.ndarray) -> int:
+        """
+        Appends as many measurements as fit into the segment.
+
+        :return: Number of appended measurements.
+        """
+        count = min(columns.shape[1], self.capacity - self.length)
+        self.data[:, self.length : self.length + count] = columns[:, :count]
+        if self._time_row is not None and count:
+            if self.header["time_start"] is None:
+                self.header["time_start"] = float(columns[self._time_row, 0])
+            self.header["time_end"] = float(columns[self._time_row, count - 1])
+        self.header["length"] += count
+        self._pending += 1
+        if self._pending >= self._header_interval:
+            # The measurements are in place before the header accounts for them
+            self.write_header()
+        return count
+
+    def read(self, rows: list, start: int, stop: int) -> np.ndarray:
+        """
+        Copies the measurements with sequence numbers in [start, stop), which have to be stored in this segment.
+        """
+        first = start - self.first_sequence
+        last = stop - self.first_sequence
+        if self.data is not None:
+            return self.data[rows, first:last]
+        data = np.memmap(
+            self.path,
+            dtype=self.header["dtype"],
+            mode="r",
+            offset=SEGMENT_HEADER_BYTES,
+            shape=(len(self.header["signals"]), self.capacity),
+        )
+        try:
+            return np.array(data[rows, first:last])
+        finally:
+            del data
+
+    def seal(self) -> None:
+        self.header["sealed"] = True
+        self.sealed = True
+        self.data.flush()
+        self.write_header()
+        self._header_map.flush()
+        # Release the mappings, reads map the file again
+        self.data = None
+        self._header_map = None
+
+    def write_header(self) -> None:
+        encoded = json.dumps(self.header).encode("utf-8")
+        if len(encoded) > SEGMENT_HEADER_BYTES:
+            raise RuntimeError(
+                "Segment header of {} exceeds {} bytes.".format(
+                    self.path, SEGMENT_HEADER_BYTES
+                )
+            )
+        self._header_map[:] = np.frombuffer(
+            encoded.ljust(SEGMENT_HEADER_BYTES, b" "), dtype=np.uint8
+        )
+        self._pending = 0
+
+    @property
+    def first_sequence(self) -> int:
+        return self.header["first_sequence"]
+
+    @property
+    def length(self) -> int:
+        return self.header["length"]
+
+    @property
+    def capacity(self) -> int:
+        return self.header["capacity"]
+
+    @property
+    def full(self) -> bool:
+        return self.sealed or self.length >= self.capacity
+
+
+def load_segment(path: str) -> tuple:
+    """
+    Opens a segment file written by a SegmentStore, e.g. to analyse a long recording offline. Segments which were not
+    sealed, e.g. because the process writing them crashed, are opened as well. Their length and time range are extended
+    to the last measurement with a time stamp, since the header of the segment being written is only updated
+    periodically.
+
+    :type path: str
+    :param path: Path to the segment file.
+    :return: The header of the segment and a dictionary containing a read-only memory mapped array for each signal.
+    """
+    with open(path, "rb") as file:
+        header = json.loads(file.read(SEGMENT_HEADER_BYTES).decode("utf-8"))
+    if header.get("format") != SEGMENT_FORMAT:
+        raise RuntimeError("{} is not a measurement segment file.".format(path))
+    data = np.memmap(
+        path,
+        dtype=header["dtype"],
+        mode="r",
+        offset=SEGMENT_HEADER_BYTES,
+        shape=(len(header["signals"]), header["capacity"]),
+    )
+    if not header["sealed"] and "Time" in header["signals"]:
+        times = data[header["signals"].index("Time")]
+        stamped = np.flatnonzero(times[header["length"] :])
+        if len(stamped):
+            length = header["length"] + int(stamped[-1]) + 1
+            header = dict(
+                header,
+                length=length,
+                time_start=float(times[0]),
+                time_end=float(times[length - 1]),
+            )
+    return (
+        header,
+        {
+            signal: data[index, : header["length"]]
+            for index, signal in enumerate(header["signals"])
+        },
+    )
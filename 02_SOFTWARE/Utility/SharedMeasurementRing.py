@@ -0,0 +1,196 @@
+from multiprocessing import shared_memory
+import logging
+import time
+import numpy as np
+
+logger = logging.getLogger("root")
+
+# Layout of the header: ring version, head, version of the latest state, unused
+HEADER_LENGTH = 4
+# Seconds a reader waits for a write in progress, before considering the writer dead
+WRITE_TIMEOUT = 1.0
+
+
+class SharedMeasurementRing(object):
+    """
+    The SharedMeasurementRing hands measurements from an acquisition process to other processes via a block of shared
+    memory, such that readers neither share the interpreter of the acquisition process nor ever block it.
+
+    The block holds a ring buffer with one row per signal, in the order of the MeasurementBuffer schema, and a single
+    slot with the latest state and status values of the setup. Like the MeasurementBuffer, both are guarded by
+    seqlocks: a single writer increments a version counter before and after every write, readers copy the data and
+    retry if the version changed in the meantime. Readers give up if a write does not complete within `WRITE_TIMEOUT`
+    seconds, e.g. because the writing process was killed in the middle of it.
+
+    The ring is created by one process and attached by name from others, see :meth:`attach`. The creating process is
+    responsible for calling :meth:`unlink` after all processes have closed the ring.
+
+    :type signals: list
+    :param signals: Names of the signals of a measurement.
+    :type capacity: int
+    :param capacity: Number of measurements held by the ring.
+    :type status: list
+    :param status: Names of the status values published alongside the latest state.
+    :type name: str
+    :param name: Name of an existing block of shared memory to attach to. A new block is created if None.
+    """
+
+    def __init__(self, signals: list, capacity: int, status=(), name=None) -> None:
+        self.signals = list(signals)
+        self.status_names = list(status)
+        self.capacity = capacity
+        n_signals = len(self.signals)
+        size = 8 * (
+            HEADER_LENGTH + n_signals * capacity + n_signals + len(self.status_names)
+        )
+        if name is None:
+            self._memory = shared_memory.SharedMemory(create=True, size=size)
+        else:
+            self._memory = shared_memory.SharedMemory(name=name)
+        buffer = self._memory.buf
+        self._header = np.ndarray((HEADER_LENGTH,), dtype=np.int64, buffer=buffer)
+        offset = 8 * HEADER_LENGTH
+        self._array = np.ndarray(
+            (n_signals, capacity), dtype=np.float64, buffer=buffer, offset=offset
+        )
+        offset += 8 * n_signals * capacity
+        self._latest = np.ndarray(
+            (n_signals + len(self.status_names),),
+            dtype=np.float64,
+            buffer=buffer,
+            offset=offset,
+        )
+        if name is None:
+            self._header[:] = 0
+
+    @classmethod
+    def attach(
+        cls, name: str, signals: list, capacity: int, status=()
+    ) -> "SharedMeasurementRing":
+        """
+        Attaches to a ring created by another process, the signals, capacity and status names have to match.
+
+        :type name: str
+        :param name: Name of the ring, see :attr:`name`.
+        """
+        return cls(signals=signals, capacity=capacity, status=status, name=name)
+
+    @property
+    def name(self) -> str:
+        """
+        Name of the block of shared memory, used to attach to the ring from other processes.
+        """
+        return self._memory.name
+
+    @property
+    def sequence(self) -> int:
+        """
+        Sequence number the next measurement will be stamped with.
+        """
+        return int(self._header[1])
+
+    def append(self, row: np.ndarray) -> None:
+        """
+        Appends a measurement to the ring, overwriting the oldest one if the ring is full. Only a single process may
+        write to the ring.
+
+        :type row: np.ndarray
+        :param row: Values of all signals, in the order of :attr:`signals`.
+        """
+        head = self._header[1]
+        self._header[0] += 1
+        self._array[:, head % self.capacity] = row
+        self._header[1] = head + 1
+        self._header[0] += 1
+
+    def read_since(self, sequence, timeout=WRITE_TIMEOUT) -> tuple:
+        """
+        Copies the measurements appended since the given sequence number.
+
+        :type sequence: int
+        :param sequence: Sequence number of the first measurement of interest. If None, all measurements held by the
+           ring are copied.
+        :type timeout: float
+        :param timeout: Seconds to wait for a write in progress.
+        :return: The sequence number of the first copied measurement, which is larger than the requested one if
+           measurements have been overwritten in the meantime, and the copied measurements with one row per signal,
+           ordered from oldest to newest.
+
+        :raises TimeoutError: If no consistent copy could be taken within `timeout` seconds a TimeoutError is raised.
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            version = self._header[0]
+            if version % 2 == 0:
+                head = int(self._header[1])
+                first = max(head - self.capacity, 0)
+                if sequence is not None:
+                    first = max(first, min(sequence, head))
+                positions = np.arange(first, head) % self.capacity
+                array = self._array[:, positions]
+                if self._header[0] == version:
+                    return first, array
+            # A write is in progress, let the acquisition process finish it
+            self._wait(deadline)
+
+    def publish(self, state: np.ndarray, status: list) -> None:
+        """
+        Publishes the latest state and status of the setup.
+
+        :type state: np.ndarray
+        :param state: Values of all signals, in the order of :attr:`signals`.
+        :type status: list
+        :param status: Status values, in the order of :attr:`status_names`.
+        """
+        n_signals = len(self.signals)
+        self._header[2] += 1
+        self._latest[:n_signals] = state
+        self._latest[n_signals:] = status
+        self._header[2] += 1
+
+    def latest(self, timeout=WRITE_TIMEOUT) -> tuple:
+        """
+        :type timeout: float
+        :param timeout: Seconds to wait for a write in progress.
+        :return: A copy of the latest state and a dictionary of the latest status values, or None if nothing has been
+           published yet.
+
+        :raises TimeoutError: If no consistent copy could be taken within `timeout` seconds a TimeoutError is raised.
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            version = self._header[2]
+            if version == 0:
+                return None
+            if version % 2 == 0:
+                latest = self._latest.copy()
+                if self._header[2] == version:
+                    break
+            self._wait(deadline)
+        n_signals = len(self.signals)
+        return (
+            latest[:n_signals],
+            dict(zip(self.status_names, latest[n_signals:].tolist())),
+        )
+
+    @staticmethod
+    def _wait(deadline: float) -> None:
+        if time.monotonic() > deadline:
+            raise TimeoutError("Write to the shared measurement ring did not complete!")
+        time.sleep(0)
+
+    def close(self) -> None:
+        """
+        Detaches this process from the ring.
+        """
+        # Release the views before closing, the memory cannot be closed while exported
+        self._header = None
+        self._array = None
+        self._latest = None
+        self._memory.close()
+
+    def unlink(self) -> None:
+        """
+        Frees the shared memory, to be called once by the creating process.
+        """
+        self._memory.unlink()
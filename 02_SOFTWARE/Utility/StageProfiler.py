@@ -0,0 +1,223 @@
+import json
+import logging
+import math
+import os
+import threading
+import time
+
+logger = logging.getLogger("root")
+
+# Histogram buckets are spaced logarithmically, BUCKETS_PER_OCTAVE buckets per doubling of the latency
+BUCKETS_PER_OCTAVE = 4
+SMALLEST_BUCKET_NS = 1000
+NUMBER_OF_BUCKETS = 96
+
+
+class LatencyHistogram(object):
+    """
+    The LatencyHistogram counts latencies in a fixed set of logarithmically spaced buckets, reaching from 1 µs to about
+    16 s. Recording a latency costs a constant, small amount of time and memory, independent of the number of recorded
+    latencies. Percentiles are reported as the upper bound of the bucket they fall into, i.e. with a relative error of
+    at most 19 %, while the maximum is exact.
+    """
+
+    def __init__(self) -> None:
+        self.counts = [0] * NUMBER_OF_BUCKETS
+        self.count = 0
+        self.total_ns = 0
+        self.max_ns = 0
+
+    def record(self, latency_ns: int) -> None:
+        """
+        :type latency_ns: int
+        :param latency_ns: Latency in nanoseconds.
+        """
+        if latency_ns <= SMALLEST_BUCKET_NS:
+            index = 0
+        else:
+            index = min(
+                int(BUCKETS_PER_OCTAVE * math.log2(latency_ns / SMALLEST_BUCKET_NS)),
+                NUMBER_OF_BUCKETS - 1,
+            )
+        self.counts[index] += 1
+        self.count += 1
+        self.total_ns += latency_ns
+        if latency_ns > self.max_ns:
+            self.max_ns = latency_ns
+
+    def percentile(self, percent: float) -> float:
+        """
+        :type percent: float
+        :param percent: Percentile between 0 and 100.
+        :return: Upper bound of the bucket containing the given percentile in nanoseconds, 0 if nothing was recorded.
+        """
+        if self.count == 0:
+            return 0.0
+        rank = percent / 100.0 * self.count
+        cumulated = 0
+        for index, count in enumerate(self.counts):
+            cumulated += count
+            if cumulated >= rank and count:
+                # Never report more than the largest recorded latency
+                return min(self.bucket_upper_bound(index), float(self.max_ns))
+        return float(self.max_ns)
+
+    @staticmethod
+    def bucket_upper_bound(index: int) -> float:
+        return SMALLEST_BUCKET_NS * 2 ** ((index + 1) / BUCKETS_PER_OCTAVE)
+
+    def summary(self) -> dict:
+        """
+        :return: A dictionary with the number of recorded latencies and their mean, p50, p95, p99 and maximum in
+           milliseconds.
+        """
+        return {
+            "count": self.count,
+            "mean_ms": self.total_ns / self.count / 1e6 if self.count else 0.0,
+            "p50_ms": self.percentile(50) / 1e6,
+            "p95_ms": self.percentile(95) / 1e6,
+            "p99_ms": self.percentile(99) / 1e6,
+            "max_ms": self.max_ns / 1e6,
+        }
+
+
+class StageProfiler(object):
+    """
+    The StageProfiler measures the duration of named stages of the acquisition loop, e.g. reading a single device,
+    updating the controller or appending to the measurement buffer, and collects them in one
+    :class:`LatencyHistogram` per stage.
+
+    Stages are measured using the `stage` context manager. While the profiler is disabled, it returns a shared context
+    manager which does nothing, such that instrumented code costs a single attribute check. Stages may be recorded and
+    summarized from different threads, e.g. the measurement thread, the dispatchers and the metrics exporter.
+
+    .. note::
+
+       Example of usage:
+
+          .. code-block:: python
+
+             profiler = StageProfiler(enabled=True)
+             with profiler.stage("pid"):
+                 output = controller(input_)
+             print(profiler.summary()["pid"]["p99_ms"])
+
+    :type enabled: bool
+    :param enabled: If False, no stages are measured until the profiler is enabled.
+    """
+
+    def __init__(self, enabled=False) -> None:
+        self.enabled = enabled
+        self._histograms = dict()
+        self._lock = threading.Lock()
+
+    def stage(self, name: str):
+        """
+        :type name: str
+        :param name: Name of the stage.
+        :return: A context manager measuring the duration of the enclosed code.
+        """
+        if not self.enabled:
+            return _DISABLED_STAGE
+        return _Stage(profiler=self, name=name)
+
+    def record(self, name: str, latency_ns: int) -> None:
+        """
+        Records the duration of a stage measured elsewhere.
+
+        :type name: str
+        :param name: Name of the stage.
+        :type latency_ns: int
+        :param latency_ns: Duration in nanoseconds.
+        """
+        with self._lock:
+            histogram = self._histograms.get(name)
+            if histogram is None:
+                histogram = self._histograms[name] = LatencyHistogram()
+            histogram.record(latency_ns)
+
+    def reset(self) -> None:
+        """
+        Forgets all recorded durations.
+        """
+        with self._lock:
+            self._histograms = dict()
+
+    def summary(self) -> dict:
+        """
+        :return: A dictionary holding the summary of the histogram of every stage, see
+           :meth:`LatencyHistogram.summary`.
+        """
+        with self._lock:
+            return {
+                name: histogram.summary()
+                for name, histogram in sorted(self._histograms.items())
+            }
+
+    def dump(self, folder: str, name="Profile") -> str:
+        """
+        Writes the summaries and bucket counts of all stages to a JSON file.
+
+        :type folder: str
+        :param folder: Destination folder.
+        :type name: str
+        :param name: Name of the file. A time tag will be appended for uniqueness.
+        :return: Path of the written file.
+        """
+        if not os.path.exists(folder):
+            os.makedirs(folder)
+        file_name = os.path.join(
+            folder, "{}_{}.json".format(name, time.strftime("%Y-%m-%d_%H-%M-%S"))
+        )
+        with self._lock:
+            stages = {
+                stage: dict(histogram.summary(), counts=list(histogram.counts))
+                for stage, histogram in sorted(self._histograms.items())
+            }
+        content = {
+            "bucket_upper_bounds_ns": [
+                LatencyHistogram.bucket_upper_bound(index)
+                for index in range(NUMBER_OF_BUCKETS)
+            ],
+            "stages": stages,
+        }
+        with open(file_name, "w") as file:
+            file.write(json.dumps(content, indent=2))
+        logger.info("Saved stage profile to {}.".format(file_name))
+        return file_name
+
+
+class _Stage(object):
+    """
+    Context manager measuring the duration of a single stage.
+    """
+
+    __slots__ = ("_profiler", "_name", "_start")
+
+    def __init__(self, profiler: StageProfiler, name: str) -> None:
+        self._profiler = profiler
+        self._name = name
+        self._start = 0
+
+    def __enter__(self) -> None:
+        self._start = time.perf_counter_ns()
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self._profiler.record(self._name, time.perf_counter_ns() - self._start)
+
+
+class _DisabledStage(object):
+    """
+    Context manager doing nothing, used while the profiler is disabled.
+    """
+
+    __slots__ = ()
+
+    def __enter__(self) -> None:
+        pass
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        pass
+
+
+_DISABLED_STAGE = _DisabledStage()
@@ -0,0 +1,324 @@
+from Drivers.DeviceIdentifier import DeviceIdentifier
+from copy import deepcopy
+from threading import Thread
+import logging
+import multiprocessing
+import os
+import queue
+import time
+
+logger = logging.getLogger("root")
+
+
+class RigSupervisor(object):
+    """
+    The RigSupervisor runs several rigs side by side, each rig in its own worker process with its own Setup, such
+    that the rigs use separate interpreters and cores and a crashing rig does not affect the others.
+
+    The rigs are defined in the "rigs" section of the configuration, mapping the name of each rig to its group of USB
+    serials (see the "serials" section). If no rigs are defined, a single rig using the "serials" section is run. The
+    serial ports are scanned once by the supervisor and handed to all workers.
+
+    Every worker reports its status periodically, the latest status of all rigs is aggregated by :meth:`summary`. A
+    worker which exits with an error is restarted after a delay which doubles with every consecutive crash.
+
+    .. note::
+
+       Example of usage:
+
+          .. code-block:: python
+
+             supervisor = RigSupervisor(config=ConfigurationHandler().data, output="data")
+             supervisor.start()
+             while supervisor.running:
+                 supervisor.monitor(timeout=1)
+                 print(supervisor.summary())
+             supervisor.stop()
+
+    :type config: dict
+    :param config: Configuration data shared by all rigs.
+    :type rigs: list
+    :param rigs: Optional names of the rigs to run, all configured rigs by default.
+    :type schedules: dict
+    :param schedules: Schedules applied to every rig, see :func:`headless.run`.
+    :type duration: float
+    :param duration: Duration of the run in seconds, None to run until stopped.
+    :type output: str
+    :param output: Folder the measurements of every rig are recorded to, nothing is recorded if None.
+    :type status_interval: float
+    :param status_interval: Time between two status reports of a worker in seconds.
+    :type restart_delay: float
+    :param restart_delay: Delay before restarting a crashed worker in seconds, doubled with every consecutive crash.
+    :type max_restart_delay: float
+    :param max_restart_delay: Upper limit of the restart delay in seconds.
+    """
+
+    def __init__(
+        self,
+        config: dict,
+        rigs=None,
+        schedules=None,
+        duration=None,
+        output=None,
+        status_interval=1.0,
+        restart_delay=1.0,
+        max_restart_delay=60.0,
+    ) -> None:
+        self.config = config
+        self.schedules = dict() if schedules is None else schedules
+        self.duration = duration
+        self.output = output
+        self.status_interval = status_interval
+        self.restart_delay = restart_delay
+        self.max_restart_delay = max_restart_delay
+
+        configured = config.get("rigs") or {"Rig": config["serials"]}
+        if rigs is None:
+            rigs = list(configured)
+        unknown = [rig for rig in rigs if rig not in configured]
+        if unknown:
+            raise KeyError("Rigs {} are not configured!".format(", ".join(unknown)))
+        self._serials = {rig: configured[rig] for rig in rigs}
+
+        # Spawn the workers on every platform, such that they do not inherit the threads of the supervisor
+        self._context = multiprocessing.get_context("spawn")
+        self._status_queue = self._context.Queue()
+        self._ports = None
+        self._workers = dict()
+        self._stopping = False
+        self.status = {rig: _RigStatus(name=rig) for rig in rigs}
+
+    def start(self) -> None:
+        """
+        Scans the serial ports and starts a worker for every rig.
+        """
+        self._stopping = False
+        self._ports = DeviceIdentifier.scan()
+        for rig in self._serials:
+            self._start_worker(rig)
+
+    def _rig_config(self, rig: str) -> dict:
+        config = deepcopy(self.config)
+        config["serials"] = deepcopy(self._serials[rig])
+        index = list(self._serials).index(rig)
+        # Every rig exports its metrics on its own port and file
+        if config["metrics"]["port"]:
+            config["metrics"]["port"] += index
+        if config["metrics"]["file"]:
+            base, extension = os.path.splitext(config["metrics"]["file"])
+            config["metrics"]["file"] = "{}_{}{}".format(base, rig, extension)
+        config["history"]["folder"] = os.path.join(config["history"]["folder"], rig)
+        return config
+
+    def _start_worker(self, rig: str) -> None:
+        stop = self._context.Event()
+        output = None
+        if self.output is not None:
+            output = os.path.join(
+                self.output,
+                "{}_{}.csv".format(rig, time.strftime("%Y-%m-%d_%H-%M-%S")),
+            )
+        process = self._context.Process(
+            target=run_rig,
+            name=rig,
+            kwargs=dict(
+                rig=rig,
+                config=self._rig_config(rig),
+                ports=self._ports,
+                schedules=self.schedules,
+                duration=self.duration,
+                output=output,
+                stop=stop,
+                status_queue=self._status_queue,
+                status_interval=self.status_interval,
+            ),
+        )
+        process.start()
+        self._workers[rig] = (process, stop)
+        status = self.status[rig]
+        status.pid = process.pid
+        status.alive = True
+        status.started = time.time()
+        status.restart_at = None
+        logger.info("Started rig {} in process {}.".format(rig, process.pid))
+
+    def monitor(self, timeout=1.0) -> None:
+        """
+        Collects the status reports of the workers for up to `timeout` seconds and restarts crashed workers when their
+        restart delay has passed.
+
+        :type timeout: float
+        :param timeout: Maximum time spent waiting for status reports in seconds.
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                rig, report = self._status_queue.get(
+                    timeout=max(deadline - time.monotonic(), 0)
+                )
+                self.status[rig].report = report
+                self.status[rig].updated = time.time()
+            except queue.Empty:
+                break
+
+        for rig, (process, _) in list(self._workers.items()):
+            status = self.status[rig]
+            if process.is_alive() or not status.alive:
+                continue
+            status.alive = False
+            status.exitcode = process.exitcode
+            if process.exitcode == 0 or self._stopping:
+                logger.info("Rig {} finished.".format(rig))
+                continue
+            # Restart quickly after a rare crash, but back off if the worker keeps crashing right after starting
+            if time.time() - status.started > self.max_restart_delay:
+                status.consecutive_crashes = 0
+            delay = min(
+                self.restart_delay * 2**status.consecutive_crashes,
+                self.max_restart_delay,
+            )
+            status.consecutive_crashes += 1
+            status.restart_at = time.monotonic() + delay
+            logger.error(
+                "Rig {} exited with code {}, restarting in {:.1f} s.".format(
+                    rig, process.exitcode, delay
+                )
+            )
+
+        for rig, status in self.status.items():
+            if status.restart_at is not None and time.monotonic() >= status.restart_at:
+                status.restarts += 1
+                self._start_worker(rig)
+
+    def stop(self, timeout=10.0) -> None:
+        """
+        Asks all workers to end their runs and waits for them. Workers that do not finish in time are terminated.
+
+        :type timeout: float
+        :param timeout: Time each worker is given to shut down its setup in seconds.
+        """
+        self._stopping = True
+        for process, stop in self._workers.values():
+            stop.set()
+        for rig, (process, _) in self._workers.items():
+            process.join(timeout)
+            if process.is_alive():
+                logger.error("Rig {} did not stop, terminating it.".format(rig))
+                process.terminate()
+                process.join()
+            self.status[rig].alive = False
+            self.status[rig].exitcode = process.exitcode
+            self.status[rig].restart_at = None
+
+    @property
+    def running(self) -> bool:
+        """
+        True as long as any worker is running or waiting to be restarted.
+        """
+        return any(
+            status.alive or status.restart_at is not None
+            for status in self.status.values()
+        )
+
+    def summary(self) -> dict:
+        """
+        :return: A dictionary with the aggregated status of every rig, see :meth:`_RigStatus.summary`.
+        """
+        return {rig: status.summary() for rig, status in self.status.items()}
+
+
+class _RigStatus(object):
+    """
+    Status of a single rig as seen by the supervisor.
+    """
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.pid = None
+        self.alive = False
+        self.exitcode = None
+        self.started = None
+        self.updated = None
+        self.restarts = 0
+        self.consecutive_crashes = 0
+        self.restart_at = None
+        self.report = dict()
+
+    def summary(self) -> dict:
+        return dict(
+            self.report,
+            pid=self.pid,
+            alive=self.alive,
+            exitcode=self.exitcode,
+            restarts=self.restarts,
+            age=None if self.updated is None else time.time() - self.updated,
+        )
+
+
+def run_rig(
+    rig: str,
+    config: dict,
+    ports,
+    schedules: dict,
+    duration,
+    output,
+    stop,
+    status_queue,
+    status_interval: float,
+) -> None:
+    """
+    Runs a single rig until the duration has passed or the stop event is set, meant to be the target of a worker
+    process of the :class:`RigSupervisor`.
+    """
+    # Imported here, such that the supervisor itself does not load the setup and its dependencies. Importing the
+    # headless runner also sets up the logger of the worker.
+    from setup import Setup
+    from headless import run
+    from Utility.MeasurementRecorder import MeasurementRecorder
+
+    recorder = None
+    with Setup(config=config) as setup:
+        setup.open(ports=ports)
+        setup.start_measurement_thread()
+        if output is not None:
+            recorder = MeasurementRecorder(
+                measurement_buffer=setup.measurement_buffer, file_name=output
+            )
+            recorder.start()
+        reporter = Thread(
+            target=_report_status,
+            args=(rig, setup, stop, status_queue, status_interval),
+            name="StatusReporter",
+        )
+        reporter.daemon = True
+        reporter.start()
+        try:
+            run(setup=setup, schedules=schedules, duration=duration, stop=stop)
+        except KeyboardInterrupt:
+            logger.info("Rig {} interrupted.".format(rig))
+        finally:
+            # Let the reporter exit and record the remaining measurements before the setup is closed
+            stop.set()
+            reporter.join()
+            setup.stop_measurement_thread()
+            if recorder is not None:
+                recorder.stop()
+
+
+def _report_status(rig, setup, stop, status_queue, status_interval) -> None:
+    while not stop.wait(status_interval):
+        state = setup.state
+        status_queue.put(
+            (
+                rig,
+                {
+                    "simulation_mode": setup.simulation_mode,
+                    "state": None if state is None else state.as_dict(),
+                    "timing": setup.measurement_timing,
+                    "actuators": setup.actuator_metrics,
+                    "safety_trips": dict(setup.safety_trips),
+                    "buffer_fill": len(setup.measurement_buffer)
+                    / setup.measurement_buffer.capacity,
+                },
+            )
+        )
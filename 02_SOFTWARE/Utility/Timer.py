@@ -1,5 +1,8 @@
-from threading import Timer
+from threading import Event, Lock, Thread, Timer
+from typing import Callable
+from Utility.Clock import SystemClock
 import logging
+import math
 
 logger = logging.getLogger("root")
 
@@ -32,3 +35,208 @@ class RepeatTimer(Timer):
         """
         while not self.finished.wait(self.interval):
             self.function(*self.args, **self.kwargs)
+
+
+class FixedRateSchedule(object):
+    """
+    The FixedRateSchedule computes the deadlines of periodic calls on an absolute time grid and records their timing.
+    It is independent of the way the calls are executed, such that it can be shared by the :class:`FixedRateTimer` and
+    by an asyncio based acquisition loop.
+
+    If a call overruns one or more of the following deadlines, the missed calls are either skipped, such that the
+    schedule continues with the next deadline in the future, or caught up by calling the function immediately. At most
+    `max_catch_up` calls are caught up in a row, any further missed calls are skipped.
+
+    For every call the lateness, i.e. the delay of its start with respect to its deadline, and the period since the
+    previous call are recorded. Their statistics are available via :attr:`statistics`.
+
+    :type interval: float
+    :param interval: Period in seconds.
+    :type catch_up: bool
+    :param catch_up: If True, missed calls are caught up, otherwise they are skipped.
+    :type max_catch_up: int
+    :param max_catch_up: Maximum number of missed calls which are caught up in a row.
+    """
+
+    def __init__(self, interval: float, catch_up=False, max_catch_up=1) -> None:
+        self.interval = interval
+        self.catch_up = catch_up
+        self.max_catch_up = max_catch_up
+        self.deadline = None
+        # Number of calls caught up in a row
+        self._caught_up = 0
+        self._lock = Lock()
+        self._reset_statistics()
+
+    def start(self, now: float) -> None:
+        """
+        Places the first deadline one interval after `now`.
+        """
+        self.deadline = now + self.interval
+        self._caught_up = 0
+
+    def begin(self, now: float) -> None:
+        """
+        Records the start of the call scheduled for the current deadline.
+        """
+        lateness = now - self.deadline
+        with self._lock:
+            self._ticks += 1
+            self._last_lateness = lateness
+            self._lateness_sum += lateness
+            self._lateness_max = max(self._lateness_max, lateness)
+            if self._last_start is not None:
+                period = now - self._last_start
+                self._periods += 1
+                delta = period - self._period_mean
+                self._period_mean += delta / self._periods
+                self._period_m2 += delta * (period - self._period_mean)
+            self._last_start = now
+
+    def end(self, now: float) -> float:
+        """
+        Records the end of the current call and advances to the deadline of the next call.
+
+        :return: The next deadline.
+        """
+        self.deadline += self.interval
+        if now > self.deadline:
+            # Number of deadlines that have already passed, a deadline just reached can still be met
+            missed = math.ceil((now - self.deadline) / self.interval)
+            if self.catch_up and self._caught_up < self.max_catch_up:
+                skipped = max(missed - (self.max_catch_up - self._caught_up), 0)
+                self._caught_up += 1
+            else:
+                skipped = missed
+                self._caught_up = 0
+            self.deadline += skipped * self.interval
+            with self._lock:
+                self._overruns += 1
+                self._skipped += skipped
+        else:
+            self._caught_up = 0
+        return self.deadline
+
+    def reset_statistics(self) -> None:
+        """
+        Restarts recording the timing statistics.
+        """
+        with self._lock:
+            self._reset_statistics()
+
+    def _reset_statistics(self) -> None:
+        self._ticks = 0
+        self._overruns = 0
+        self._skipped = 0
+        self._last_start = None
+        self._last_lateness = 0.0
+        self._lateness_sum = 0.0
+        self._lateness_max = 0.0
+        # Running mean and sum of squared deviations of the period (Welford's algorithm)
+        self._periods = 0
+        self._period_mean = 0.0
+        self._period_m2 = 0.0
+
+    @property
+    def statistics(self) -> dict:
+        """
+        Timing statistics of the calls since the schedule was created or the statistics were reset, containing:
+
+        - ticks: Number of calls.
+        - overruns: Number of calls that lasted past the deadline of the following call.
+        - skipped: Number of calls skipped because of overruns.
+        - lateness_last, lateness_mean, lateness_max: Delay of the start of the calls with respect to their deadlines
+          in seconds.
+        - period_mean, period_jitter: Mean and standard deviation of the time between the start of two consecutive
+          calls in seconds.
+        """
+        with self._lock:
+            return {
+                "ticks": self._ticks,
+                "overruns": self._overruns,
+                "skipped": self._skipped,
+                "lateness_last": self._last_lateness,
+                "lateness_mean": self._lateness_sum / self._ticks
+                if self._ticks
+                else 0.0,
+                "lateness_max": self._lateness_max,
+                "period_mean": self._period_mean,
+                "period_jitter": (self._period_m2 / self._periods) ** 0.5
+                if self._periods
+                else 0.0,
+            }
+
+
+class FixedRateTimer(Thread):
+    """
+    The FixedRateTimer is a timer thread that executes a given function at a fixed rate. In contrast to the
+    :class:`RepeatTimer`, which waits for `interval` seconds after each call has finished, calls are scheduled on
+    absolute deadlines of the monotonic clock by a :class:`FixedRateSchedule`. The duration of the function therefore
+    does not add up to the period, and the effective rate does not drift.
+
+    The deadlines are taken from the given clock, such that a simulation can be run faster than real time with a
+    :class:`Utility.Clock.ScaledClock` or as fast as possible with a :class:`Utility.Clock.VirtualClock`.
+
+    :type interval: float
+    :param interval: Period in seconds.
+    :type function: Callable
+    :param function: Function to be called periodically.
+    :type args: list
+    :param args: Optional positional arguments of the function.
+    :type kwargs: dict
+    :param kwargs: Optional keyword arguments of the function.
+    :type catch_up: bool
+    :param catch_up: If True, missed calls are caught up, otherwise they are skipped.
+    :type max_catch_up: int
+    :param max_catch_up: Maximum number of missed calls which are caught up in a row.
+    :type clock: SystemClock
+    :param clock: Clock the calls are scheduled on, the system clock by default.
+    """
+
+    def __init__(
+        self,
+        interval: float,
+        function: Callable,
+        args=None,
+        kwargs=None,
+        catch_up=False,
+        max_catch_up=1,
+        clock=None,
+    ) -> None:
+        super(FixedRateTimer, self).__init__()
+        self.daemon = True
+        self.interval = interval
+        self.function = function
+        self.args = args if args is not None else []
+        self.kwargs = kwargs if kwargs is not None else {}
+        self.schedule = FixedRateSchedule(
+            interval=interval, catch_up=catch_up, max_catch_up=max_catch_up
+        )
+        self.finished = Event()
+        self.clock = SystemClock() if clock is None else clock
+
+    def run(self) -> None:
+        """
+        Method representing the thread’s activity.
+        """
+        clock = self.clock
+        self.schedule.start(now=clock.monotonic())
+        while not clock.wait(
+            self.finished, max(self.schedule.deadline - clock.monotonic(), 0)
+        ):
+            self.schedule.begin(now=clock.monotonic())
+            self.function(*self.args, **self.kwargs)
+            self.schedule.end(now=clock.monotonic())
+
+    def cancel(self) -> None:
+        """
+        Stops the timer, a call in progress is completed.
+        """
+        self.finished.set()
+
+    @property
+    def statistics(self) -> dict:
+        """
+        Timing statistics of the calls, see :attr:`FixedRateSchedule.statistics`.
+        """
+        return self.schedule.statistics
@@ -0,0 +1,143 @@
+from setup import Setup
+from Utility.Logger import setup_custom_logger
+from Utility.ConfigurationHandler import ConfigurationHandler
+from Utility.MeasurementRecorder import MeasurementRecorder
+from Utility.Schedule import Schedule
+from Utility.Scenario import Scenario
+from logging import getLevelName
+from threading import Event
+import argparse
+import signal
+import time
+
+logger = setup_custom_logger(name="root", level=getLevelName("INFO"))
+
+
+def parse_arguments(arguments=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Runs the measurement and control loop of the setup without graphical user interface and records "
+        "all measurements to a CSV file. Schedules are given as comma separated `time:value` pairs with the time in "
+        "seconds, e.g. --setpoint 0:5,600:10."
+    )
+    parser.add_argument("--config", help="Path of the configuration file.")
+    parser.add_argument(
+        "--schedule",
+        help='JSON file with schedules by name, e.g. {"setpoint": [[0, 5], [600, 10]], "flow": [[0, 0.6]]}. '
+        "Schedules given on the command line take precedence.",
+    )
+    parser.add_argument(
+        "--setpoint", help="Temperature difference setpoint, enables the controller."
+    )
+    parser.add_argument("--flow", help="Normalized flow setpoint in [0, 1].")
+    parser.add_argument(
+        "--pwm", help="Normalized heater output in [0, 1], instead of the controller."
+    )
+    parser.add_argument(
+        "--kp", type=float, default=0.0, help="Kp gain of the controller."
+    )
+    parser.add_argument(
+        "--ki", type=float, default=0.0, help="Ki gain of the controller."
+    )
+    parser.add_argument(
+        "--kd", type=float, default=0.0, help="Kd gain of the controller."
+    )
+    parser.add_argument(
+        "--duration",
+        type=float,
+        help="Duration of the run in seconds, runs until interrupted by default.",
+    )
+    parser.add_argument(
+        "--output",
+        default="data/Headless_{}.csv".format(time.strftime("%Y-%m-%d_%H-%M-%S")),
+        help="Path of the recorded CSV file.",
+    )
+    parser.add_argument(
+        "--speed",
+        type=float,
+        help="Ratio of simulated to real time in simulation mode, defaults to the configured simulation speed.",
+    )
+    parser.add_argument("--log-level", default="INFO", help="Level of the log output.")
+    args = parser.parse_args(arguments)
+
+    schedules = Schedule.load(args.schedule) if args.schedule else dict()
+    for name in ("setpoint", "flow", "pwm"):
+        if getattr(args, name) is not None:
+            schedules[name] = Schedule.parse(getattr(args, name))
+    unknown = set(schedules) - {"setpoint", "flow", "pwm"}
+    if unknown:
+        parser.error("Unknown schedules: {}".format(", ".join(sorted(unknown))))
+    if "setpoint" in schedules and "pwm" in schedules:
+        parser.error("Either the setpoint or the pwm can be scheduled, not both.")
+    args.schedules = schedules
+    return args
+
+
+def run(setup: Setup, schedules: dict, duration=None, stop=None) -> None:
+    """
+    Applies the schedules to the running setup until the duration has passed or the stop event is set.
+
+    :type setup: Setup
+    :param setup: Opened setup with a running measurement thread.
+    :type schedules: dict
+    :param schedules: Schedules of the "setpoint", "flow" and/or "pwm", see :class:`Utility.Schedule.Schedule`.
+    :type duration: float
+    :param duration: Duration of the run in seconds, None to run until the stop event is set.
+    :type stop: Event
+    :param stop: Optional event to end the run early.
+    """
+    if stop is None:
+        stop = Event()
+    scenario = Scenario(schedules=schedules, duration=duration)
+    scenario.start(setup)
+    # Follow the clock of the setup, which runs faster than real time in an accelerated simulation
+    clock = setup.clock
+    start = clock.monotonic()
+    t = 0.0
+    while True:
+        scenario.apply(setup, t)
+        if scenario.finished(t):
+            return
+        wake_up = scenario.next_change(t)
+        timeout = None if wake_up is None else max(wake_up - t, 0)
+        if clock.wait(stop, timeout):
+            return
+        t = clock.monotonic() - start
+
+
+def main(arguments=None) -> None:
+    args = parse_arguments(arguments)
+    logger.setLevel(getLevelName(args.log_level.upper()))
+
+    stop = Event()
+    # End the run gracefully, e.g. when the job is cancelled by a scheduler
+    signal.signal(signal.SIGTERM, lambda signum, frame: stop.set())
+
+    config = ConfigurationHandler(path=args.config)
+    if args.speed is not None:
+        config["simulation"]["speed"] = args.speed
+    with Setup(config=config) as setup:
+        setup.open()
+        setup.set_pid_parameters(kp=args.kp, ki=args.ki, kd=args.kd)
+        setup.start_measurement_thread()
+        # Record more often in an accelerated simulation, before the measurements leave the buffer
+        speed = config["simulation"]["speed"] if setup.simulation_mode else 1
+        recorder = MeasurementRecorder(
+            measurement_buffer=setup.measurement_buffer,
+            file_name=args.output,
+            interval=1.0 / max(speed, 1),
+        )
+        recorder.start()
+        try:
+            run(
+                setup=setup, schedules=args.schedules, duration=args.duration, stop=stop
+            )
+        except KeyboardInterrupt:
+            logger.info("Run interrupted.")
+        finally:
+            # Record the remaining measurements while the setup is still open
+            setup.stop_measurement_thread()
+            recorder.stop()
+
+
+if __name__ == "__main__":
+    main()
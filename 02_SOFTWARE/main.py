@@ -1,13 +1,20 @@
 from setup import Setup
+from Utility.AcquisitionProcess import RemoteSetup
 from Utility.Logger import setup_custom_logger
 from Utility.ConfigurationHandler import ConfigurationHandler
 from GUI.MainWindow import Launcher
 from logging import getLevelName
+import multiprocessing
 
 logger = setup_custom_logger(name="root", level=getLevelName("DEBUG"))
 
 if __name__ == "__main__":
-    with Setup(config=ConfigurationHandler()) as setup:
+    # Allows starting the acquisition process from the frozen executable
+    multiprocessing.freeze_support()
+    config = ConfigurationHandler()
+    # Optionally run the acquisition in its own process, independent of the load of the GUI
+    setup_class = RemoteSetup if config["general"]["acquisition_process"] else Setup
+    with setup_class(config=config) as setup:
         setup.open()
         setup.start_measurement_thread()
         launcher = Launcher(setup=setup)
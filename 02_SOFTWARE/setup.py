@@ -3,9 +3,19 @@ from Drivers.SFX5400 import SFX5400
 from Drivers.Shdlc_IO import ShdlcIoModule
 from Drivers.DeviceIdentifier import DeviceIdentifier
 from Utility.MeasurementBuffer import MeasurementBuffer
-from Utility.Timer import RepeatTimer
+from Utility.SegmentStore import SegmentStore
+from Utility.MeasurementFrame import MeasurementSchema, MeasurementFrame
+from Utility.Timer import FixedRateTimer
+from Utility.Clock import SystemClock, ScaledClock
+from Utility.AsyncAcquisition import AsyncAcquisitionEngine
+from Utility.ActuatorDispatcher import ActuatorDispatcher
+from Utility.StageProfiler import StageProfiler
+from Utility.MetricsExporter import MetricsExporter
 from Utility.ConfigurationHandler import ConfigurationHandler
+from Utility.MassflowFilter import MassflowFilter
+from Simulation.PlantModel import PlantModel
 from simple_pid import PID
+from concurrent.futures import ThreadPoolExecutor
 import logging
 import time
 import numpy as np
@@ -42,24 +52,65 @@ class Setup(object):
     :type serials: dict
     :param serials: Dictionary of device names and corresponding USB serials.
     :type t_sampling_s: float
-    :param t_sampling_s: Measurement sampling time in seconds.
+    :param t_sampling_s: Measurement sampling time in seconds, at which the controller and the safety checks run.
+    :type t_logging_s: float
+    :param t_logging_s: Time between two measurements stored in the measurement buffer, rounded to a multiple of the
+       sampling time.
     :type interval_s: float
     :param interval_s: Total buffered time interval in seconds, which in combination with the sampling time defines
        the number of stored measurements.
+    :type clock: SystemClock
+    :param clock: Clock the measurements are scheduled and time stamped with. By default the system clock is used,
+       which in simulation mode is replaced according to the configured simulation speed. A simulation running as fast
+       as possible is driven by a :class:`Simulation.Simulator.Simulator` instead.
     """
 
-    def __init__(self, config: ConfigurationHandler):
+    # Names of the values returned by shared_status
+    SHARED_STATUS = (
+        "high_temperature_trips",
+        "low_flow_trips",
+        "pwm",
+        "flow",
+        "setpoint",
+        "kp",
+        "ki",
+        "kd",
+        "mode",
+        "simulation_mode",
+        "buffering",
+    )
+
+    def __init__(self, config: ConfigurationHandler, clock=None):
         # allocate private member variables
         self._serials = deepcopy(config["serials"])
         self._t_sampling_s = config["general"]["t_sampling"]
+        # Only every n-th measurement is stored in the measurement buffer
+        self._logging_decimation = max(
+            int(round(config["general"]["t_logging"] / self._t_sampling_s)), 1
+        )
+        self._measurement_count = 0
+        self._last_control_time = None
         self._devices = None
         self._buffering = True
         self._measurement_timer = None
+        self._default_clock = clock is None
+        self.clock = SystemClock() if clock is None else clock
+        self._concurrent_acquisition = bool(config["general"]["concurrent_acquisition"])
+        self._acquisition_engine = config["general"]["acquisition_engine"]
+        self._acquisition_pool = None
         self._eks = None
         self._sfc = None
         self._heater = None
         self._sdp = None
+        self._heater_dispatcher = None
+        self._sfc_dispatcher = None
         self._current_pwm_value = 0
+        # Durations of the stages of a measurement, can be enabled at runtime
+        self.profiler = StageProfiler(enabled=bool(config["general"]["profiling"]))
+        self._metrics_exporter = None
+        if config["metrics"]["enabled"]:
+            # The exported device latencies are taken from the stage profile
+            self.profiler.enabled = True
         self._current_flow_value = 0
         self._current_mode = Mode.IDLE
         self.simulation_mode = False
@@ -69,17 +120,31 @@ class Setup(object):
         self._delta_T = 0  # Static state temperature difference for calibration
         self.config = config
         self.massflow_estimator = MassflowEstimator(config=config)
+        # Recursive flow estimate following the thermal lag
+        self.massflow_filter = MassflowFilter(config=config, t_sampling=self._t_sampling_s)
+        # Model of the plant replacing the devices in simulation mode
+        self.plant = PlantModel(
+            config=config,
+            t_sampling=self._t_sampling_s,
+            seed=config["simulation"]["seed"],
+        )
 
         # allocate public member variables
         self.interval_s = config["general"]["interval"]
         self.measurement_buffer = self._setup_measurement_buffer()  # Measurement buffer
         self.state = None  # Storage for current measurement frame
+        # Optional SharedMeasurementRing publishing the measurements to other processes
+        self.shared_ring = None
+        # Two preallocated frames used alternately, such that the published state is never written to
+        self._frames = [self.measurement_buffer.schema.new_frame() for _ in range(2)]
+        self._frame_index = 0
         self.controller = PID(
             Kp=0.0,
             Ki=0.0,
             Kd=0.0,
             setpoint=self.temperature_difference_setpoint,
-            sample_time=self.config["pid_controller"]["sample_time"],
+            # The controller is updated on every measurement with the actual time step instead
+            sample_time=None,
             output_limits=(0, 1),
         )
 
@@ -93,13 +158,17 @@ class Setup(object):
         # allocate error flags
         self.error_high_temperature = False
         self.error_low_flow = False
+        # Number of times the heater was switched off by the safety checks
+        self.safety_trips = {"high_temperature": 0, "low_flow": 0}
 
-    def save_measurement_buffer(self, folder, name, type='mat'):
+    def save_measurement_buffer(self, folder, name, type='mat', t0=None, t1=None):
         """
         Saves the current measurement buffer to a file.
         :param folder: Destination folder.
         :param name: Name of the file. A time tag will be appended for uniqueness.
         :param type: To allow different export filetypes.
+        :param t0: Optional start time of the exported range, defaults to the oldest buffered measurement.
+        :param t1: Optional end time of the exported range, defaults to the newest buffered measurement.
         """
         if type == 'mat':
             # Save as matlab .mat file
@@ -110,7 +179,11 @@ class Setup(object):
                 pass
             else:
                 os.mkdir(path=folder)
-            savemat(file_name=file_name, mdict=self.measurement_buffer.data)
+            if t0 is None and t1 is None:
+                measurements = self.measurement_buffer.snapshot()
+            else:
+                measurements = self.measurement_buffer.window(t0=t0, t1=t1)
+            savemat(file_name=file_name, mdict=measurements.data)
         else:
             raise NotImplementedError("File type {} not implemented yet".format(type))
 
@@ -118,7 +191,7 @@ class Setup(object):
         """
         Defines the set of recorded signals and creates a corresponding MeasurementBuffer.
 
-        :return: An instance of MeasurementBuffer containing a deque instance for every signal.
+        :return: An instance of MeasurementBuffer holding a ring buffer column for every signal of its schema.
 
         .. seealso::
            Module :mod:`Utility.MeasurementBuffer.MeasurementBuffer`
@@ -130,33 +203,69 @@ class Setup(object):
             "Humidity_2",
             "Flow",
             "Time",
+            "Time_EKS",
+            "Time_SFC",
             "Temperature_Difference",
             "PWM",
             "Flow_Estimate",
+            "Flow_Estimate_Filtered",
+            "Flow_Estimate_Variance",
             "Target_Delta_T",
             "Controller_Output_P",
             "Controller_Output_I",
             "Controller_Output_D",
             "Controller_Output",
         ]
-        return MeasurementBuffer(
-            signals=signals,
+        if self.config["history"]["spill_to_disk"]:
+            # Keep measurements leaving the buffer addressable on disk
+            segment_store = SegmentStore(
+                folder=self.config["history"]["folder"],
+                signals=signals,
+                segment_length=self.config["history"]["segment_length"],
+                name="Measurement_MassflowSensor",
+                header_interval=self.config["history"]["header_interval"],
+            )
+        else:
+            segment_store = None
+        measurement_buffer = MeasurementBuffer(
+            signals=MeasurementSchema(signals=signals),
             buffer_interval_s=self.interval_s,
-            sampling_time_s=self._t_sampling_s,
+            sampling_time_s=self._t_sampling_s * self._logging_decimation,
+            segment_store=segment_store,
+        )
+        # Squared control error summed up as score during the competitions
+        measurement_buffer.register_statistic(
+            name="Squared_Control_Error",
+            expression=self._squared_control_error,
         )
+        return measurement_buffer
+
+    @staticmethod
+    def _squared_control_error(measurement) -> float:
+        """
+        :param measurement: Mapping from signal names to values of one or more measurements.
+        :return: The squared deviation of the temperature difference from its setpoint.
+        """
+        return (
+            measurement["Temperature_Difference"] - measurement["Target_Delta_T"]
+        ) ** 2
 
-    def open(self) -> None:
+    def open(self, ports=None) -> None:
         """
         Finds and opens all the USB devices previously defined within `self.serials` by their serial number.
         If one of the devices is not responsive or cannot be found, the setup is switching to simulation mode
         in which all measurements are simulated. This allows to test the GUI without any attached devices.
 
+        :type ports: list
+        :param ports: Optional list of available ports, see :meth:`Drivers.DeviceIdentifier.DeviceIdentifier.scan`.
+           The ports are scanned if None.
+
         .. seealso::
            Module :mod:`Drivers.DeviceIdentifier.DeviceIdentifier`
         """
         self._devices = DeviceIdentifier(serials=self._serials)
 
-        if self._devices.open():
+        if self._devices.open(ports=ports):
             # Connect all sensors / actuators
             self._eks = EKS(serial_port=self._devices.serial_ports["EKS_ONE"])
             self._eks.open()
@@ -178,21 +287,72 @@ class Setup(object):
             self.simulation_mode = True
             logger.warning("Entering simulation mode.")
 
+        if self.simulation_mode and self._default_clock:
+            self._set_simulation_speed(self.config["simulation"]["speed"])
+
         # switch the temperature sensors if necessary:
         if not self.simulation_mode and self.config["general"]["temp_sensors_switched"]:
             self.reverse_temp_sensors(update=False)
 
+        if not self.simulation_mode and self._concurrent_acquisition:
+            # One worker per serial port, such that the devices are polled in parallel
+            self._acquisition_pool = ThreadPoolExecutor(
+                max_workers=2, thread_name_prefix="Acquisition"
+            )
+
+        if not self.simulation_mode:
+            # Write actuator commands from worker threads, such that callers never block on the serial ports
+            self._heater_dispatcher = ActuatorDispatcher(
+                name="Heater", write=self._write_heater
+            )
+            self._sfc_dispatcher = ActuatorDispatcher(name="SFC", write=self._write_sfc)
+
+        if self.config["metrics"]["enabled"]:
+            self._metrics_exporter = MetricsExporter(
+                setup=self,
+                port=self.config["metrics"]["port"] or None,
+                file=self.config["metrics"]["file"] or None,
+                interval=self.config["metrics"]["interval"],
+            )
+            self._metrics_exporter.start()
+
+    def _set_simulation_speed(self, speed: float) -> None:
+        """
+        Replaces the system clock for a simulation running at a multiple of real time.
+
+        :type speed: float
+        :param speed: Ratio of the simulated time to the real time.
+        """
+        if speed != 1:
+            self.clock = ScaledClock(speed=speed)
+            logger.info("Simulating at {}x real time.".format(speed))
+
     def close(self) -> None:
         """
         Closes all connected devices.
         """
-        self.stop_measurement_thread()
-        if self.simulation_mode:
-            pass
-        else:
-            self._eks.close()
-            self._sfc.close()
-            self._heater.close()
+        if self._measurement_timer is not None:
+            self.stop_measurement_thread()
+        if self._metrics_exporter is not None:
+            self._metrics_exporter.stop()
+            self._metrics_exporter = None
+        self.measurement_buffer.close()
+        if self._acquisition_pool is not None:
+            self._acquisition_pool.shutdown(wait=True)
+            self._acquisition_pool = None
+        # Write the final commands, e.g. switching off the heater, before closing the devices
+        for dispatcher in (self._heater_dispatcher, self._sfc_dispatcher):
+            if dispatcher is not None:
+                dispatcher.close()
+        self._heater_dispatcher = None
+        self._sfc_dispatcher = None
+        if self.profiler.enabled:
+            logger.info("Stage profile: {}".format(self.profiler.summary()))
+        if not self.simulation_mode:
+            # Devices are missing if opening them failed
+            for device in (self._eks, self._sfc, self._heater):
+                if device is not None:
+                    device.close()
 
     def __enter__(self):
         """
@@ -230,17 +390,61 @@ class Setup(object):
         .. seealso::
            :meth:`_measure_simulation_mode`
            :meth:`_measure_normal_mode`
+           :meth:`process_measurement`
            :mod:`Utility.MeasurementBuffer.MeasurementBuffer`
         """
-        # Retrieve all recorded signals depending on system mode
-        if self.simulation_mode:
-            results = self._measure_simulation_mode()
-        else:
-            results = self._measure_normal_mode()
+        with self.profiler.stage("tick"):
+            frame = self.next_frame()
+
+            # Retrieve all recorded signals depending on system mode
+            if self.simulation_mode:
+                self._measure_simulation_mode(frame=frame)
+            else:
+                self._measure_normal_mode(frame=frame)
+
+            pwm = self.process_measurement(frame=frame)
+            if pwm is not None:
+                self.set_pwm(pwm)
+
+    def next_frame(self) -> MeasurementFrame:
+        """
+        :return: The preallocated frame which is currently not published as state, to be filled by the next
+           measurement.
+        """
+        frame = self._frames[self._frame_index]
+        self._frame_index = 1 - self._frame_index
+        return frame
+
+    def process_measurement(self, frame: MeasurementFrame):
+        """
+        Calculates the control related signals of a filled measurement frame, checks the safety limits, publishes the
+        frame as current state and stores every n-th frame in the measurement buffer, according to the logging time.
+        Setting the resulting pwm value is left to the caller, such that the acquisition loop can decide how to
+        perform the device access.
+
+        :type frame: MeasurementFrame
+        :param frame: Frame holding all measured signals.
+        :return: The pwm value to be set, or None if the pwm value should be left unchanged.
+        """
+        results = frame
+        pwm = None
 
         # Calculate control related signals depending on whether the controller is active
         if self._current_mode is Mode.PID_ON:
-            desired_pwm = self.controller(input_=results["Temperature_Difference"])
+            # Update the controller with the time passed since its last update, such that it follows the clock of the
+            # setup. The first update after starting the controller covers one sampling time.
+            if (
+                self._last_control_time is None
+                or results["Time"] <= self._last_control_time
+            ):
+                dt = self._t_sampling_s
+            else:
+                dt = results["Time"] - self._last_control_time
+            self._last_control_time = results["Time"]
+            with self.profiler.stage("pid"):
+                desired_pwm = self.controller(
+                    input_=results["Temperature_Difference"], dt=dt
+                )
             (
                 results["Controller_Output_P"],
                 results["Controller_Output_I"],
@@ -248,6 +452,7 @@ class Setup(object):
             ) = self.controller.components
             results["Controller_Output"] = self.controller._last_output
         else:
+            self._last_control_time = None
             desired_pwm = 0
             (
                 results["Controller_Output_P"],
@@ -263,83 +468,198 @@ class Setup(object):
             and self._current_flow_value > 0
             and self._current_pwm_value > 0
         ):
-            self.set_pwm(0)
+            pwm = 0
             self.error_low_flow = True
+            self.safety_trips["low_flow"] += 1
         if (
             results["Temperature_1"] > self.safety_upper_temperature_limit
             or results["Temperature_2"] > self.safety_upper_temperature_limit
         ) and self._current_pwm_value > 0:
-            self.set_pwm(0)
+            pwm = 0
             self.error_high_temperature = True
+            self.safety_trips["high_temperature"] += 1
         # If we're in PID mode set the previously calculated value
         elif self._current_mode is Mode.PID_ON:
-            self._current_pwm_value = desired_pwm
-            self.set_pwm(desired_pwm)
+            pwm = desired_pwm
         # If we're not in PID mode the pwm setting is handled directly via the slider
         else:
             pass
 
         # Store the current measurement
         self.state = results
-        if self._buffering:
+        if self.shared_ring is not None:
+            self.shared_ring.publish(state=results.values, status=self.shared_status())
+        self._measurement_count += 1
+        if self._buffering and self._measurement_count % self._logging_decimation == 0:
             # Buffer multiple measurements in the measurement buffer
-            self.measurement_buffer.update(results)
+            with self.profiler.stage("buffer"):
+                self.measurement_buffer.update(results)
+                if self.shared_ring is not None:
+                    self.shared_ring.append(results.values)
+        return pwm
+
+    def shared_status(self) -> list:
+        """
+        :return: The status of the setup published alongside the latest state, see :attr:`SHARED_STATUS`.
+        """
+        return [
+            self.safety_trips["high_temperature"],
+            self.safety_trips["low_flow"],
+            self._current_pwm_value,
+            self._current_flow_value,
+            self.temperature_difference_setpoint,
+            self.controller.Kp,
+            self.controller.Ki,
+            self.controller.Kd,
+            self._current_mode.value,
+            self.simulation_mode,
+            self._buffering,
+        ]
 
-    def _measure_simulation_mode(self) -> dict:
+    def _measure_simulation_mode(self, frame) -> None:
         """
-        When no devices are connected random values are generated instead of actual measurements.
+        When no devices are connected the measurements are simulated by the plant model, which responds to the set
+        pwm and flow values.
+
+        :type frame: MeasurementFrame
+        :param frame: Frame which is filled in place with all simulated signals.
 
-        :return: A dictionary with all signals
+        .. seealso::
+           Module :mod:`Simulation.PlantModel.PlantModel`
         """
-        T_1 = 25 + 0.1 * np.random.rand()
-        T_2 = 30 + 0.1 * np.random.rand()
+        self.plant.step(pwm=self._current_pwm_value, flow_setpoint=self._current_flow_value)
+        measurement = self.plant.measure()
+        T_1 = measurement["Temperature_1"][0]
+        T_2 = measurement["Temperature_2"][0]
         delta_T = T_2 - T_1
-        results_timestamp = time.time()
-        results = {
-            "Temperature_1": T_1,
-            "Temperature_2": T_2,
-            "Humidity_1": 50 + np.random.rand(),
-            "Humidity_2": 30 + np.random.rand(),
-            "Flow": 50 + np.random.rand(),
-            "Time": results_timestamp,
-            "Temperature_Difference": delta_T,
-            "PWM": self._current_pwm_value,
-            "Flow_Estimate": self.massflow_estimator.calculate(
-                delta_t=delta_T, pwm=self._current_pwm_value
-            ),
-            "Target_Delta_T": self.temperature_difference_setpoint,
-        }
-        return results
-
-    def _measure_normal_mode(self) -> dict:
-        """
-        Measures all devices.
-
-        :return: A dictionary with all measured signals.
-        """
-        results_eks = self._eks.measure()
-        results_sfc = self._sfc.measure()
-        results_timestamp = time.time()
+        results_timestamp = self.clock.time()
+        frame["Temperature_1"] = T_1
+        frame["Temperature_2"] = T_2
+        frame["Humidity_1"] = measurement["Humidity_1"][0]
+        frame["Humidity_2"] = measurement["Humidity_2"][0]
+        frame["Flow"] = measurement["Flow"][0]
+        frame["Time"] = results_timestamp
+        frame["Time_EKS"] = results_timestamp
+        frame["Time_SFC"] = results_timestamp
+        frame["Temperature_Difference"] = delta_T
+        frame["PWM"] = self._current_pwm_value
+        frame["Flow_Estimate"] = self.massflow_estimator.calculate(
+            delta_t=delta_T, pwm=self._current_pwm_value
+        )
+        (
+            frame["Flow_Estimate_Filtered"],
+            frame["Flow_Estimate_Variance"],
+        ) = self.massflow_filter.update(
+            time=results_timestamp,
+            delta_t=delta_T,
+            pwm=self._current_pwm_value,
+            flow=frame["Flow"],
+        )
+        frame["Target_Delta_T"] = self.temperature_difference_setpoint
+
+    def _measure_normal_mode(self, frame) -> None:
+        """
+        Measures all devices. If concurrent acquisition is enabled, the devices on the separate serial ports are
+        polled in parallel, such that a measurement takes as long as the slowest device instead of all devices
+        together. The completion time of every device is recorded alongside the measurement.
+
+        :type frame: MeasurementFrame
+        :param frame: Frame which is filled in place with all measured signals.
+        """
+        if self._acquisition_pool is not None:
+            future_eks = self._acquisition_pool.submit(self._poll_device, self._eks, "eks")
+            future_sfc = self._acquisition_pool.submit(self._poll_device, self._sfc, "sfc")
+            results_eks, time_eks = future_eks.result()
+            results_sfc, time_sfc = future_sfc.result()
+        else:
+            results_eks, time_eks = self._poll_device(self._eks, "eks")
+            results_sfc, time_sfc = self._poll_device(self._sfc, "sfc")
+        self.fill_measurement(
+            frame=frame,
+            results_eks=results_eks,
+            time_eks=time_eks,
+            results_sfc=results_sfc,
+            time_sfc=time_sfc,
+        )
+
+    def fill_measurement(
+        self,
+        frame,
+        results_eks: list,
+        time_eks: float,
+        results_sfc: dict,
+        time_sfc: float,
+    ) -> None:
+        """
+        Fills a measurement frame from the results of the EKS and SFC.
+
+        :type frame: MeasurementFrame
+        :param frame: Frame which is filled in place with all measured signals.
+        :type results_eks: list
+        :param results_eks: Measurements of both temperature sensors of the EKS.
+        :type time_eks: float
+        :param time_eks: Completion time of the EKS measurement.
+        :type results_sfc: dict
+        :param results_sfc: Measurement of the SFC.
+        :type time_sfc: float
+        :param time_sfc: Completion time of the SFC measurement.
+        """
+        results_timestamp = self.clock.time()
         delta_T = (
             results_eks[1]["Temperature"]
             - results_eks[0]["Temperature"]
             - self._delta_T
         )
-        results = {
-            "Temperature_1": results_eks[0]["Temperature"],
-            "Temperature_2": results_eks[1]["Temperature"] - self._delta_T,
-            "Humidity_1": results_eks[0]["Humidity"],
-            "Humidity_2": results_eks[1]["Humidity"],
-            "Flow": results_sfc["Flow"],
-            "Time": results_timestamp,
-            "Temperature_Difference": delta_T,
-            "PWM": self._current_pwm_value,
-            "Flow_Estimate": self.massflow_estimator.calculate(
-                delta_t=delta_T, pwm=self._current_pwm_value
-            ),
-            "Target_Delta_T": self.temperature_difference_setpoint,
-        }
-        return results
+        frame["Temperature_1"] = results_eks[0]["Temperature"]
+        frame["Temperature_2"] = results_eks[1]["Temperature"] - self._delta_T
+        frame["Humidity_1"] = results_eks[0]["Humidity"]
+        frame["Humidity_2"] = results_eks[1]["Humidity"]
+        frame["Flow"] = results_sfc["Flow"]
+        frame["Time"] = results_timestamp
+        frame["Time_EKS"] = time_eks
+        frame["Time_SFC"] = time_sfc
+        frame["Temperature_Difference"] = delta_T
+        frame["PWM"] = self._current_pwm_value
+        frame["Flow_Estimate"] = self.massflow_estimator.calculate(
+            delta_t=delta_T, pwm=self._current_pwm_value
+        )
+        (
+            frame["Flow_Estimate_Filtered"],
+            frame["Flow_Estimate_Variance"],
+        ) = self.massflow_filter.update(
+            time=results_timestamp,
+            delta_t=delta_T,
+            pwm=self._current_pwm_value,
+            flow=frame["Flow"],
+        )
+        frame["Target_Delta_T"] = self.temperature_difference_setpoint
+
+    def _poll_device(self, device, stage: str) -> tuple:
+        """
+        Measures a single device.
+
+        :return: The measurement of the device and the time it was completed at.
+        """
+        with self.profiler.stage(stage):
+            result = device.measure()
+        return result, self.clock.time()
+
+    def _write_heater(self, value: float) -> None:
+        """
+        Writes a pwm value to the heater, called by the heater dispatcher. The value is registered as the current pwm
+        value only after the heater has been set.
+        """
+        with self.profiler.stage("heater_write"):
+            # convert to heater units:
+            self._heater.set_pwm(pwm_bit=0, dc=int(value * 65535.0))
+        self._current_pwm_value = value
+
+    def _write_sfc(self, value: float) -> bool:
+        """
+        Writes a flow setpoint to the SFC, called by the SFC dispatcher.
+        """
+        with self.profiler.stage("sfc_write"):
+            return self._sfc.set_flow(setpoint_normalized=value)
 
     def start_buffering(self) -> None:
         """
@@ -362,16 +682,35 @@ class Setup(object):
 
     def start_measurement_thread(self) -> None:
         """
-        Creates a thread.Timer that schedules future measurements at the desired sampling time.
+        Creates a timer thread that schedules future measurements on a fixed grid of the desired sampling time, such
+        that the sampling rate does not drift with the duration of the measurements. If the acquisition engine is
+        configured as "asyncio", the measurements are performed on an asyncio event loop instead.
 
         .. seealso::
-           :mod:`Utility.Timer.RepeatTimer`
+           :mod:`Utility.Timer.FixedRateTimer`
+           :mod:`Utility.AsyncAcquisition.AsyncAcquisitionEngine`
         """
         if self._measurement_timer is None:
             self.measurement_buffer.clear()
-            self._measurement_timer = RepeatTimer(
-                interval=self._t_sampling_s, function=self.measure
-            )
+            self.massflow_filter.reset()
+            real_time = type(self.clock) is SystemClock
+            if self._acquisition_engine == "asyncio" and not real_time:
+                logger.warning(
+                    "The asyncio acquisition engine runs in real time only, using a timer thread instead."
+                )
+            if self._acquisition_engine == "asyncio" and real_time:
+                self._measurement_timer = AsyncAcquisitionEngine(
+                    setup=self,
+                    eks=None if self.simulation_mode else self._eks,
+                    sfc=None if self.simulation_mode else self._sfc,
+                    interval=self._t_sampling_s,
+                )
+            else:
+                self._measurement_timer = FixedRateTimer(
+                    interval=self._t_sampling_s,
+                    function=self.measure,
+                    clock=self.clock,
+                )
             self._measurement_timer.start()
             logger.info(
                 "Started measurement thread running at t_s={} s".format(
@@ -389,14 +728,20 @@ class Setup(object):
             self.set_pwm(0)
             self.controller.reset()
             self._measurement_timer.cancel()
+            logger.info(
+                "Stopped measurement thread, timing statistics: {}".format(
+                    self._measurement_timer.statistics
+                )
+            )
             self._measurement_timer = None
-            logger.info("Stopped measurement thread.")
         else:
             logger.error("Measurement thread not started yet!")
 
     def set_pwm(self, value: float) -> None:
         """
-        Safely sets the desired PWM value depending on the current system mode.
+        Safely sets the desired PWM value depending on the current system mode. The value is handed to the heater
+        dispatcher without waiting for the heater to be set. In simulation mode the value is applied to the plant
+        model.
 
         :type value: float
         :param value: Desired PWM value as a normalized value between 0 and 1.
@@ -404,11 +749,8 @@ class Setup(object):
         .. seealso::
            :mod:`setup.Mode`
         """
-        if self.simulation_mode:
-            self._current_pwm_value = 0
-        elif self._current_mode in [Mode.IDLE, Mode.FORCE_PWM_OFF, Mode.PID_OFF]:
-            self._heater.set_pwm(pwm_bit=0, dc=0)
-            self._current_pwm_value = 0
+        if self._current_mode in [Mode.IDLE, Mode.FORCE_PWM_OFF, Mode.PID_OFF]:
+            self._apply_pwm(0)
         elif self._current_mode in [Mode.FORCE_PWM_ON, Mode.PID_ON]:
             value = float(value)
             if not 0.0 <= value <= 1.0:
@@ -418,16 +760,24 @@ class Setup(object):
             # Safety check: If the flow is smaller than x slm, heating will not be allowed
             if value != 0:
                 if (
-                    self.state["Flow"] < self.safety_lower_flow_limit
+                    self.state is None
+                    or self.state["Flow"] < self.safety_lower_flow_limit
                     or self.state["Temperature_1"] > self.safety_upper_temperature_limit
                     or self.state["Temperature_2"] > self.safety_upper_temperature_limit
                 ):
                     value = 0
-            # Register the newly set pwm value for later recording
+            self._apply_pwm(value)
+
+    def _apply_pwm(self, value: float) -> None:
+        """
+        Applies a checked pwm value. In simulation mode it is registered for the plant and for later recording right
+        away. Otherwise it is registered by :meth:`_write_heater` once the heater has been set, and switching the heater
+        off is retried until it succeeds.
+        """
+        if self.simulation_mode:
             self._current_pwm_value = value
-            # convert to heater units:
-            value = int(value * 65535.0)
-            self._heater.set_pwm(pwm_bit=0, dc=value)
+        else:
+            self._heater_dispatcher.submit(value, retry=value == 0)
 
     def set_setpoint(self, value: float) -> None:
         """
@@ -482,31 +832,26 @@ class Setup(object):
         :type kd: float
         :param kd: Kd gain of the controller
         """
-        if self.simulation_mode:
-            pass
-        else:
-            if kp is None:
-                kp = self.controller.Kp
-            if ki is None:
-                ki = self.controller.Ki
-            if kd is None:
-                kd = self.controller.Kd
-            self.controller.tunings = (kp, ki, kd)
+        if kp is None:
+            kp = self.controller.Kp
+        if ki is None:
+            ki = self.controller.Ki
+        if kd is None:
+            kd = self.controller.Kd
+        self.controller.tunings = (kp, ki, kd)
 
     def set_flow(self, value):
         """
         Interface to the SFC5xxx drive for defining the current flow
-        setpoint
+        setpoint. The value is handed to the SFC dispatcher without waiting for the setpoint to be set.
 
         :type flow: float
         :param flow: The desired massflow in normalized units, in [0, 1].
         """
-        if self.simulation_mode:
-            pass
-        else:
-            if 0.0 <= value <= 1:
-                self._sfc.set_flow(setpoint_normalized=value)
-                self._current_flow_value = value
+        if 0.0 <= value <= 1:
+            if not self.simulation_mode:
+                self._sfc_dispatcher.submit(value)
+            self._current_flow_value = value
 
     def get_current_flow_value(self):
         """
@@ -516,6 +861,15 @@ class Setup(object):
         """
         return self._current_flow_value
 
+    def get_current_pwm_value(self):
+        """
+        Getter for the pwm value currently applied to the heater, which is zero if the safety checks refused the last
+        set value.
+
+        :return: Current pwm value in normalized units.
+        """
+        return self._current_pwm_value
+
     def start_pid_controller(self, setpoint=None) -> None:
         """
         Start pid mode with the output set to off.
@@ -559,12 +913,22 @@ class Setup(object):
 
     def set_temperature_calibration(self) -> None:
         """
-        Record the current temperature offset, assuming steady state.
+        Record the current temperature offset, assuming steady state. The offset is averaged over the measurements of
+        the last `calibration_window` seconds to suppress sensor noise.
         """
+        recent = self.measurement_buffer.last(
+            seconds=self.config["measurement"]["temperature"]["calibration_window"],
+            signals=["Temperature_Difference"],
+        )
+        # The recorded temperature difference is corrected by the current offset, which has to be added back
+        if len(recent):
+            delta_T = self._delta_T + float(np.mean(recent["Temperature_Difference"]))
+        else:
+            delta_T = self._delta_T + self.state["Temperature_Difference"]
+
         # Reset first
         self.reset_temperature_calibration()
 
-        delta_T = self.state["Temperature_Difference"]
         threshold = self.config["measurement"]["temperature"][
             "maximum_calibration_offset"
         ]
@@ -577,6 +941,29 @@ class Setup(object):
         else:
             self._delta_T = delta_T
 
+    @property
+    def actuator_metrics(self) -> dict:
+        """
+        Metrics of the heater and SFC dispatchers, see :attr:`Utility.ActuatorDispatcher.ActuatorDispatcher.metrics`.
+        Empty in simulation mode.
+        """
+        metrics = dict()
+        if self._heater_dispatcher is not None:
+            metrics["Heater"] = self._heater_dispatcher.metrics
+        if self._sfc_dispatcher is not None:
+            metrics["SFC"] = self._sfc_dispatcher.metrics
+        return metrics
+
+    @property
+    def measurement_timing(self) -> dict:
+        """
+        Timing statistics of the measurement thread, see :attr:`Utility.Timer.FixedRateTimer.statistics`. None if the
+        measurement thread is not running.
+        """
+        if self._measurement_timer is None:
+            return None
+        return self._measurement_timer.statistics
+
     def reset_temperature_calibration(self) -> None:
         """
         Reset the current temperature offset to zero.
@@ -598,26 +985,88 @@ class Setup(object):
 
 
 class MassflowEstimator(object):
+    """
+    The MassflowEstimator estimates the mass flow through the pipe from the energy balance of the heater: the heater
+    power :math:`u U^2 / R` raises the temperature of the air flow by :math:`\\Delta T`, such that
+
+    .. math::
+
+       \\dot m = \\frac{u U^2}{R c_p \\Delta T}.
+
+    The constant part of the estimate is computed once and recomputed whenever one of the constants is changed.
+    Temperature differences and heater outputs can be given as scalars or as NumPy arrays, such that live
+    measurements, replays and exports share the same implementation.
+
+    :type config: ConfigurationHandler
+    :param config: Configuration providing the "massflow_estimate" section.
+    """
+
     def __init__(self, config):
-        self.c_p = config["measurement"]["massflow_estimate"]["c_p"]
-        self.resistance = config["measurement"]["massflow_estimate"]["resistance"]
-        self.voltage = config["measurement"]["massflow_estimate"]["voltage"]
-        self.massflow_SI2SLM = config["measurement"]["massflow_estimate"][
-            "massflow_SI2SLM"
-        ]
+        estimate = config["measurement"]["massflow_estimate"]
+        self._c_p = estimate["c_p"]
+        self._resistance = estimate["resistance"]
+        self._voltage = estimate["voltage"]
+        self._massflow_SI2SLM = estimate["massflow_SI2SLM"]
+        # Below this temperature difference the estimate is dominated by the noise of the temperature sensors
+        self.min_temperature_difference = estimate["min_temperature_difference"]
+        self._update_gain()
+
+    def _update_gain(self) -> None:
+        self.gain = (
+            self._massflow_SI2SLM * self._voltage**2 / (self._resistance * self._c_p)
+        )
+
+    @property
+    def c_p(self) -> float:
+        return self._c_p
+
+    @c_p.setter
+    def c_p(self, value: float) -> None:
+        self._c_p = value
+        self._update_gain()
+
+    @property
+    def resistance(self) -> float:
+        return self._resistance
 
-    def calculate(self, delta_t: float, pwm: float) -> float:
+    @resistance.setter
+    def resistance(self, value: float) -> None:
+        self._resistance = value
+        self._update_gain()
+
+    @property
+    def voltage(self) -> float:
+        return self._voltage
+
+    @voltage.setter
+    def voltage(self, value: float) -> None:
+        self._voltage = value
+        self._update_gain()
+
+    @property
+    def massflow_SI2SLM(self) -> float:
+        return self._massflow_SI2SLM
+
+    @massflow_SI2SLM.setter
+    def massflow_SI2SLM(self, value: float) -> None:
+        self._massflow_SI2SLM = value
+        self._update_gain()
+
+    def calculate(self, delta_t, pwm):
         """
         Calculate the massflow estimate depending on the measured temperature difference and the current output power
 
-        :type delta_t: float
-        :param delta_t: Measured temperature difference
-        :type pwm: float
-        :param pwm: Current output power
+        :type delta_t: np.ndarray
+        :param delta_t: Measured temperature difference, a scalar or an array
+        :type pwm: np.ndarray
+        :param pwm: Current output power, a scalar or an array broadcastable against the temperature difference
+        :return: The estimated mass flow in slm, zero where the temperature difference does not exceed
+           :attr:`min_temperature_difference`. A float for scalar arguments, an array otherwise.
         """
-        if delta_t == 0:
-            return 0
-        else:
-            return self.massflow_SI2SLM * (
-                pwm * self.voltage ** 2 / (self.resistance * self.c_p * delta_t)
-            )
+        delta_t = np.asarray(delta_t, dtype=float)
+        valid = delta_t > self.min_temperature_difference
+        # Divide by one where the estimate is discarded, avoiding divisions by zero
+        estimate = np.where(valid, self.gain * pwm / np.where(valid, delta_t, 1.0), 0.0)
+        if estimate.ndim == 0:
+            return float(estimate)
+        return estimate
@@ -0,0 +1,82 @@
+from Utility.Logger import setup_custom_logger
+from Utility.ConfigurationHandler import ConfigurationHandler
+from Utility.Schedule import Schedule
+from Utility.Supervisor import RigSupervisor
+from logging import getLevelName
+import argparse
+import signal
+import time
+
+logger = setup_custom_logger(name="root", level=getLevelName("INFO"))
+
+
+def parse_arguments(arguments=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Runs several rigs, as defined in the 'rigs' section of the configuration, each in its own "
+        "process. Crashed rigs are restarted."
+    )
+    parser.add_argument("--config", help="Path of the configuration file.")
+    parser.add_argument(
+        "--rigs", nargs="+", help="Names of the rigs to run, all rigs by default."
+    )
+    parser.add_argument(
+        "--schedule",
+        help="JSON file with the schedules applied to every rig, see headless.py.",
+    )
+    parser.add_argument(
+        "--duration",
+        type=float,
+        help="Duration of the run in seconds, runs until interrupted by default.",
+    )
+    parser.add_argument(
+        "--output",
+        default="data",
+        help="Folder the measurements of every rig are recorded to.",
+    )
+    parser.add_argument(
+        "--report-interval",
+        type=float,
+        default=10.0,
+        help="Time between two logged status summaries in seconds.",
+    )
+    return parser.parse_args(arguments)
+
+
+def main(arguments=None) -> None:
+    args = parse_arguments(arguments)
+    supervisor = RigSupervisor(
+        config=ConfigurationHandler(path=args.config).data,
+        rigs=args.rigs,
+        schedules=Schedule.load(args.schedule) if args.schedule else None,
+        duration=args.duration,
+        output=args.output,
+    )
+    # Stop the rigs gracefully, e.g. when the job is cancelled by a scheduler
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+    supervisor.start()
+    last_report = time.monotonic()
+    try:
+        while supervisor.running:
+            supervisor.monitor(timeout=1.0)
+            if time.monotonic() - last_report >= args.report_interval:
+                last_report = time.monotonic()
+                for rig, status in supervisor.summary().items():
+                    timing = status.get("timing") or dict()
+                    logger.info(
+                        "Rig {}: alive={}, restarts={}, ticks={}, overruns={}, safety trips={}".format(
+                            rig,
+                            status["alive"],
+                            status["restarts"],
+                            timing.get("ticks"),
+                            timing.get("overruns"),
+                            status.get("safety_trips"),
+                        )
+                    )
+    except KeyboardInterrupt:
+        logger.info("Supervisor interrupted.")
+    finally:
+        supervisor.stop()
+
+
+if __name__ == "__main__":
+    main()
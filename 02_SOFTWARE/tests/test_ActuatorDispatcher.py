@@ -0,0 +1,112 @@
+from Utility.ActuatorDispatcher import ActuatorDispatcher, CLOSING_ATTEMPTS
+from threading import Event
+
+
+class BlockingDevice(object):
+    """
+    Device whose writes block until released, optionally failing.
+    """
+
+    def __init__(self, fail=False) -> None:
+        self.fail = fail
+        self.writes = []
+        self.started = Event()
+        self.release = Event()
+
+    def write(self, value) -> bool:
+        success = not self.fail
+        self.writes.append(value)
+        self.started.set()
+        self.release.wait(timeout=5)
+        return success
+
+
+def test_value_in_flight_is_not_written_again():
+    device = BlockingDevice()
+    dispatcher = ActuatorDispatcher(name="Test", write=device.write)
+    dispatcher.submit(1)
+    assert device.started.wait(timeout=5)
+    dispatcher.submit(1)
+    dispatcher.submit(2)
+    dispatcher.submit(1)
+    device.release.set()
+    assert dispatcher.flush(timeout=5)
+    dispatcher.close()
+    assert device.writes == [1]
+    assert dispatcher.metrics["deduplicated"] == 2
+    assert dispatcher.metrics["coalesced"] == 1
+
+
+def test_pending_value_is_not_queued_again():
+    device = BlockingDevice()
+    dispatcher = ActuatorDispatcher(name="Test", write=device.write)
+    dispatcher.submit(1)
+    assert device.started.wait(timeout=5)
+    dispatcher.submit(2)
+    dispatcher.submit(2)
+    device.release.set()
+    assert dispatcher.flush(timeout=5)
+    dispatcher.close()
+    assert device.writes == [1, 2]
+    assert dispatcher.metrics["deduplicated"] == 1
+
+
+def test_dropped_value_is_written_after_failure():
+    device = BlockingDevice(fail=True)
+    dispatcher = ActuatorDispatcher(name="Test", write=device.write)
+    dispatcher.submit(1)
+    assert device.started.wait(timeout=5)
+    dispatcher.submit(1)
+    device.fail = False
+    device.release.set()
+    assert dispatcher.flush(timeout=5)
+    dispatcher.close()
+    assert device.writes == [1, 1]
+
+
+class FlakyDevice(object):
+    """
+    Device whose first writes fail.
+    """
+
+    def __init__(self, failures: int) -> None:
+        self.failures = failures
+        self.writes = []
+
+    def write(self, value) -> bool:
+        self.writes.append(value)
+        if len(self.writes) <= self.failures:
+            raise IOError("Write failed")
+        return True
+
+
+def test_retried_value_is_written_until_success():
+    device = FlakyDevice(failures=2)
+    dispatcher = ActuatorDispatcher(name="Test", write=device.write)
+    dispatcher.submit(0, retry=True)
+    assert dispatcher.flush(timeout=5)
+    dispatcher.close()
+    assert device.writes == [0, 0, 0]
+    # The device holds the value, no further write is needed
+    assert dispatcher._written == 0
+
+
+def test_retry_gives_way_to_newer_value():
+    device = BlockingDevice(fail=True)
+    dispatcher = ActuatorDispatcher(name="Test", write=device.write)
+    dispatcher.submit(0, retry=True)
+    assert device.started.wait(timeout=5)
+    dispatcher.submit(1)
+    device.fail = False
+    device.release.set()
+    assert dispatcher.flush(timeout=5)
+    dispatcher.close()
+    assert device.writes == [0, 1]
+
+
+def test_retry_is_bounded_after_closing():
+    device = FlakyDevice(failures=100)
+    dispatcher = ActuatorDispatcher(name="Test", write=device.write)
+    dispatcher.submit(0, retry=True)
+    dispatcher.close()
+    assert device.writes == [0] * CLOSING_ATTEMPTS
@@ -0,0 +1,54 @@
+from Utility.AsyncAcquisition import AsyncAcquisitionEngine
+from Utility.StageProfiler import StageProfiler
+import time
+
+
+class FailingSetup(object):
+    """
+    Simulated setup whose measurements fail.
+    """
+
+    def __init__(self) -> None:
+        self.profiler = StageProfiler()
+        self.measurements = 0
+
+    def measure(self) -> None:
+        self.measurements += 1
+        raise RuntimeError("Measurement failed")
+
+
+def test_failed_measurements_are_counted_and_skipped():
+    setup = FailingSetup()
+    engine = AsyncAcquisitionEngine(setup=setup, eks=None, sfc=None, interval=0.01)
+    engine.start()
+    deadline = time.monotonic() + 5
+    while setup.measurements < 3 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert not engine._task.done()
+    engine.cancel()
+    assert setup.measurements >= 3
+    assert engine.statistics["failed"] == setup.measurements
+
+
+def test_cancel_after_engine_stopped():
+    setup = FailingSetup()
+    setup.measure = lambda: None
+    engine = AsyncAcquisitionEngine(setup=setup, eks=None, sfc=None, interval=0.01)
+    engine.start()
+    # The engine stops without being cancelled through cancel()
+    engine._loop.call_soon_threadsafe(engine._task.cancel)
+    engine._thread.join(timeout=5)
+    assert engine._loop.is_closed()
+    # Must neither raise on the closed loop nor block
+    engine.cancel()
+    engine.cancel()
+
+
+def test_cancel_running_engine():
+    setup = FailingSetup()
+    setup.measure = lambda: None
+    engine = AsyncAcquisitionEngine(setup=setup, eks=None, sfc=None, interval=0.01)
+    engine.start()
+    engine.cancel()
+    assert engine._loop.is_closed()
+    assert engine.statistics["failed"] == 0
@@ -0,0 +1,57 @@
+from Simulation.Autotuner import Autotuner, pareto_front
+from Utility.ConfigurationHandler import ConfigurationHandler
+import numpy as np
+import pytest
+
+
+def dominated(objectives: np.ndarray) -> np.ndarray:
+    """
+    Brute force reference, a point is dominated if another point is at least as good in all objectives and better in
+    one of them.
+    """
+    better_or_equal = np.all(
+        objectives[:, np.newaxis] <= objectives[np.newaxis], axis=2
+    )
+    better = np.any(objectives[:, np.newaxis] < objectives[np.newaxis], axis=2)
+    return np.any(better_or_equal & better, axis=0)
+
+
+@pytest.mark.parametrize("objectives", [2, 3])
+def test_pareto_front_matches_brute_force(objectives):
+    random = np.random.default_rng(seed=objectives)
+    # Few distinct values, such that ties and duplicates occur
+    points = random.integers(0, 8, size=(300, objectives)).astype(float)
+    np.testing.assert_array_equal(pareto_front(points), ~dominated(points))
+
+
+@pytest.fixture(scope="module")
+def tuner() -> Autotuner:
+    return Autotuner(config=ConfigurationHandler().data, seed=0)
+
+
+def test_tuned_gains_are_not_dominated(tuner):
+    gains, score, effort = tuner.tune(samples=64, chunk_size=24)
+    assert np.all(np.diff(score) >= 0)
+    # Compare against all sampled triples, evaluated at once
+    all_score, all_effort = tuner.evaluate(tuner.sample(64))
+    objectives = np.column_stack((all_score, all_effort))
+    for point in np.column_stack((score, effort)):
+        assert not np.any(
+            np.all(objectives <= point, axis=1) & np.any(objectives < point, axis=1)
+        )
+    front = pareto_front(objectives)
+    np.testing.assert_allclose(np.sort(all_score[front]), score)
+
+
+def test_evaluation_is_reproducible(tuner):
+    gains = [[0.1, 0.02, 0.0], [0.5, 0.1, 0.0]]
+    np.testing.assert_array_equal(tuner.evaluate(gains), tuner.evaluate(gains))
+    # Every triple is simulated independently of the others
+    score, effort = tuner.evaluate(gains)
+    assert tuner.evaluate(gains[:1]) == (score[:1], effort[:1])
+
+
+def test_closed_loop_beats_open_loop(tuner):
+    score, effort = tuner.evaluate([[0.0, 0.0, 0.0], [0.1, 0.02, 0.0]])
+    # Without gains the heater output is held, and the disturbances are not rejected
+    assert score[1] < score[0]
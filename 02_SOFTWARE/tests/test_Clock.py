@@ -0,0 +1,36 @@
+from threading import Event
+from Utility.Clock import ScaledClock, VirtualClock
+import pytest
+import time
+
+
+def test_virtual_clock_advances_only_when_told():
+    clock = VirtualClock(start=1000.0)
+    assert clock.monotonic() == 0.0
+    clock.advance(0.25)
+    clock.sleep(1.0)
+    assert clock.monotonic() == 1.25
+    assert clock.time() == 1001.25
+    with pytest.raises(ValueError):
+        clock.advance(-1.0)
+
+
+def test_waiting_on_a_virtual_clock_advances_it():
+    clock = VirtualClock()
+    event = Event()
+    assert not clock.wait(event, timeout=2.0)
+    assert clock.monotonic() == 2.0
+    event.set()
+    # A set event returns at once, without advancing the clock
+    assert clock.wait(event, timeout=2.0)
+    assert clock.monotonic() == 2.0
+
+
+def test_scaled_clock_runs_faster_than_real_time():
+    clock = ScaledClock(speed=50)
+    start = time.monotonic()
+    assert not clock.wait(Event(), timeout=5.0)
+    assert time.monotonic() - start < 1.0
+    assert clock.monotonic() >= 5.0
+    with pytest.raises(ValueError):
+        ScaledClock(speed=0)
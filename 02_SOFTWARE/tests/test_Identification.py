@@ -0,0 +1,111 @@
+from Simulation.Identification import Identification
+from Simulation.PlantModel import PlantModel
+from Utility.ConfigurationHandler import ConfigurationHandler
+import numpy as np
+import pytest
+
+T_SAMPLING = 0.25
+PARAMETERS = {
+    "time_constant": 15.0,
+    "dead_time": 1.5,
+    "transmitted_power": 0.7,
+    "heat_loss": 0.4,
+}
+
+
+def record(config, flow_setpoints, duration=1200, seed=0) -> dict:
+    """
+    Records a step response experiment on the plant model, with the heater output switched every minute.
+    """
+    plant = PlantModel(config=config, t_sampling=T_SAMPLING, seed=seed)
+    random = np.random.default_rng(seed)
+    steps = int(duration / T_SAMPLING)
+    pwm = np.repeat(random.uniform(0.1, 0.9, size=steps // 240 + 1), 240)[:steps]
+    flow_setpoint = np.repeat(flow_setpoints, steps // len(flow_setpoints) + 1)[:steps]
+    recording = {
+        name: np.empty(steps)
+        for name in ("Time", "Temperature_Difference", "PWM", "Flow")
+    }
+    plant.reset(flow=flow_setpoint[0] * plant.max_flow)
+    for k in range(steps):
+        plant.step(pwm=pwm[k], flow_setpoint=flow_setpoint[k])
+        measurement = plant.measure()
+        recording["Time"][k] = k * T_SAMPLING
+        recording["Temperature_Difference"][k] = (
+            measurement["Temperature_2"] - measurement["Temperature_1"]
+        )[0]
+        recording["PWM"][k] = pwm[k]
+        recording["Flow"][k] = measurement["Flow"][0]
+    return recording
+
+
+@pytest.fixture
+def config() -> ConfigurationHandler:
+    config = ConfigurationHandler()
+    config["simulation"].update(PARAMETERS)
+    return config
+
+
+def test_known_parameters_are_recovered(config):
+    recording = record(config, flow_setpoints=[0.3, 0.7, 0.5, 0.2])
+    result = Identification(config=config.data).fit(recording)
+    assert result["excited"] and result["stable"] and result["heat_loss_identified"]
+    assert result["time_constant"] == pytest.approx(
+        PARAMETERS["time_constant"], rel=0.05
+    )
+    assert result["dead_time"] == PARAMETERS["dead_time"]
+    assert result["transmitted_power"] == pytest.approx(
+        PARAMETERS["transmitted_power"], rel=0.05
+    )
+    assert result["heat_loss"] == pytest.approx(PARAMETERS["heat_loss"], abs=0.05)
+    assert result["fit"] > 95
+
+
+def test_heat_loss_is_kept_at_constant_flow(config):
+    # Identified with a wrong heat loss, the transmitted power is off, but the dynamics are recovered
+    config["simulation"]["heat_loss"] = 0.5
+    recording = record(config, flow_setpoints=[0.6])
+    config["simulation"]["heat_loss"] = 1.0
+    result = Identification(config=config.data).fit(recording)
+    assert not result["heat_loss_identified"]
+    assert result["heat_loss"] == 1.0
+    assert result["transmitted_power"] > 0.8
+    assert result["time_constant"] == pytest.approx(
+        PARAMETERS["time_constant"], rel=0.05
+    )
+    assert result["dead_time"] == PARAMETERS["dead_time"]
+
+
+def test_second_order_fit_finds_the_dominant_time_constant(config):
+    recording = record(config, flow_setpoints=[0.3, 0.7])
+    result = Identification(config=config.data, order=2).fit(recording)
+    assert result["stable"]
+    assert result["time_constants"][0] == pytest.approx(
+        PARAMETERS["time_constant"], rel=0.1
+    )
+
+
+def test_unexcited_recordings_are_not_written(config):
+    recording = record(config, flow_setpoints=[0.6])
+    recording["PWM"][:] = 0
+    recording["Temperature_Difference"][:] = 0.01 * np.sin(recording["Time"])
+    identification = Identification(config=config.data)
+    result = identification.fit(recording)
+    assert not result["excited"]
+    with pytest.raises(ValueError):
+        identification.write({"flat.mat": result}, config=config, save=False)
+
+
+def test_identified_parameters_are_written(config):
+    identification = Identification(config=config.data)
+    results = {
+        seed: identification.fit(
+            record(config, flow_setpoints=[0.3, 0.7], duration=600, seed=seed)
+        )
+        for seed in range(3)
+    }
+    target = ConfigurationHandler()
+    parameters = identification.write(results, config=target, save=False)
+    assert set(parameters) == set(PARAMETERS)
+    for name, value in PARAMETERS.items():
+        assert target["simulation"][name] == pytest.approx(value, rel=0.1)
@@ -0,0 +1,29 @@
+from setup import MassflowEstimator
+from Utility.ConfigurationHandler import ConfigurationHandler
+import numpy as np
+import pytest
+
+
+@pytest.fixture
+def estimator() -> MassflowEstimator:
+    return MassflowEstimator(config=ConfigurationHandler().data)
+
+
+def test_scalar_estimate_is_a_float(estimator):
+    estimate = estimator.calculate(delta_t=6.0, pwm=0.5)
+    assert type(estimate) is float
+    assert estimate == pytest.approx(estimator.gain * 0.5 / 6.0)
+
+
+def test_small_and_negative_temperature_differences_are_discarded(estimator):
+    threshold = estimator.min_temperature_difference
+    delta_t = np.array([-6.0, -threshold, 0.0, threshold / 2, threshold, 6.0])
+    estimate = estimator.calculate(delta_t=delta_t, pwm=np.full(6, 0.5))
+    np.testing.assert_array_equal(estimate[:-1], 0.0)
+    assert estimate[-1] == pytest.approx(estimator.gain * 0.5 / 6.0)
+
+
+def test_gain_follows_changed_constants(estimator):
+    before = estimator.calculate(delta_t=6.0, pwm=0.5)
+    estimator.voltage = 2 * estimator.voltage
+    assert estimator.calculate(delta_t=6.0, pwm=0.5) == pytest.approx(4 * before)
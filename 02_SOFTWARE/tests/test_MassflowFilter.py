@@ -0,0 +1,34 @@
+from Simulation.Simulator import Simulator
+from Utility.ConfigurationHandler import ConfigurationHandler
+from Utility.Scenario import Scenario
+from Utility.Schedule import Schedule
+import numpy as np
+import pytest
+
+
+def simulate(config, flow=0.6, pwm=0.5, duration=300) -> dict:
+    scenario = Scenario(
+        schedules={"flow": Schedule([(0, flow)]), "pwm": Schedule([(0, pwm)])},
+        duration=duration,
+    )
+    return Simulator(config=config, seed=0).run(scenario)
+
+
+@pytest.mark.parametrize(
+    "transmitted_power, heat_loss, time_constant", [(0.5, 0.5, 20), (0.8, 0.2, 35)]
+)
+def test_filter_converges_to_simulated_flow(
+    transmitted_power, heat_loss, time_constant
+):
+    config = ConfigurationHandler().data
+    config["simulation"].update(
+        transmitted_power=transmitted_power,
+        heat_loss=heat_loss,
+        time_constant=time_constant,
+    )
+    signals = simulate(config)
+    flow = np.mean(signals["Flow"][-100:])
+    filtered = signals["Flow_Estimate_Filtered"][-100:]
+    assert flow == pytest.approx(60, abs=1)
+    assert np.mean(filtered) == pytest.approx(flow, abs=1)
+    assert np.max(np.abs(filtered - flow)) < 5
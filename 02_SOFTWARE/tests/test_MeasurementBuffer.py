@@ -0,0 +1,321 @@
+from Utility.MeasurementBuffer import MeasurementBuffer
+from Utility.SegmentStore import SegmentStore
+from threading import Thread
+import numpy as np
+import pytest
+
+SIGNALS = ["Time", "Flow"]
+
+
+def measurement(sequence: int) -> dict:
+    return {"Time": 100.0 + sequence, "Flow": 2.0 * sequence}
+
+
+def fill(buffer: MeasurementBuffer, count: int, start=0) -> None:
+    for sequence in range(start, start + count):
+        buffer.update(measurement(sequence))
+
+
+@pytest.fixture
+def buffer() -> MeasurementBuffer:
+    return MeasurementBuffer(signals=SIGNALS, sampling_time_s=1, buffer_interval_s=10)
+
+
+@pytest.fixture
+def spilling_buffer(tmp_path) -> MeasurementBuffer:
+    store = SegmentStore(folder=str(tmp_path), signals=SIGNALS, segment_length=8)
+    buffer = MeasurementBuffer(
+        signals=SIGNALS, sampling_time_s=1, buffer_interval_s=10, segment_store=store
+    )
+    fill(buffer, 35)
+    return buffer
+
+
+def test_window_reads_spilled_measurements(spilling_buffer):
+    snapshot = spilling_buffer.window(t0=103, t1=130)
+    assert snapshot.first == 3
+    np.testing.assert_array_equal(snapshot["Time"], 100.0 + np.arange(3, 31))
+    np.testing.assert_array_equal(snapshot.sequences, np.arange(3, 31))
+    history = spilling_buffer.window(t0=102.5, t1=104)
+    np.testing.assert_array_equal(history["Flow"], [6.0, 8.0])
+
+
+def test_last_reaches_beyond_the_buffer(spilling_buffer):
+    snapshot = spilling_buffer.last(seconds=20)
+    np.testing.assert_array_equal(snapshot["Time"], 100.0 + np.arange(14, 35))
+
+
+def test_at_reads_spilled_measurements(spilling_buffer):
+    assert spilling_buffer.at(t=107.5)["Flow"] == 14.0
+    assert spilling_buffer.at(t=107.5, interpolate=True)["Flow"] == 15.0
+    # Between the newest spilled and the oldest buffered measurement
+    assert spilling_buffer.at(t=124.5, interpolate=True)["Flow"] == 49.0
+    assert np.isnan(spilling_buffer.at(t=99)["Flow"])
+
+
+def test_cleared_measurements_are_not_read_back(spilling_buffer):
+    spilling_buffer.clear()
+    fill(spilling_buffer, 3, start=35)
+    assert spilling_buffer.window(t0=100).first == 35
+    assert np.isnan(spilling_buffer.at(t=110)["Flow"])
+
+
+def test_buffer_grows_until_full(buffer):
+    fill(buffer, 4)
+    assert len(buffer) == 4
+    np.testing.assert_array_equal(buffer["Flow"], 2.0 * np.arange(4))
+
+
+@pytest.mark.parametrize("k", [1, 3, 10, 17])
+def test_wraparound_keeps_the_newest_measurements(buffer, k):
+    fill(buffer, buffer.capacity + k)
+    assert len(buffer) == buffer.capacity
+    expected = np.arange(k, buffer.capacity + k)
+    np.testing.assert_array_equal(buffer["Time"], 100.0 + expected)
+    np.testing.assert_array_equal(buffer.data["Flow"], 2.0 * expected)
+
+
+def test_signals_are_read_only_views(buffer):
+    fill(buffer, 3)
+    with pytest.raises(ValueError):
+        buffer["Flow"][0] = 1.0
+    with pytest.raises(KeyError):
+        buffer["Pressure"]
+
+
+def test_incorrect_signals_are_rejected(buffer):
+    with pytest.raises(AttributeError):
+        buffer.update({"Time": 0.0})
+    assert len(buffer) == 0
+
+
+def test_snapshot_is_a_copy(buffer):
+    fill(buffer, 5)
+    snapshot = buffer.snapshot(signals=["Flow"])
+    fill(buffer, 10, start=5)
+    np.testing.assert_array_equal(snapshot["Flow"], 2.0 * np.arange(5))
+    assert (snapshot.first, snapshot.head) == (0, 5)
+    with pytest.raises(KeyError):
+        snapshot["Time"]
+
+
+def test_snapshots_are_consistent_while_writing(buffer):
+    count = 20000
+
+    def write() -> None:
+        fill(buffer, count)
+
+    writer = Thread(target=write)
+    writer.start()
+    while writer.is_alive():
+        snapshot = buffer.snapshot()
+        # All signals are cut at the same measurement
+        sequences = snapshot.sequences
+        np.testing.assert_array_equal(snapshot["Time"], 100.0 + sequences)
+        np.testing.assert_array_equal(snapshot["Flow"], 2.0 * sequences)
+        assert len(snapshot) == min(snapshot.head, buffer.capacity)
+    writer.join()
+    assert buffer.snapshot().head == count
+
+
+def test_read_since_returns_only_new_measurements(buffer):
+    fill(buffer, 4)
+    snapshot = buffer.read_since(sequence=0)
+    fill(buffer, 3, start=4)
+    update = buffer.read_since(sequence=snapshot.head)
+    assert (update.first, update.head) == (4, 7)
+    np.testing.assert_array_equal(update["Flow"], [8.0, 10.0, 12.0])
+    assert len(buffer.read_since(sequence=update.head)) == 0
+
+
+def test_read_since_starts_at_the_first_surviving_measurement(buffer):
+    fill(buffer, 4)
+    fill(buffer, 2 * buffer.capacity, start=4)
+    update = buffer.read_since(sequence=4)
+    # Measurements 4 to 13 have been overwritten
+    assert update.first == update.oldest == 14
+    np.testing.assert_array_equal(update.sequences, np.arange(14, 24))
+    np.testing.assert_array_equal(update["Time"], 100.0 + np.arange(14, 24))
+
+
+def test_sequence_numbers_continue_after_clear(buffer):
+    fill(buffer, 6)
+    buffer.clear()
+    assert len(buffer) == 0
+    assert buffer.sequence == buffer.oldest == 6
+    fill(buffer, 2, start=6)
+    update = buffer.read_since(sequence=3)
+    assert update.first == 6
+    np.testing.assert_array_equal(update["Flow"], [12.0, 14.0])
+
+
+def test_read_since_reads_spilled_measurements(spilling_buffer):
+    update = spilling_buffer.read_since(sequence=3)
+    assert (update.first, update.oldest, update.head) == (3, 25, 35)
+    np.testing.assert_array_equal(update.sequences, np.arange(3, 35))
+    np.testing.assert_array_equal(update["Flow"], 2.0 * np.arange(3, 35))
+
+
+@pytest.fixture
+def long_buffer() -> MeasurementBuffer:
+    buffer = MeasurementBuffer(
+        signals=SIGNALS, sampling_time_s=1, buffer_interval_s=1000
+    )
+    random = np.random.default_rng(seed=0)
+    for sequence, flow in enumerate(random.normal(size=2500)):
+        buffer.update({"Time": 100.0 + sequence, "Flow": flow})
+    return buffer
+
+
+def summarize(
+    buffer: MeasurementBuffer, bucket_size: int, t0=None, t1=None, origin=0
+) -> dict:
+    """
+    Brute force reference for the buckets returned by MeasurementBuffer.decimated.
+    """
+    snapshot = buffer.snapshot()
+    selected = np.ones(len(snapshot), dtype=bool)
+    if t0 is not None:
+        selected &= snapshot["Time"] >= t0
+    if t1 is not None:
+        selected &= snapshot["Time"] <= t1
+    # Buckets are aligned to multiples of the bucket size, counted from the first measurement after clearing
+    buckets = (snapshot.sequences - origin) // bucket_size
+    summary = {"min": [], "max": [], "mean": []}
+    for bucket in np.unique(buckets[selected]):
+        values = snapshot["Flow"][buckets == bucket]
+        summary["min"].append(values.min())
+        summary["max"].append(values.max())
+        summary["mean"].append(values.mean())
+    return summary
+
+
+def test_decimated_envelope_matches_brute_force(long_buffer):
+    decimated = long_buffer.decimated(max_points=100)
+    # The finest level summarizing 1000 measurements with at most 50 buckets
+    reference = summarize(long_buffer, bucket_size=64)
+    assert decimated.first == long_buffer.oldest == 1500
+    np.testing.assert_array_equal(decimated["Flow"][0::2], reference["min"])
+    np.testing.assert_array_equal(decimated["Flow"][1::2], reference["max"])
+    assert decimated["Time"][0] == 1600.0
+    assert decimated["Time"][-1] == 2599.0
+
+
+def test_decimated_mean_matches_brute_force(long_buffer):
+    decimated = long_buffer.decimated(max_points=50, envelope=False)
+    reference = summarize(long_buffer, bucket_size=64)
+    np.testing.assert_allclose(decimated["Flow"], reference["mean"])
+
+
+def test_decimated_time_range_matches_brute_force(long_buffer):
+    decimated = long_buffer.decimated(max_points=20, t0=1800.5, t1=2300)
+    reference = summarize(long_buffer, bucket_size=64, t0=1800.5, t1=2300)
+    np.testing.assert_array_equal(decimated["Flow"][0::2], reference["min"])
+    np.testing.assert_array_equal(decimated["Flow"][1::2], reference["max"])
+
+
+def test_decimated_is_trimmed_to_the_buffer(long_buffer):
+    long_buffer.clear()
+    for sequence in range(2500, 2800):
+        long_buffer.update({"Time": 100.0 + sequence, "Flow": float(sequence)})
+    decimated = long_buffer.decimated(max_points=20)
+    # Cleared measurements do not contribute to the first bucket
+    assert decimated.first == 2500
+    assert decimated["Flow"][0] == 2500.0
+    assert decimated["Flow"][-1] == 2799.0
+    reference = summarize(long_buffer, bucket_size=64, origin=2500)
+    np.testing.assert_array_equal(decimated["Flow"][0::2], reference["min"])
+    np.testing.assert_array_equal(decimated["Flow"][1::2], reference["max"])
+
+
+def test_few_measurements_are_not_decimated(long_buffer):
+    decimated = long_buffer.decimated(max_points=100, t0=2000, t1=2049)
+    np.testing.assert_array_equal(decimated.sequences, np.arange(1900, 1950))
+    np.testing.assert_array_equal(decimated["Time"], 100.0 + np.arange(1900, 1950))
+
+
+def assert_statistics(statistics: dict, values: np.ndarray) -> None:
+    assert statistics["count"] == len(values)
+    assert statistics["sum"] == pytest.approx(np.sum(values))
+    assert statistics["mean"] == pytest.approx(np.mean(values))
+    assert statistics["std"] == pytest.approx(np.std(values), abs=1e-9)
+    assert statistics["minimum"] == np.min(values)
+    assert statistics["maximum"] == np.max(values)
+
+
+def test_statistics_match_numpy_over_the_window(buffer):
+    random = np.random.default_rng(seed=1)
+    flows = random.normal(size=57)
+    for sequence, flow in enumerate(flows):
+        buffer.update({"Time": float(sequence), "Flow": flow})
+        window = flows[max(sequence + 1 - buffer.capacity, 0) : sequence + 1]
+        assert_statistics(buffer.statistics("Flow"), window)
+
+
+def test_statistics_stay_accurate_with_large_offsets(buffer):
+    random = np.random.default_rng(seed=2)
+    flows = 1e6 + random.normal(size=10005)
+    for sequence, flow in enumerate(flows):
+        buffer.update({"Time": float(sequence), "Flow": flow})
+    # Rounding errors of the running sums are removed once per buffer length
+    statistics = buffer.statistics("Flow")
+    assert statistics["std"] == pytest.approx(np.std(flows[-10:]), rel=1e-6)
+    assert statistics["mean"] == pytest.approx(np.mean(flows[-10:]), rel=1e-12)
+
+
+def test_registered_statistic_covers_buffered_measurements(buffer):
+    fill(buffer, 14)
+    buffer.register_statistic("Error", lambda m: (m["Flow"] - 20.0) ** 2)
+    fill(buffer, 3, start=14)
+    errors = (2.0 * np.arange(7, 17) - 20.0) ** 2
+    assert_statistics(buffer.statistics("Error"), errors)
+    with pytest.raises(RuntimeError):
+        buffer.register_statistic("Flow", lambda m: m["Flow"])
+    with pytest.raises(KeyError):
+        buffer.statistics("Pressure")
+
+
+def test_statistics_of_an_empty_window(buffer):
+    fill(buffer, 5)
+    buffer.clear()
+    statistics = buffer.statistics("Flow")
+    assert statistics["count"] == 0
+    assert statistics["sum"] == 0.0
+    assert np.isnan(statistics["mean"])
+    assert np.isnan(statistics["minimum"])
+    fill(buffer, 2, start=5)
+    assert_statistics(buffer.statistics("Flow"), np.array([10.0, 12.0]))
+
+
+def test_window_selects_an_inclusive_time_range(buffer):
+    fill(buffer, 15)
+    snapshot = buffer.window(t0=107, t1=109.5, signals=["Flow"])
+    assert snapshot.first == 7
+    np.testing.assert_array_equal(snapshot["Flow"], [14.0, 16.0, 18.0])
+    np.testing.assert_array_equal(buffer.window(t0=112)["Time"], [112.0, 113.0, 114.0])
+    np.testing.assert_array_equal(buffer.window(t1=105.5).sequences, [5])
+    assert len(buffer.window(t0=109.2, t1=109.8)) == 0
+    assert len(buffer.window(t0=110, t1=105)) == 0
+    assert len(buffer.window(t0=200)) == 0
+
+
+def test_last_counts_back_from_the_newest_measurement(buffer):
+    assert len(buffer.last(seconds=5)) == 0
+    fill(buffer, 15)
+    np.testing.assert_array_equal(
+        buffer.last(seconds=2.5)["Time"], [112.0, 113.0, 114.0]
+    )
+    np.testing.assert_array_equal(buffer.last(seconds=100).sequences, np.arange(5, 15))
+
+
+def test_at_reads_single_measurements(buffer):
+    assert np.isnan(buffer.at(t=None)["Flow"])
+    fill(buffer, 15)
+    assert buffer.at(t=None) == {"Time": 114.0, "Flow": 28.0}
+    assert buffer.at(t=108)["Flow"] == 16.0
+    assert buffer.at(t=108.75, signals=["Flow"]) == {"Flow": 16.0}
+    assert buffer.at(t=108.75, interpolate=True)["Flow"] == 17.5
+    assert buffer.at(t=200)["Flow"] == 28.0
+    assert np.isnan(buffer.at(t=200, interpolate=True)["Flow"])
+    # Overwritten measurements are not available without a segment store
+    assert np.isnan(buffer.at(t=104.5)["Flow"])
@@ -0,0 +1,48 @@
+from Utility.MeasurementBuffer import MeasurementBuffer
+from Utility.MeasurementFrame import MeasurementSchema
+import numpy as np
+import pytest
+
+
+@pytest.fixture
+def schema() -> MeasurementSchema:
+    return MeasurementSchema(signals=["Time", "Flow", "Temperature"])
+
+
+def test_frame_follows_the_schema(schema):
+    frame = schema.new_frame()
+    frame["Flow"] = 3.0
+    frame["Time"] = 1.5
+    np.testing.assert_array_equal(frame.values, [1.5, 3.0, 0.0])
+    assert frame.as_dict() == {"Time": 1.5, "Flow": 3.0, "Temperature": 0.0}
+    assert schema.index("Temperature") == 2
+    with pytest.raises(KeyError):
+        schema.index("Pressure")
+
+
+@pytest.mark.parametrize("signals", [["Time", "Flow", "Time"], ["Time", "Flow rate"]])
+def test_invalid_signal_names_are_rejected(signals):
+    with pytest.raises(RuntimeError):
+        MeasurementSchema(signals=signals)
+
+
+def test_buffer_stores_reused_frames(schema):
+    buffer = MeasurementBuffer(signals=schema, sampling_time_s=1, buffer_interval_s=10)
+    assert buffer.schema is schema
+    frame = schema.new_frame()
+    for sequence in range(3):
+        frame["Time"] = float(sequence)
+        frame["Flow"] = 2.0 * sequence
+        buffer.update(frame)
+    # The frame is copied into the buffer, not referenced
+    frame["Flow"] = -1.0
+    np.testing.assert_array_equal(buffer["Flow"], [0.0, 2.0, 4.0])
+    np.testing.assert_array_equal(buffer["Time"], [0.0, 1.0, 2.0])
+
+
+def test_frames_of_another_schema_are_rejected(schema):
+    buffer = MeasurementBuffer(signals=schema, sampling_time_s=1, buffer_interval_s=10)
+    other = MeasurementSchema(signals=schema.signals)
+    with pytest.raises(AttributeError):
+        buffer.update(other.new_frame())
+    assert len(buffer) == 0
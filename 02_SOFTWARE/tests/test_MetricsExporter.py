@@ -0,0 +1,74 @@
+from setup import Setup
+from urllib.request import urlopen
+from Utility.ConfigurationHandler import ConfigurationHandler
+from Utility.MetricsExporter import MetricsExporter, PROMETHEUS_CONTENT_TYPE
+import pytest
+
+
+@pytest.fixture
+def setup() -> Setup:
+    setup = Setup(config=ConfigurationHandler())
+    setup.simulation_mode = True
+    for _ in range(3):
+        setup.measure()
+    setup.safety_trips["low_flow"] = 2
+    setup.error_low_flow = True
+    setup.profiler.enabled = True
+    for latency_ms in (2, 4, 4, 8):
+        setup.profiler.record("eks", latency_ns=latency_ms * 1000000)
+    return setup
+
+
+def samples(text: str) -> dict:
+    """
+    Parses the samples of a metrics text into a dictionary mapping each metric name with labels to its value.
+    """
+    return {
+        line.rsplit(" ", 1)[0]: float(line.rsplit(" ", 1)[1])
+        for line in text.splitlines()
+        if not line.startswith("#")
+    }
+
+
+def test_render_reports_the_setup_state(setup):
+    text = MetricsExporter(setup=setup).render()
+    values = samples(text)
+    assert values["massflow_buffer_measurements"] == 3
+    assert values['massflow_safety_trips_total{reason="low_flow"}'] == 2
+    assert values['massflow_safety_error{reason="low_flow"}'] == 1
+    assert values['massflow_safety_error{reason="high_temperature"}'] == 0
+    assert values["massflow_simulation_mode"] == 1
+    latency = (
+        'massflow_device_latency_seconds{{device="EKS",operation="read",quantile="{}"}}'
+    )
+    assert values[latency.format("1")] == 0.008
+    assert 0.004 <= values[latency.format("0.5")] <= 0.004 * 2**0.25
+    assert (
+        values['massflow_device_latency_seconds_count{device="EKS",operation="read"}']
+        == 4
+    )
+    assert values[
+        'massflow_device_latency_seconds_sum{device="EKS",operation="read"}'
+    ] == pytest.approx(0.018)
+    # Without a running measurement thread no timing is reported
+    assert "massflow_ticks_total" not in values
+    # Every metric is described once, ahead of its samples
+    assert text.count("# TYPE massflow_device_latency_seconds summary") == 1
+    assert text.index("# HELP massflow_safety_error ") < text.index(
+        "massflow_safety_error{"
+    )
+
+
+def test_metrics_are_served_and_written(setup, tmp_path):
+    file = tmp_path / "metrics" / "rig.prom"
+    exporter = MetricsExporter(setup=setup, port=0, file=str(file), interval=0.05)
+    exporter.start()
+    try:
+        port = exporter._server.server_address[1]
+        with urlopen("http://127.0.0.1:{}/metrics".format(port), timeout=5) as response:
+            assert response.headers["Content-Type"] == PROMETHEUS_CONTENT_TYPE
+            served = response.read().decode("utf-8")
+    finally:
+        exporter.stop()
+    assert samples(served)["massflow_buffer_measurements"] == 3
+    assert samples(file.read_text())["massflow_buffer_measurements"] == 3
@@ -0,0 +1,88 @@
+from Simulation.PlantModel import PlantModel
+from Utility.ConfigurationHandler import ConfigurationHandler
+import numpy as np
+import pytest
+
+T_SAMPLING = 0.25
+
+
+@pytest.fixture
+def config() -> dict:
+    return ConfigurationHandler().data
+
+
+def test_steady_state_follows_the_gain(config):
+    flows = np.array([0.0, 30.0, 60.0, 100.0])
+    plant = PlantModel(config=config, t_sampling=T_SAMPLING, n=4)
+    for _ in range(4000):
+        plant.step(pwm=0.5, flow_setpoint=flows / 100)
+    np.testing.assert_allclose(plant.flow, flows)
+    np.testing.assert_allclose(plant.temperature_difference, 0.5 * plant.gain(flows))
+    gains = plant.gain(flows)
+    # The gain drops with the flow, but stays finite without flow
+    assert np.all(np.diff(gains) < 0)
+    assert gains[0] == pytest.approx(plant.heater_power / plant.heat_loss)
+
+
+def test_step_response_is_delayed_first_order_lag(config):
+    simulation = config["simulation"]
+    plant = PlantModel(config=config, t_sampling=T_SAMPLING)
+    plant.reset(flow=60.0)
+    delay = int(round(simulation["dead_time"] / T_SAMPLING))
+    response = []
+    for _ in range(200):
+        plant.step(pwm=1.0, flow_setpoint=0.6)
+        response.append(plant.temperature_difference[0])
+    response = np.array(response)
+    np.testing.assert_array_equal(response[:delay], 0.0)
+    k = np.arange(1, 200 - delay + 1)
+    expected = plant.gain(60.0) * (
+        1 - np.exp(-k * T_SAMPLING / simulation["time_constant"])
+    )
+    np.testing.assert_allclose(response[delay:], expected)
+
+
+def test_plants_are_simulated_independently(config):
+    pwm = np.array([0.2, 0.9])
+    flow_setpoint = np.array([0.8, 0.3])
+    batch = PlantModel(config=config, t_sampling=T_SAMPLING, n=2)
+    single = [PlantModel(config=config, t_sampling=T_SAMPLING) for _ in range(2)]
+    for _ in range(100):
+        batch.step(pwm=pwm, flow_setpoint=flow_setpoint)
+        for index, plant in enumerate(single):
+            plant.step(pwm=pwm[index], flow_setpoint=flow_setpoint[index])
+    for index, plant in enumerate(single):
+        assert batch.temperature_difference[index] == pytest.approx(
+            plant.temperature_difference[0]
+        )
+        assert batch.flow[index] == pytest.approx(plant.flow[0])
+
+
+def test_measurements_are_reproducible(config):
+    first, second = (
+        PlantModel(config=config, t_sampling=T_SAMPLING, seed=3) for _ in range(2)
+    )
+    first.reset(temperature_difference=5.0)
+    second.reset(temperature_difference=5.0)
+    measurement = first.measure()
+    for signal, values in second.measure().items():
+        np.testing.assert_array_equal(measurement[signal], values)
+    assert measurement["Temperature_2"] - measurement["Temperature_1"] == pytest.approx(
+        5.0, abs=0.2
+    )
+
+
+def test_heat_loss_has_to_be_positive(config):
+    config["simulation"]["heat_loss"] = 0
+    with pytest.raises(ValueError):
+        PlantModel(config=config, t_sampling=T_SAMPLING)
+
+
+def test_shared_noise_is_independent_of_the_number_of_plants(config):
+    single = PlantModel(config=config, t_sampling=T_SAMPLING, seed=1, shared_noise=True)
+    batch = PlantModel(
+        config=config, t_sampling=T_SAMPLING, n=3, seed=1, shared_noise=True
+    )
+    measurement = single.measure()
+    for signal, values in batch.measure().items():
+        np.testing.assert_array_equal(values, np.repeat(measurement[signal], 3))
@@ -0,0 +1,85 @@
+from Simulation.Replay import Replay, load_recording
+from Simulation.Simulator import Simulator
+from Utility.ConfigurationHandler import ConfigurationHandler
+from Utility.Scenario import Scenario
+from Utility.Schedule import Schedule
+import numpy as np
+import pytest
+
+GAINS = [0.05, 0.01, 0.0]
+
+
+@pytest.fixture(scope="module")
+def config() -> dict:
+    config = ConfigurationHandler().data
+    # Noise free, such that the replayed plant follows the recorded one
+    config["simulation"].update(noise_temperature=0, noise_flow=0)
+    return config
+
+
+@pytest.fixture(scope="module")
+def recordings(config, tmp_path_factory) -> list:
+    """
+    Records simulated closed loop runs with different flows, saved like by the setup. The whole run fits into the
+    measurement buffer.
+    """
+    folder = tmp_path_factory.mktemp("recordings")
+    for index, flow in enumerate(["0:0.6", "0:0.6, 40:0.4"]):
+        simulator = Simulator(config=config, seed=0)
+        simulator.setup.set_pid_parameters(*GAINS)
+        scenario = Scenario(
+            schedules={"setpoint": Schedule.parse("6"), "flow": Schedule.parse(flow)},
+            duration=60,
+        )
+        simulator.run(scenario)
+        simulator.setup.save_measurement_buffer(
+            folder=str(folder), name="Recording_{}".format(index)
+        )
+    return sorted(str(path) for path in folder.glob("*.mat"))
+
+
+def test_estimate_is_recomputed(config, recordings):
+    recording = load_recording(recordings[0])
+    signals, metrics = Replay(config=config).run(recording)
+    np.testing.assert_allclose(signals["Flow_Estimate"], recording["Flow_Estimate"])
+    assert metrics["samples"] == len(recording["Time"])
+    assert metrics["squared_control_error_recorded"] == pytest.approx(
+        np.mean((recording["Temperature_Difference"] - 6) ** 2)
+    )
+    assert "squared_control_error_simulated" not in metrics
+
+
+def test_recorded_controller_is_reproduced(config, recordings):
+    recording = load_recording(recordings[1])
+    replay = Replay(config=config, gains=[GAINS, [0.0, 0.0, 0.0]])
+    signals, metrics = replay.run(recording)
+    assert signals["Controller_Output"].shape == (2, len(recording["Time"]))
+    # Open loop on the recorded temperature difference, the recorded gains command the recorded output
+    np.testing.assert_allclose(
+        signals["Controller_Output"][0], recording["Controller_Output"], atol=1e-9
+    )
+    np.testing.assert_array_equal(signals["Controller_Output"][1], 0.0)
+    # Closed loop, the plant model follows the recording
+    np.testing.assert_allclose(
+        signals["Temperature_Difference_Simulated"][0],
+        recording["Temperature_Difference"],
+        atol=0.5,
+    )
+    errors = metrics["squared_control_error_simulated"]
+    assert errors[0] == pytest.approx(
+        metrics["squared_control_error_recorded"], rel=0.2
+    )
+    # Without heating the setpoint is missed by its full value
+    assert errors[1] > 20
+
+
+def test_files_are_replayed_in_parallel(config, recordings):
+    replay = Replay(config=config, gains=[GAINS])
+    sequential = replay.run_files(recordings, processes=1)
+    parallel = replay.run_files(recordings, processes=2)
+    assert list(parallel) == recordings
+    for file_name, (signals, metrics) in sequential.items():
+        np.testing.assert_array_equal(
+            parallel[file_name][0]["PWM_Simulated"], signals["PWM_Simulated"]
+        )
+        assert parallel[file_name][1]["samples"] == metrics["samples"]
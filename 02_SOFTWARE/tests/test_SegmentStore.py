@@ -0,0 +1,89 @@
+from Utility.SegmentStore import SEGMENT_HEADER_BYTES, SegmentStore, load_segment
+import json
+import numpy as np
+
+
+def columns(start: int, count: int) -> np.ndarray:
+    time = 1000.0 + np.arange(start, start + count)
+    return np.vstack((time, 2 * time))
+
+
+def test_open_segment_is_readable_without_closing(tmp_path):
+    store = SegmentStore(folder=str(tmp_path), signals=["Time", "Flow"])
+    store.append(sequence=0, columns=columns(0, 3))
+    store.append(sequence=3, columns=columns(3, 2))
+    # The store is not closed, like after a crash of the writing process
+    (path,) = tmp_path.glob("*.seg")
+    header, signals = load_segment(str(path))
+    assert not header["sealed"]
+    assert header["length"] == 5
+    assert header["time_end"] == 1004.0
+    np.testing.assert_array_equal(signals["Time"], columns(0, 5)[0])
+    np.testing.assert_array_equal(signals["Flow"], columns(0, 5)[1])
+
+
+def test_loader_recovers_measurements_ahead_of_the_header(tmp_path):
+    store = SegmentStore(folder=str(tmp_path), signals=["Time", "Flow"])
+    store.append(sequence=0, columns=columns(0, 3))
+    # Measurements written without updating the header
+    store._segments[-1].data[:, 3:5] = columns(3, 2)
+    (path,) = tmp_path.glob("*.seg")
+    header, signals = load_segment(str(path))
+    assert header["length"] == 5
+    np.testing.assert_array_equal(signals["Time"], columns(0, 5)[0])
+
+
+def test_sealed_segment(tmp_path):
+    store = SegmentStore(folder=str(tmp_path), signals=["Time", "Flow"])
+    store.append(sequence=0, columns=columns(0, 4))
+    store.close()
+    (path,) = tmp_path.glob("*.seg")
+    header, signals = load_segment(str(path))
+    assert header["sealed"]
+    assert len(signals["Time"]) == 4
+
+
+def test_header_is_written_periodically(tmp_path):
+    store = SegmentStore(
+        folder=str(tmp_path), signals=["Time", "Flow"], header_interval=3
+    )
+    for sequence in range(4):
+        store.append(sequence=sequence, columns=columns(sequence, 1))
+    (path,) = tmp_path.glob("*.seg")
+    with open(str(path), "rb") as file:
+        header = json.loads(file.read(SEGMENT_HEADER_BYTES).decode("utf-8"))
+    assert header["length"] == 3
+    assert load_segment(str(path))[0]["length"] == 4
+
+
+def test_read_across_sealed_segments(tmp_path):
+    store = SegmentStore(
+        folder=str(tmp_path), signals=["Time", "Flow"], segment_length=4
+    )
+    store.append(sequence=0, columns=columns(0, 10))
+    # A gap in the sequence numbers starts a new segment
+    store.append(sequence=20, columns=columns(20, 3))
+    # Only the segment being written stays mapped
+    assert [segment.data is None for segment in store._segments] == [
+        True,
+        True,
+        True,
+        False,
+    ]
+    np.testing.assert_array_equal(store.read(start=2, stop=9), columns(2, 7))
+    result = store.read(start=8, stop=22, rows=[0])
+    np.testing.assert_array_equal(result[0, :2], columns(8, 2)[0])
+    assert np.isnan(result[0, 2:12]).all()
+    np.testing.assert_array_equal(result[0, 12:], columns(20, 2)[0])
+
+
+def test_search_locates_times(tmp_path):
+    store = SegmentStore(
+        folder=str(tmp_path), signals=["Time", "Flow"], segment_length=4
+    )
+    store.append(sequence=0, columns=columns(0, 10))
+    assert store.search(999.0) == 0
+    assert store.search(1005.0, side="left") == 5
+    assert store.search(1005.0, side="right") == 6
+    assert store.search(1004.5) == 5
+    assert store.search(1020.0) == 10
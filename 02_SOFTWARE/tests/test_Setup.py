@@ -0,0 +1,123 @@
+from concurrent.futures import ThreadPoolExecutor
+from setup import Setup
+from Utility.ActuatorDispatcher import ActuatorDispatcher
+from Utility.Clock import VirtualClock
+from Utility.ConfigurationHandler import ConfigurationHandler
+from threading import Barrier, Event
+import numpy as np
+import pytest
+
+
+class FakeDevice(object):
+    """
+    Device returning a fixed measurement, optionally only once all devices sharing the barrier are measured.
+    """
+
+    def __init__(self, result, barrier=None) -> None:
+        self.result = result
+        self.barrier = barrier
+
+    def measure(self):
+        if self.barrier is not None:
+            self.barrier.wait()
+        return self.result
+
+
+@pytest.fixture
+def setup() -> Setup:
+    setup = Setup(config=ConfigurationHandler())
+    yield setup
+    if setup._acquisition_pool is not None:
+        setup._acquisition_pool.shutdown(wait=True)
+
+
+def attach_devices(setup: Setup, barrier=None) -> None:
+    setup._eks = FakeDevice(
+        [
+            {"Temperature": 20.0, "Humidity": 40.0},
+            {"Temperature": 26.5, "Humidity": 30.0},
+        ],
+        barrier=barrier,
+    )
+    setup._sfc = FakeDevice({"Flow": 0.3}, barrier=barrier)
+
+
+def test_devices_are_polled_concurrently(setup):
+    # Both devices block until the other one is measured as well
+    attach_devices(setup, barrier=Barrier(2, timeout=5))
+    setup._acquisition_pool = ThreadPoolExecutor(max_workers=2)
+    frame = setup.next_frame()
+    setup._measure_normal_mode(frame=frame)
+    assert frame["Temperature_Difference"] == 6.5
+    assert frame["Humidity_2"] == 30.0
+    assert frame["Flow"] == 0.3
+
+
+def test_devices_are_polled_sequentially_by_default(setup):
+    assert not setup._concurrent_acquisition
+    attach_devices(setup)
+    frame = setup.next_frame()
+    setup._measure_normal_mode(frame=frame)
+    assert frame["Temperature_1"] == 20.0
+    assert frame["Flow"] == 0.3
+    assert frame["Time_SFC"] >= frame["Time_EKS"]
+
+
+def test_control_runs_at_the_sampling_rate_and_logging_is_decimated():
+    config = ConfigurationHandler()
+    config["general"].update(t_sampling=0.25, t_logging=1.0)
+    clock = VirtualClock()
+    setup = Setup(config=config, clock=clock)
+    setup.simulation_mode = True
+    setup.set_pid_parameters(kp=0.1, ki=0.01, kd=0)
+    setup.set_flow(0.5)
+    setup.start_pid_controller(setpoint=8)
+    setup.enable_output()
+    outputs = []
+    for _ in range(20):
+        clock.advance(0.25)
+        setup.measure()
+        outputs.append(setup.state["Controller_Output"])
+    # The controller is updated on every measurement, the buffer only stores every fourth one
+    assert len(set(outputs)) == 20
+    assert len(setup.measurement_buffer) == 5
+    np.testing.assert_array_equal(np.diff(setup.measurement_buffer["Time"]), 1.0)
+    np.testing.assert_array_equal(
+        setup.measurement_buffer["Controller_Output"], outputs[3::4]
+    )
+
+
+class FlakyHeater(object):
+    """
+    Heater whose writes fail until released.
+    """
+
+    def __init__(self) -> None:
+        self.duty_cycles = []
+        self.working = Event()
+
+    def set_pwm(self, pwm_bit: int, dc: int) -> None:
+        self.duty_cycles.append(dc)
+        if not self.working.is_set():
+            raise IOError("No response from the heater")
+
+
+def test_pwm_is_registered_once_the_heater_is_off():
+    setup = Setup(config=ConfigurationHandler())
+    heater = FlakyHeater()
+    setup._heater = heater
+    setup._heater_dispatcher = ActuatorDispatcher(
+        name="Heater", write=setup._write_heater
+    )
+    # The heater was left on
+    setup._current_pwm_value = 0.5
+    setup.disable_output()
+    setup.disable_output()
+    assert not setup._heater_dispatcher.flush(timeout=0.3)
+    assert setup.get_current_pwm_value() == 0.5
+    heater.working.set()
+    assert setup._heater_dispatcher.flush(timeout=5)
+    setup._heater_dispatcher.close()
+    assert setup.get_current_pwm_value() == 0
+    assert len(heater.duty_cycles) > 2
+    assert set(heater.duty_cycles) == {0}
@@ -0,0 +1,55 @@
+from Utility.SharedMeasurementRing import SharedMeasurementRing
+import numpy as np
+import pytest
+
+SIGNALS = ["Time", "Flow"]
+STATUS = ["pwm"]
+
+
+@pytest.fixture
+def rings():
+    writer = SharedMeasurementRing(signals=SIGNALS, capacity=4, status=STATUS)
+    reader = SharedMeasurementRing.attach(
+        name=writer.name, signals=SIGNALS, capacity=4, status=STATUS
+    )
+    yield writer, reader
+    reader.close()
+    writer.close()
+    writer.unlink()
+
+
+def test_read_since_across_attach(rings):
+    writer, reader = rings
+    for sequence in range(3):
+        writer.append(np.array([sequence, 2.0 * sequence]))
+    first, array = reader.read_since(None)
+    assert first == 0
+    np.testing.assert_array_equal(array, [[0, 1, 2], [0, 2, 4]])
+    for sequence in range(3, 7):
+        writer.append(np.array([sequence, 2.0 * sequence]))
+    # Measurements 1 and 2 have been overwritten
+    first, array = reader.read_since(1)
+    assert first == 3
+    np.testing.assert_array_equal(array[0], [3, 4, 5, 6])
+    assert reader.read_since(7)[1].shape == (2, 0)
+
+
+def test_latest_across_attach(rings):
+    writer, reader = rings
+    assert reader.latest() is None
+    writer.publish(state=np.array([1.0, 2.0]), status=[0.5])
+    state, status = reader.latest()
+    np.testing.assert_array_equal(state, [1.0, 2.0])
+    assert status == {"pwm": 0.5}
+
+
+def test_stalled_write_times_out(rings):
+    writer, reader = rings
+    writer.append(np.array([0.0, 0.0]))
+    # A writer killed in the middle of a write leaves the version odd
+    writer._header[0] += 1
+    writer._header[2] += 1
+    with pytest.raises(TimeoutError):
+        reader.read_since(0, timeout=0.01)
+    with pytest.raises(TimeoutError):
+        reader.latest(timeout=0.01)
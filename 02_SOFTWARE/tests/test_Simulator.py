@@ -0,0 +1,51 @@
+from Simulation.Simulator import Simulator
+from Utility.ConfigurationHandler import ConfigurationHandler
+from Utility.Scenario import Scenario
+from Utility.Schedule import Schedule
+import numpy as np
+import pytest
+import time
+
+
+def scenario(duration=300) -> Scenario:
+    return Scenario(
+        schedules={
+            "setpoint": Schedule.parse("0:5, 150:8"),
+            "flow": Schedule.parse("0.6"),
+        },
+        duration=duration,
+    )
+
+
+def simulate(seed=0, duration=300) -> dict:
+    simulator = Simulator(config=ConfigurationHandler(), seed=seed)
+    simulator.setup.set_pid_parameters(kp=0.05, ki=0.01, kd=0)
+    return simulator.run(scenario(duration=duration))
+
+
+def test_scenario_is_simulated_faster_than_real_time():
+    start = time.monotonic()
+    signals = simulate()
+    assert time.monotonic() - start < 30
+    # All measurements are returned, although the scenario exceeds the buffer
+    assert len(signals["Time"]) == 1200
+    np.testing.assert_allclose(np.diff(signals["Time"]), 0.25)
+    settled = signals["Temperature_Difference"][
+        (signals["Time"] > 100) & (signals["Time"] < 150)
+    ]
+    assert np.mean(settled) == pytest.approx(5, abs=0.5)
+    assert np.mean(signals["Temperature_Difference"][-100:]) == pytest.approx(
+        8, abs=0.5
+    )
+
+
+def test_seeded_simulations_are_reproducible():
+    first, second = simulate(seed=4, duration=30), simulate(seed=4, duration=30)
+    for signal, values in first.items():
+        np.testing.assert_array_equal(values, second[signal])
+    assert not np.array_equal(first["Flow"], simulate(seed=5, duration=30)["Flow"])
+
+
+def test_scenarios_without_duration_are_rejected():
+    with pytest.raises(ValueError):
+        Simulator(config=ConfigurationHandler()).run(scenario(duration=None))
@@ -0,0 +1,51 @@
+from Utility.StageProfiler import LatencyHistogram, StageProfiler
+import json
+import numpy as np
+import pytest
+
+
+@pytest.mark.parametrize("percent", [50, 95, 99])
+def test_percentiles_bound_the_exact_quantiles(percent):
+    random = np.random.default_rng(seed=0)
+    latencies = random.lognormal(mean=np.log(2e6), sigma=1.0, size=5000).astype(int)
+    histogram = LatencyHistogram()
+    for latency in latencies.tolist():
+        histogram.record(latency)
+    exact = np.percentile(latencies, percent)
+    # Reported as the upper bound of a bucket spanning a quarter octave
+    assert exact <= histogram.percentile(percent) <= exact * 2**0.25
+    summary = histogram.summary()
+    assert summary["count"] == 5000
+    assert summary["mean_ms"] == pytest.approx(np.mean(latencies) / 1e6)
+    assert summary["max_ms"] == np.max(latencies) / 1e6
+
+
+def test_percentiles_of_few_latencies():
+    histogram = LatencyHistogram()
+    assert histogram.percentile(50) == 0.0
+    for latency in (500, 3000, 3000, 40000):
+        histogram.record(latency)
+    assert histogram.percentile(25) == LatencyHistogram.bucket_upper_bound(0)
+    assert 3000 <= histogram.percentile(50) <= 3000 * 2**0.25
+    assert histogram.percentile(100) == 40000
+
+
+def test_stages_are_only_measured_while_enabled(tmp_path):
+    profiler = StageProfiler()
+    with profiler.stage("pid"):
+        pass
+    assert profiler.summary() == {}
+    profiler.enabled = True
+    for _ in range(3):
+        with profiler.stage("pid"):
+            pass
+    profiler.record("eks", latency_ns=2000000)
+    summary = profiler.summary()
+    assert list(summary) == ["eks", "pid"]
+    assert summary["pid"]["count"] == 3
+    assert summary["eks"]["max_ms"] == 2.0
+    with open(profiler.dump(folder=str(tmp_path))) as file:
+        content = json.load(file)
+    assert sum(content["stages"]["pid"]["counts"]) == 3
+    profiler.reset()
+    assert profiler.summary() == {}
@@ -0,0 +1,70 @@
+from Utility.ConfigurationHandler import ConfigurationHandler
+from Utility.Schedule import Schedule
+from Utility.Supervisor import RigSupervisor
+import numpy as np
+import pytest
+import time
+
+
+@pytest.fixture
+def config() -> dict:
+    config = ConfigurationHandler().data
+    serials = config["serials"]
+    config["rigs"] = {"North": dict(serials), "South": dict(serials)}
+    config["simulation"]["speed"] = 50
+    return config
+
+
+def supervise(supervisor: RigSupervisor, timeout: float) -> None:
+    supervisor.start()
+    deadline = time.monotonic() + timeout
+    try:
+        while supervisor.running and time.monotonic() < deadline:
+            supervisor.monitor(timeout=0.1)
+    finally:
+        supervisor.stop()
+
+
+def test_rigs_run_side_by_side(config, tmp_path):
+    supervisor = RigSupervisor(
+        config=config,
+        schedules={"pwm": Schedule.parse("0.3"), "flow": Schedule.parse("0.6")},
+        duration=20,
+        output=str(tmp_path),
+        status_interval=0.05,
+    )
+    supervise(supervisor, timeout=60)
+    summary = supervisor.summary()
+    assert set(summary) == {"North", "South"}
+    assert summary["North"]["pid"] != summary["South"]["pid"]
+    for rig, status in summary.items():
+        assert status["exitcode"] == 0
+        assert status["restarts"] == 0
+        assert status["simulation_mode"]
+        (output,) = tmp_path.glob("{}_*.csv".format(rig))
+        recorded = np.loadtxt(output, delimiter=",", skiprows=1, ndmin=2)
+        # 20 s sampled every 0.25 s
+        assert len(recorded) == pytest.approx(80, abs=8)
+
+
+def test_crashed_rigs_are_restarted(config):
+    # The setup cannot be created with a sampling time of zero
+    config["general"]["t_sampling"] = 0
+    supervisor = RigSupervisor(
+        config=config, rigs=["South"], duration=5, restart_delay=0.05
+    )
+    supervisor.start()
+    deadline = time.monotonic() + 60
+    try:
+        while supervisor.status["South"].restarts < 2 and time.monotonic() < deadline:
+            supervisor.monitor(timeout=0.1)
+    finally:
+        supervisor.stop()
+    status = supervisor.summary()["South"]
+    assert status["restarts"] == 2
+    assert status["exitcode"] != 0
+
+
+def test_unknown_rigs_are_rejected(config):
+    with pytest.raises(KeyError):
+        RigSupervisor(config=config, rigs=["East"])
@@ -0,0 +1,89 @@
+from Utility.Clock import VirtualClock
+from Utility.Timer import FixedRateSchedule, FixedRateTimer
+import pytest
+
+
+def run_timer(
+    timer: FixedRateTimer, clock: VirtualClock, calls: int, duration: float
+) -> list:
+    """
+    Runs the timer on the virtual clock for the given number of calls, each lasting `duration` seconds.
+
+    :return: Start times of the calls.
+    """
+    starts = []
+
+    def call() -> None:
+        starts.append(clock.monotonic())
+        clock.advance(duration)
+        if len(starts) == calls:
+            timer.cancel()
+
+    timer.function = call
+    timer.start()
+    timer.join(timeout=5)
+    assert not timer.is_alive()
+    return starts
+
+
+def test_missed_deadlines_are_skipped():
+    schedule = FixedRateSchedule(interval=1.0)
+    schedule.start(now=0.0)
+    schedule.begin(now=1.0)
+    assert schedule.end(now=1.2) == 2.0
+    schedule.begin(now=2.0)
+    # Overrun past the deadlines at 3 and 4
+    assert schedule.end(now=4.5) == 5.0
+    statistics = schedule.statistics
+    assert (statistics["ticks"], statistics["overruns"], statistics["skipped"]) == (
+        2,
+        1,
+        2,
+    )
+
+
+def test_missed_deadlines_are_caught_up():
+    schedule = FixedRateSchedule(interval=1.0, catch_up=True, max_catch_up=2)
+    schedule.start(now=0.0)
+    schedule.begin(now=1.0)
+    # Overrun past the deadlines at 2, 3 and 4, of which the last two are caught up
+    assert schedule.end(now=4.5) == 3.0
+    schedule.begin(now=4.5)
+    assert schedule.end(now=4.6) == 4.0
+    schedule.begin(now=4.6)
+    # Caught up twice in a row, the deadline at 5 is skipped
+    assert schedule.end(now=5.1) == 6.0
+    schedule.begin(now=6.0)
+    assert schedule.end(now=6.1) == 7.0
+    statistics = schedule.statistics
+    assert (statistics["overruns"], statistics["skipped"]) == (3, 2)
+    assert statistics["lateness_max"] == pytest.approx(1.5)
+
+
+def test_timer_does_not_drift():
+    clock = VirtualClock()
+    timer = FixedRateTimer(interval=0.5, function=None, clock=clock)
+    starts = run_timer(timer, clock=clock, calls=100, duration=0.3)
+    assert starts == pytest.approx([0.5 * (k + 1) for k in range(100)])
+    statistics = timer.statistics
+    assert statistics["ticks"] == 100
+    assert statistics["period_mean"] == pytest.approx(0.5)
+    assert statistics["period_jitter"] == pytest.approx(0.0, abs=1e-9)
+    assert statistics["lateness_max"] == pytest.approx(0.0, abs=1e-9)
+
+
+def test_timer_skips_calls_after_overruns():
+    clock = VirtualClock()
+    timer = FixedRateTimer(interval=1.0, function=None, clock=clock)
+    starts = run_timer(timer, clock=clock, calls=5, duration=2.5)
+    assert starts == pytest.approx([1.0, 4.0, 7.0, 10.0, 13.0])
+    assert timer.statistics["skipped"] == 10
+
+
+def test_timer_catches_up_after_overruns():
+    clock = VirtualClock()
+    timer = FixedRateTimer(interval=1.0, function=None, catch_up=True, clock=clock)
+    starts = run_timer(timer, clock=clock, calls=4, duration=1.5)
+    # Every other call is caught up, the following missed deadline is skipped
+    assert starts == pytest.approx([1.0, 2.5, 4.0, 5.5])
+    assert timer.statistics["skipped"] == 2
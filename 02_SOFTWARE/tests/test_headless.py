@@ -0,0 +1,81 @@
+from setup import Setup
+from Utility.Clock import VirtualClock
+from Utility.ConfigurationHandler import ConfigurationHandler
+from Utility.Schedule import Schedule
+import headless
+import numpy as np
+import pytest
+
+
+@pytest.fixture
+def clock() -> VirtualClock:
+    return VirtualClock()
+
+
+@pytest.fixture
+def setup(clock) -> Setup:
+    setup = Setup(config=ConfigurationHandler(), clock=clock)
+    setup.simulation_mode = True
+    return setup
+
+
+def test_run_follows_the_schedules(setup, clock):
+    changes = []
+    set_setpoint = setup.set_setpoint
+    setup.set_setpoint = lambda value: changes.append(
+        (clock.monotonic(), value)
+    ) or set_setpoint(value)
+    schedules = {
+        "setpoint": Schedule.parse("0:5, 20:8"),
+        "flow": Schedule.parse("0.6"),
+    }
+    headless.run(setup=setup, schedules=schedules, duration=30)
+    assert changes == [(0.0, 5.0), (20.0, 8.0)]
+    assert clock.monotonic() == 30.0
+    assert setup.get_current_flow_value() == 0.6
+    assert setup.temperature_difference_setpoint == 8.0
+
+
+def test_run_applies_a_pwm_schedule(setup, clock):
+    # Heating is only allowed once a sufficient flow has been measured
+    setup.set_flow(0.6)
+    for _ in range(10):
+        clock.advance(0.25)
+        setup.measure()
+    headless.run(
+        setup=setup, schedules={"pwm": Schedule.parse("0:0.2, 10:0.7")}, duration=15
+    )
+    assert setup.get_current_pwm_value() == 0.7
+
+
+@pytest.mark.parametrize(
+    "arguments", [["--setpoint", "5", "--pwm", "0.5"], ["--setpoint", "5:x"]]
+)
+def test_conflicting_or_invalid_schedules_are_rejected(arguments):
+    with pytest.raises((SystemExit, ValueError)):
+        headless.parse_arguments(arguments)
+
+
+def test_main_records_a_simulated_run(tmp_path):
+    output = tmp_path / "run.csv"
+    headless.main(
+        [
+            "--pwm",
+            "0.5",
+            "--flow",
+            "0.6",
+            "--duration",
+            "20",
+            "--speed",
+            "100",
+            "--output",
+            str(output),
+        ]
+    )
+    with open(output) as file:
+        signals = file.readline().strip().split(",")
+    recorded = np.loadtxt(output, delimiter=",", skiprows=1, ndmin=2)
+    assert "PWM" in signals
+    # Sampled every 0.25 s of simulated time
+    assert len(recorded) == pytest.approx(80, abs=8)
+    assert recorded[-1, signals.index("PWM")] == 0.5